@@ -5,12 +5,14 @@ from urllib.parse import quote
 
 from bs4 import BeautifulSoup
 from utils.logger import Log
+from utils.http_pool import get_http_registry
 
 log_ank = Log(__name__).getlog()
 
 
 class Anikore:
-    def __init__(self):
+    def __init__(self, http=None):
+        self._http = http or get_http_registry()
         self.url = "https://www.anikore.jp"
         self._score_cache = {}
 
@@ -87,44 +89,48 @@ class Anikore:
             self.url + "/search/all/?q=" + kw,
         ]
         try:
-            async with httpx.AsyncClient(timeout=config.timeout) as client:
-                for search_url in search_urls:
-                    log_ank.debug("正在向{}获取请求(async)".format(search_url))
-                    page = (await client.get(search_url, headers=config.real_headers)).content
-                    soup = BeautifulSoup(page, "lxml")
-                    log_ank.debug("正在解析网页(async)")
-
-                    for unit in soup.find_all("div", attrs={"class": "l-searchPageRanking_unit"}):
-                        a = unit.find("a", href=True)
-                        if not a:
-                            continue
-                        href = a.get("href") or ""
-                        m = re.search(r"/anime/(\d+)/", href)
-                        if not m:
-                            continue
+            for search_url in search_urls:
+                log_ank.debug("正在向{}获取请求(async)".format(search_url))
+                page = (
+                    await self._http.request(
+                        "GET",
+                        search_url, headers=config.real_headers, timeout=config.timeout
+                    )
+                ).content
+                soup = BeautifulSoup(page, "lxml")
+                log_ank.debug("正在解析网页(async)")
+
+                for unit in soup.find_all("div", attrs={"class": "l-searchPageRanking_unit"}):
+                    a = unit.find("a", href=True)
+                    if not a:
+                        continue
+                    href = a.get("href") or ""
+                    m = re.search(r"/anime/(\d+)/", href)
+                    if not m:
+                        continue
+                    ani_id = m.group(1)
+                    score = self._extract_score_from_unit(unit)
+                    if score is not None:
+                        self._score_cache[ani_id] = score
+                    log_ank.debug("{},anikore动画id获取成功(async)".format(anime))
+                    return ani_id
+
+                block = soup.find("div", attrs={"class": "l-searchPageRanking_unit"})
+                if block and block.a and block.a.get("href"):
+                    href = block.a.get("href")
+                    m = re.search(r"/anime/(\d+)/", href)
+                    if m:
                         ani_id = m.group(1)
-                        score = self._extract_score_from_unit(unit)
-                        if score is not None:
-                            self._score_cache[ani_id] = score
                         log_ank.debug("{},anikore动画id获取成功(async)".format(anime))
                         return ani_id
 
-                    block = soup.find("div", attrs={"class": "l-searchPageRanking_unit"})
-                    if block and block.a and block.a.get("href"):
-                        href = block.a.get("href")
-                        m = re.search(r"/anime/(\d+)/", href)
-                        if m:
-                            ani_id = m.group(1)
-                            log_ank.debug("{},anikore动画id获取成功(async)".format(anime))
-                            return ani_id
-
-                    for a in soup.find_all("a", href=True):
-                        href = a.get("href") or ""
-                        m = re.search(r"/anime/(\d+)/", href)
-                        if m:
-                            ani_id = m.group(1)
-                            log_ank.debug("{},anikore动画id获取成功(兜底)(async)".format(anime))
-                            return ani_id
+                for a in soup.find_all("a", href=True):
+                    href = a.get("href") or ""
+                    m = re.search(r"/anime/(\d+)/", href)
+                    if m:
+                        ani_id = m.group(1)
+                        log_ank.debug("{},anikore动画id获取成功(兜底)(async)".format(anime))
+                        return ani_id
         except Exception:
             log_ank.debug("{},anikore动画id获取失败(async)".format(anime))
         return "Error"
@@ -165,8 +171,11 @@ class Anikore:
                 return self._score_cache[ani_id]
             score_url = self.url + "/anime/" + ani_id
             log_ank.debug("正在向{}发送请求(async)".format(score_url))
-            async with httpx.AsyncClient(timeout=10) as client:
-                page = (await client.get(score_url, headers=config.real_headers)).content
+            page = (
+                await self._http.request(
+                    "GET", score_url, headers=config.real_headers, timeout=10
+                )
+            ).content
             log_ank.debug("正在解析网页(async)")
             soup = BeautifulSoup(page, "lxml")
             score_block = soup.find(
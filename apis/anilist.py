@@ -1,14 +1,22 @@
 import json
 import httpx
 
+from typing import Dict, List
+
 from data import config
 from utils.logger import Log
+from utils.http_pool import get_http_registry
 
 log_anl = Log(__name__).getlog()
 
+# 批量查询时每个请求包含的条目数
+ID_BATCH_SIZE = 10
+SCORE_BATCH_SIZE = 50
+
 
 class AniList:
-    def __init__(self):
+    def __init__(self, http=None):
+        self._http = http or get_http_registry()
         self.api_url = "https://graphql.anilist.co"
         self._headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
@@ -23,14 +31,149 @@ class AniList:
         return res.json()
 
     async def _apost(self, query: str, variables: dict) -> dict:
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            res = await client.post(
-                self.api_url,
-                json={"query": query, "variables": variables},
-                headers=self._headers,
-            )
-            res.raise_for_status()
-            return res.json()
+        res = await self._http.request(
+            "POST",
+            self.api_url,
+            json={"query": query, "variables": variables},
+            headers=self._headers,
+            timeout=config.timeout,
+        )
+        res.raise_for_status()
+        return res.json()
+
+    @staticmethod
+    def _score_from_media(media: dict):
+        mean_score = media.get("meanScore")
+        avg_score = media.get("averageScore")
+        if mean_score is not None and avg_score is not None:
+            return (mean_score + avg_score) / 20
+        if mean_score is not None:
+            return mean_score / 10
+        if avg_score is not None:
+            return avg_score / 10
+        return None
+
+    @staticmethod
+    def _chunks(items: list, size: int):
+        for i in range(0, len(items), size):
+            yield items[i : i + size]
+
+    @staticmethod
+    def _ids_query(n: int) -> str:
+        # 别名批量: a0: Media(search: $s0) {...} a1: ...
+        params = ", ".join("$s{}: String".format(i) for i in range(n))
+        body = "\n".join(
+            "a{0}: Media(search: $s{0}, type: ANIME) {{ id }}".format(i) for i in range(n)
+        )
+        return "query ({}) {{\n{}\n}}".format(params, body)
+
+    SCORES_QUERY = """
+    query ($ids: [Int], $perPage: Int) {
+      Page (page: 1, perPage: $perPage) {
+        media (id_in: $ids, type: ANIME) {
+          id
+          meanScore
+          averageScore
+        }
+      }
+    }
+    """
+
+    @staticmethod
+    def _parse_ids(names: List[str], payload: dict) -> Dict[str, object]:
+        # 未找到(404)的条目记为 "Error"；其他错误的条目不返回，留给调用方单独重试
+        data = payload.get("data") or {}
+        failed = set()
+        for err in payload.get("errors") or []:
+            path = err.get("path") or []
+            if path and err.get("status") != 404:
+                failed.add(path[0])
+        out = {}
+        for i, name in enumerate(names):
+            alias = "a{}".format(i)
+            if alias in failed:
+                continue
+            media = data.get(alias)
+            if media and media.get("id"):
+                out[name] = media["id"]
+            elif alias in data:
+                out[name] = "Error"
+        return out
+
+    def _parse_scores(self, ids: List[int], payload: dict) -> Dict[str, object]:
+        media_list = ((payload.get("data") or {}).get("Page") or {}).get("media") or []
+        found = {str(m.get("id")): self._score_from_media(m) for m in media_list}
+        return {
+            str(i): found.get(str(i)) if found.get(str(i)) is not None else "None"
+            for i in ids
+        }
+
+    def get_al_ids(self, animes: List[str]) -> Dict[str, object]:
+        """批量获取 anl_id，每 ID_BATCH_SIZE 个标题合并为一个请求"""
+        names = list(dict.fromkeys(a for a in animes if a))
+        result = {}
+        for chunk in self._chunks(names, ID_BATCH_SIZE):
+            variables = {"s{}".format(i): name for i, name in enumerate(chunk)}
+            try:
+                log_anl.debug("正在批量获取{}个anl_id".format(len(chunk)))
+                res = httpx.post(
+                    self.api_url,
+                    json={"query": self._ids_query(len(chunk)), "variables": variables},
+                    headers=self._headers,
+                    timeout=config.timeout,
+                )
+                result.update(self._parse_ids(chunk, res.json()))
+            except:
+                log_anl.debug("批量获取anl_id失败")
+        return result
+
+    async def get_al_ids_async(self, animes: List[str]) -> Dict[str, object]:
+        names = list(dict.fromkeys(a for a in animes if a))
+        result = {}
+        for chunk in self._chunks(names, ID_BATCH_SIZE):
+            variables = {"s{}".format(i): name for i, name in enumerate(chunk)}
+            try:
+                log_anl.debug("正在批量获取{}个anl_id(async)".format(len(chunk)))
+                res = await self._http.request(
+                    "POST",
+                    self.api_url,
+                    json={"query": self._ids_query(len(chunk)), "variables": variables},
+                    headers=self._headers,
+                    timeout=config.timeout,
+                )
+                result.update(self._parse_ids(chunk, res.json()))
+            except:
+                log_anl.debug("批量获取anl_id失败(async)")
+        return result
+
+    def get_al_scores(self, anl_ids: List[str]) -> Dict[str, object]:
+        """批量获取 anl 评分，按 id_in 每 SCORE_BATCH_SIZE 个一页"""
+        ids = list(dict.fromkeys(int(i) for i in anl_ids if str(i).isdigit()))
+        result = {}
+        for chunk in self._chunks(ids, SCORE_BATCH_SIZE):
+            try:
+                log_anl.debug("正在批量获取{}个anl评分".format(len(chunk)))
+                payload = self._post(
+                    self.SCORES_QUERY, {"ids": chunk, "perPage": len(chunk)}
+                )
+                result.update(self._parse_scores(chunk, payload))
+            except:
+                log_anl.debug("批量获取anl评分失败")
+        return result
+
+    async def get_al_scores_async(self, anl_ids: List[str]) -> Dict[str, object]:
+        ids = list(dict.fromkeys(int(i) for i in anl_ids if str(i).isdigit()))
+        result = {}
+        for chunk in self._chunks(ids, SCORE_BATCH_SIZE):
+            try:
+                log_anl.debug("正在批量获取{}个anl评分(async)".format(len(chunk)))
+                payload = await self._apost(
+                    self.SCORES_QUERY, {"ids": chunk, "perPage": len(chunk)}
+                )
+                result.update(self._parse_scores(chunk, payload))
+            except:
+                log_anl.debug("批量获取anl评分失败(async)")
+        return result
 
     def get_al_id(self, anime: str):
         query = """
@@ -95,14 +238,9 @@ class AniList:
             try:
                 payload = self._post(query, variables)
                 media = payload.get("data", {}).get("Media", {})
-                mean_score = media.get("meanScore")
-                avg_score = media.get("averageScore")
-                if mean_score is not None and avg_score is not None:
-                    return (mean_score + avg_score) / 20
-                if mean_score is not None:
-                    return mean_score / 10
-                if avg_score is not None:
-                    return avg_score / 10
+                score = self._score_from_media(media)
+                if score is not None:
+                    return score
             except:
                 return "None"
         return "None"
@@ -128,14 +266,9 @@ class AniList:
             try:
                 payload = await self._apost(query, variables)
                 media = payload.get("data", {}).get("Media", {})
-                mean_score = media.get("meanScore")
-                avg_score = media.get("averageScore")
-                if mean_score is not None and avg_score is not None:
-                    return (mean_score + avg_score) / 20
-                if mean_score is not None:
-                    return mean_score / 10
-                if avg_score is not None:
-                    return avg_score / 10
+                score = self._score_from_media(media)
+                if score is not None:
+                    return score
             except:
                 return "None"
         return "None"
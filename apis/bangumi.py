@@ -5,12 +5,14 @@ import prettytable as pt
 from bs4 import BeautifulSoup
 from data import config
 from utils.logger import Log
+from utils.http_pool import get_http_registry
 
 log_bgm = Log(__name__).getlog()
 
 
 class Bangumi:
-    def __init__(self):
+    def __init__(self, http=None):
+        self._http = http or get_http_registry()
         self.json_path = config.work_dir + "/data/jsons/season.json"
         self.animes_path = config.work_dir + "/data/jsons/animes.json"
         self.bangumi_api = "https://api.bgm.tv"
@@ -34,10 +36,11 @@ class Bangumi:
 
     async def get_info_async(self):
         log_bgm.debug("向{}发送请求(async)".format(self.bangumi_api + "/calendar"))
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            resp = await client.get(self.bangumi_api + "/calendar")
-            resp.raise_for_status()
-            self.bgm_calendar = resp.json()
+        resp = await self._http.request(
+            "GET", self.bangumi_api + "/calendar", timeout=config.timeout
+        )
+        resp.raise_for_status()
+        self.bgm_calendar = resp.json()
         with open(self.json_path, "w") as f:
             f.write(
                 json.dumps(
@@ -138,13 +141,14 @@ class Bangumi:
     async def get_score_async(self, bgm_id: str):
         log_bgm.debug("正在获取{}的bgm评分(async)".format(bgm_id))
         bgm_id = str(bgm_id)
-        async with httpx.AsyncClient(timeout=10) as client:
-            res = await client.get(
-                self.bangumi_api + "/subject/" + bgm_id,
-                headers=self.headers,
-            )
-            res.raise_for_status()
-            detail = res.json()
+        res = await self._http.request(
+            "GET",
+            self.bangumi_api + "/subject/" + bgm_id,
+            headers=self.headers,
+            timeout=10,
+        )
+        res.raise_for_status()
+        detail = res.json()
         return detail["rating"]["score"]
 
     def get_score_bs4(self, bgm_id: str):
@@ -163,8 +167,11 @@ class Bangumi:
     async def get_score_bs4_async(self, bgm_id: str):
         log_bgm.debug("正在获取{}的bgm评分(async-bs4)".format(bgm_id))
         bs4_url = self.bs4_url + "/subject/" + bgm_id
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            page = (await client.get(bs4_url, headers=config.real_headers)).content
+        page = (
+            await self._http.request(
+                "GET", bs4_url, headers=config.real_headers, timeout=config.timeout
+            )
+        ).content
         soup = BeautifulSoup(page, "lxml")
         return soup.find(
             "span", attrs={"class": "number", "property": "v:average"}
@@ -182,10 +189,11 @@ class Bangumi:
     async def get_anime_info_async(self, bgm_id: str):
         log_bgm.info("正在获取{}的信息(async)".format(bgm_id))
         search_url = "https://api.bgm.tv/v0/subjects/" + str(bgm_id)
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            res = await client.get(search_url, headers=self.headers)
-            res.raise_for_status()
-            return res.json()
+        res = await self._http.request(
+            "GET", search_url, headers=self.headers, timeout=config.timeout
+        )
+        res.raise_for_status()
+        return res.json()
 
     def get_anime_name(self, bgm_id: str):
         info = self.get_anime_info(bgm_id)
@@ -220,10 +228,12 @@ class Bangumi:
         filters["type"] = [2]
         post_body["filter"] = filters
         post_body = json.dumps(post_body)
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            res = await client.post(search_url, headers=self.headers, data=post_body)
-            res.raise_for_status()
-            return res.json()
+        res = await self._http.request(
+            "POST",
+            search_url, headers=self.headers, content=post_body, timeout=config.timeout
+        )
+        res.raise_for_status()
+        return res.json()
 
     def search_cli(self, animes_name: str):
         search_dict = self.search_anime(animes_name)
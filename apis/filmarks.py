@@ -3,12 +3,14 @@ import httpx
 from bs4 import BeautifulSoup
 from data import config
 from utils.logger import Log
+from utils.http_pool import get_http_registry
 
 log_fm = Log(__name__).getlog()
 
 
 class Filmarks:
-    def __init__(self):
+    def __init__(self, http=None):
+        self._http = http or get_http_registry()
         self.url = "https://filmarks.com"
 
     def get_fm_score(self, anime: str):
@@ -32,8 +34,11 @@ class Filmarks:
         log_fm.debug("正在获取{}的fm分数(async)".format(anime))
         search_url = self.url + "/search/animes?q=" + anime
         log_fm.debug("正在向{}发送请求(async)".format(search_url))
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            page = (await client.get(search_url, headers=config.real_headers)).content
+        page = (
+            await self._http.request(
+                "GET", search_url, headers=config.real_headers, timeout=config.timeout
+            )
+        ).content
         try:
             log_fm.debug("正在解析页面(async)")
             soup = BeautifulSoup(page, "lxml")
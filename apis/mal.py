@@ -3,12 +3,14 @@ import httpx
 from bs4 import BeautifulSoup
 from data import config
 from utils.logger import Log
+from utils.http_pool import get_http_registry
 
 log_mal = Log(__name__).getlog()
 
 
 class MyAnimeList:
-    def __init__(self):
+    def __init__(self, http=None):
+        self._http = http or get_http_registry()
         self.url = "https://myanimelist.net"
 
     def search_anime(self, anime: str):
@@ -37,8 +39,11 @@ class MyAnimeList:
         log_mal.debug("正在获取{}的mal_id(async)".format(anime))
         search_url = self.url + "/anime.php?q=" + anime + "&cat=anime"
         log_mal.debug("正在向{}发送请求(async)".format(search_url))
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            page = (await client.get(search_url, headers=config.real_headers)).content
+        page = (
+            await self._http.request(
+                "GET", search_url, headers=config.real_headers, timeout=config.timeout
+            )
+        ).content
 
         try:
             soup = BeautifulSoup(page, "lxml")
@@ -70,8 +75,9 @@ class MyAnimeList:
         if mal_id != "Error":
             log_mal.debug("正在获取{}的mal评分(async)".format(mal_id))
             score_url = self.url + "/anime/" + str(mal_id)
-            async with httpx.AsyncClient(timeout=config.timeout) as client:
-                page = (await client.get(score_url)).content
+            page = (
+                await self._http.request("GET", score_url, timeout=config.timeout)
+            ).content
 
             soup = BeautifulSoup(page, "lxml")
             mal_score = soup.find("div", attrs={"class": "score-label"}).string
@@ -6,18 +6,32 @@
 """
 
 import asyncio
+import copy
+import heapq
 import re
+import sqlite3
 import unicodedata
 import json
 import os
+import sys
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from array import array
+from collections import Counter
 from functools import lru_cache
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
 from difflib import SequenceMatcher
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
 
 import httpx
+from cachetools import LRUCache, TTLCache
 
 from data.config import work_dir
+from utils.http_pool import HttpClientRegistry, get_http_registry
+from utils.snapshot import FileSnapshot
 
 try:
     from rapidfuzz import fuzz as rapidfuzz_fuzz
@@ -46,35 +60,15 @@ _FM_CLIENT = None
 ENABLE_ANIKORE = False
 
 try:
-    from utils.ext_linker import lookup_ext_ids
+    from utils.ext_linker import MAP_PATH, add_map_listener, load_map_entries, lookup_ext_ids
 except Exception:
+    MAP_PATH = None
+    add_map_listener = None
+    load_map_entries = None
     lookup_ext_ids = None
 
 
 _ASYNC_TIMEOUT = float(os.getenv("PRECISE_HTTP_TIMEOUT", "10"))
-_ASYNC_MAX_CONNECTIONS = int(os.getenv("PRECISE_HTTP_MAX_CONNECTIONS", "50"))
-_ASYNC_MAX_KEEPALIVE = int(os.getenv("PRECISE_HTTP_MAX_KEEPALIVE", "20"))
-_ASYNC_QUERY_CONCURRENCY = int(os.getenv("PRECISE_QUERY_CONCURRENCY", "4"))
-_SEARCH_SEM_BY_LOOP: Dict[int, asyncio.Semaphore] = {}
-
-
-def _build_async_client() -> httpx.AsyncClient:
-    limits = httpx.Limits(
-        max_connections=_ASYNC_MAX_CONNECTIONS,
-        max_keepalive_connections=_ASYNC_MAX_KEEPALIVE,
-    )
-    timeout = httpx.Timeout(_ASYNC_TIMEOUT)
-    return httpx.AsyncClient(limits=limits, timeout=timeout)
-
-
-def _get_search_semaphore() -> asyncio.Semaphore:
-    loop = asyncio.get_running_loop()
-    key = id(loop)
-    sem = _SEARCH_SEM_BY_LOOP.get(key)
-    if sem is None:
-        sem = asyncio.Semaphore(_ASYNC_QUERY_CONCURRENCY)
-        _SEARCH_SEM_BY_LOOP[key] = sem
-    return sem
 
 
 @dataclass
@@ -135,6 +129,229 @@ class AnimeInfo:
         return names
 
 
+
+_SEARCH_CACHE_TTL = float(os.getenv("PRECISE_SEARCH_CACHE_TTL", "600"))
+_SEARCH_CACHE_MAX_BYTES = int(os.getenv("PRECISE_SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+_ANIME_INFO_FIELDS = tuple(f.name for f in fields(AnimeInfo))
+
+
+def _estimate_results_bytes(results: Tuple[AnimeInfo, ...]) -> int:
+    """粗略估计一组搜索结果占用的内存字节数"""
+    total = sys.getsizeof(results)
+    for info in results:
+        total += sys.getsizeof(info)
+        for name in _ANIME_INFO_FIELDS:
+            total += sys.getsizeof(getattr(info, name))
+    return max(1, total)
+
+
+def _normalize_query_keyword(keyword: str) -> str:
+    """查询键用的关键词规范化：NFKC + casefold + 合并空白"""
+    return " ".join(unicodedata.normalize("NFKC", keyword or "").casefold().split())
+
+
+def _filters_key(filters: dict) -> tuple:
+    return tuple(
+        sorted((k, repr(v)) for k, v in filters.items() if v is not None and v != "")
+    )
+
+
+# 批量搜索期间的子查询备忘(含上游成功返回的空结果)：同一批次内相同的上游子查询只请求一次
+_BATCH_MEMO: ContextVar[Optional[Dict[tuple, Tuple[AnimeInfo, ...]]]] = ContextVar(
+    "precise_batch_memo", default=None
+)
+
+
+class SearchResultCache:
+    """
+    各搜索源的响应缓存 (TTL + LRU，按字节数限制容量)
+
+    键为 (源, 规范化关键词, 过滤条件)，值为解析后的 AnimeInfo 列表。
+    存取时都做浅拷贝，调用方后续的补全/合并不会污染缓存。
+    上游出错时调用方不写入；成功但为空的结果不进入缓存，只记入当前批量搜索的备忘。
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.enabled = ttl > 0 and max_bytes > 0
+        self._cache = TTLCache(
+            maxsize=max(1, max_bytes), ttl=max(ttl, 0.001), getsizeof=_estimate_results_bytes
+        )
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(source: str, keyword: str, filters: dict) -> tuple:
+        return (source, _normalize_query_keyword(keyword), _filters_key(filters))
+
+    def _count(self, source: str, field: str) -> None:
+        stats = self._stats.setdefault(source, {"hits": 0, "misses": 0, "stores": 0, "batch_hits": 0})
+        stats[field] += 1
+
+    def get(self, key: tuple) -> Optional[List[AnimeInfo]]:
+        memo = _BATCH_MEMO.get()
+        if memo is not None and key in memo:
+            with self._lock:
+                self._count(key[0], "batch_hits")
+            return [replace(info) for info in memo[key]]
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._cache.get(key)
+            self._count(key[0], "misses" if value is None else "hits")
+        if value is None:
+            return None
+        return [replace(info) for info in value]
+
+    def put(self, key: tuple, results: List[AnimeInfo]) -> None:
+        value = tuple(replace(info) for info in results)
+        memo = _BATCH_MEMO.get()
+        if memo is not None:
+            memo[key] = value
+        if not self.enabled or not results:
+            return
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # 单条结果超过容量上限
+                return
+            self._count(key[0], "stores")
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "bytes": int(self._cache.currsize),
+                "max_bytes": int(self._cache.maxsize),
+                "ttl": self._cache.ttl,
+                "sources": {k: dict(v) for k, v in self._stats.items()},
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._stats.clear()
+
+
+_SEARCH_CACHE = SearchResultCache(_SEARCH_CACHE_TTL, _SEARCH_CACHE_MAX_BYTES)
+
+
+def get_search_cache_stats() -> Dict[str, object]:
+    """搜索源响应缓存的容量与各源命中统计"""
+    return _SEARCH_CACHE.stats()
+
+
+def clear_search_cache() -> None:
+    _SEARCH_CACHE.clear()
+
+
+class SingleFlight:
+    """
+    请求合并：同一事件循环内相同键的并发调用只执行一次，其余调用方等待并共享结果。
+
+    计算放在独立 Task 中执行，各调用方通过 shield 等待，
+    某个调用方被取消(如客户端断开)不会影响其他调用方。
+    """
+
+    def __init__(self):
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats = {"calls": 0, "shared": 0}
+
+    @staticmethod
+    def _consume(task: asyncio.Task) -> None:
+        # 避免无人等待时出现 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """返回 (结果, 是否复用了进行中的调用)"""
+        loop = asyncio.get_running_loop()
+        calls = self._calls.get(loop)
+        if calls is None:
+            calls = {}
+            self._calls[loop] = calls
+        self._stats["calls"] += 1
+        task = calls.get(key)
+        shared = task is not None
+        if shared:
+            self._stats["shared"] += 1
+        else:
+            task = loop.create_task(factory())
+            calls[key] = task
+
+            def _done(t: asyncio.Task, k: Hashable = key) -> None:
+                if calls.get(k) is t:
+                    del calls[k]
+                self._consume(t)
+
+            task.add_done_callback(_done)
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict[str, int]:
+        try:
+            in_flight = len(self._calls.get(asyncio.get_running_loop()) or {})
+        except RuntimeError:
+            in_flight = 0
+        return {**self._stats, "in_flight": in_flight}
+
+
+# 顶层精确搜索与各源子查询分别合并
+_SEARCH_FLIGHT = SingleFlight()
+_UPSTREAM_FLIGHT = SingleFlight()
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, int]]:
+    return {"search": _SEARCH_FLIGHT.stats(), "upstream": _UPSTREAM_FLIGHT.stats()}
+
+
+_DEFAULT_DEADLINE_MS = int(os.getenv("PRECISE_SEARCH_DEADLINE_MS", "0"))
+# 本地映射索引作为 precise 第一阶段(需显式开启，会改变默认排序)；相似度达到阈值的命中视为已确定，
+# 跳过额外 AniList 查询与 Jikan 模糊搜索，改为按 MAL ID 直接取条目
+_LOCAL_FIRST = os.getenv("PRECISE_LOCAL_FIRST", "0").strip().lower() in {"1", "true", "yes", "on"}
+_LOCAL_RESOLVE_SCORE = float(os.getenv("PRECISE_LOCAL_RESOLVE_SCORE", "0.97"))
+# 本地索引只收录映射表里的原名/中文名，罗马音等写法只能命中字面相近的无关条目；低于该相似度的不返回
+_LOCAL_MIN_SCORE = float(os.getenv("PRECISE_LOCAL_MIN_SCORE", "0.75"))
+
+
+class Deadline:
+    """
+    一次搜索的整体延迟预算
+
+    各阶段按剩余时间限时等待，超时的阶段记入 skipped；budget 为空表示不限时。
+    被放弃等待的上游请求在 SingleFlight 的独立 Task 中继续完成并写入缓存。
+    """
+
+    def __init__(self, budget_ms: Optional[int] = None):
+        self.budget = budget_ms / 1000.0 if budget_ms and budget_ms > 0 else None
+        self.start = time.monotonic()
+        self.skipped: List[str] = []
+
+    def remaining(self) -> Optional[float]:
+        if self.budget is None:
+            return None
+        return max(0.0, self.start + self.budget - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.budget is not None and self.remaining() <= 0.0
+
+    def skip(self, stage: str) -> None:
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.start) * 1000)
+
+    def report(self) -> dict:
+        return {
+            "deadline_ms": int(self.budget * 1000) if self.budget is not None else None,
+            "elapsed_ms": self.elapsed_ms(),
+            "partial": bool(self.skipped),
+            "skipped": list(self.skipped),
+        }
+
+
 def _has_japanese(text: str) -> bool:
     for ch in text:
         code = ord(ch)
@@ -147,74 +364,139 @@ def _has_japanese(text: str) -> bool:
     return False
 
 
-def _normalize_title(text: str) -> str:
-    if not text:
-        return ""
-    t = unicodedata.normalize("NFKC", text).lower()
-    roman_map = {
-        "ⅰ": "1",
-        "ⅱ": "2",
-        "ⅲ": "3",
-        "ⅳ": "4",
-        "ⅴ": "5",
-        "ⅵ": "6",
-        "ⅶ": "7",
-        "ⅷ": "8",
-        "ⅸ": "9",
-        "ⅹ": "10",
-        "Ⅰ": "1",
-        "Ⅱ": "2",
-        "Ⅲ": "3",
-        "Ⅳ": "4",
-        "Ⅴ": "5",
-        "Ⅵ": "6",
-        "Ⅶ": "7",
-        "Ⅷ": "8",
-        "Ⅸ": "9",
-        "Ⅹ": "10",
+_TITLE_FEATURE_CACHE_SIZE = int(os.getenv("PRECISE_TITLE_CACHE_SIZE", "8192"))
+
+_ROMAN_NUMERAL_TABLE = str.maketrans(
+    {
+        "ⅰ": " 1 ",
+        "ⅱ": " 2 ",
+        "ⅲ": " 3 ",
+        "ⅳ": " 4 ",
+        "ⅴ": " 5 ",
+        "ⅵ": " 6 ",
+        "ⅶ": " 7 ",
+        "ⅷ": " 8 ",
+        "ⅸ": " 9 ",
+        "ⅹ": " 10 ",
+        "Ⅰ": " 1 ",
+        "Ⅱ": " 2 ",
+        "Ⅲ": " 3 ",
+        "Ⅳ": " 4 ",
+        "Ⅴ": " 5 ",
+        "Ⅵ": " 6 ",
+        "Ⅶ": " 7 ",
+        "Ⅷ": " 8 ",
+        "Ⅸ": " 9 ",
+        "Ⅹ": " 10 ",
     }
-    for k, v in roman_map.items():
-        t = t.replace(k, f" {v} ")
-    t = re.sub(r"\[.*?\]|\(.*?\)|\{.*?\}|<.*?>", " ", t)
-    t = re.sub(r"(season|part|cour)\s*\d+", " ", t, flags=re.IGNORECASE)
-    t = re.sub(r"\b(s\d+|s\d+\s*e\d+|ova|oad|sp|special|movie|tv)\b", " ", t)
-    t = re.sub(r"\b(ii|iii|iv|v|vi|vii|viii|ix|x)\b", " ", t)
-    t = re.sub(r"[^\w\u3040-\u30ff\u4e00-\u9fff]+", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
+)
+_RE_BRACKETS = re.compile(r"\[.*?\]|\(.*?\)|\{.*?\}|<.*?>")
+_RE_SEASON_PART = re.compile(r"(season|part|cour)\s*\d+", re.IGNORECASE)
+_RE_EPISODE_KIND = re.compile(r"\b(s\d+|s\d+\s*e\d+|ova|oad|sp|special|movie|tv)\b")
+_RE_ROMAN_WORD = re.compile(r"\b(ii|iii|iv|v|vi|vii|viii|ix|x)\b")
+_RE_NON_WORD = re.compile(r"[^\w\u3040-\u30ff\u4e00-\u9fff]+")
+_RE_SPACES = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class TitleFeatures:
+    """标题的预计算特征（规范化形式、分词、bigram集合、文字类型）"""
+
+    normalized: str
+    tokens: Tuple[str, ...]
+    token_set: FrozenSet[str]
+    bigrams: FrozenSet[str]
+    has_japanese: bool
+    # 空格分词（rapidfuzz token_set_ratio 的切分方式）及字符计数，用于相似度上界
+    words: FrozenSet[str] = frozenset()
+    char_counts: Optional[Counter] = None
+    sorted_words: str = ""
+    sorted_word_char_counts: Optional[Counter] = None
+
+
+_EMPTY_TITLE_FEATURES = TitleFeatures("", (), frozenset(), frozenset(), False)
+
+
+def _compute_normalized_title(text: str) -> str:
+    t = unicodedata.normalize("NFKC", text).lower()
+    t = t.translate(_ROMAN_NUMERAL_TABLE)
+    t = _RE_BRACKETS.sub(" ", t)
+    t = _RE_SEASON_PART.sub(" ", t)
+    t = _RE_EPISODE_KIND.sub(" ", t)
+    t = _RE_ROMAN_WORD.sub(" ", t)
+    t = _RE_NON_WORD.sub(" ", t)
+    t = _RE_SPACES.sub(" ", t).strip()
     return t
 
 
-def _tokenize_title(text: str) -> List[str]:
-    n = _normalize_title(text)
-    if not n:
-        return []
-    tokens = n.split()
+@lru_cache(maxsize=_TITLE_FEATURE_CACHE_SIZE)
+def _title_features(text: str) -> TitleFeatures:
+    if not text:
+        return _EMPTY_TITLE_FEATURES
+    normalized = _compute_normalized_title(text)
+    has_jp = _has_japanese(text)
+    if not normalized:
+        return TitleFeatures("", (), frozenset(), frozenset(), has_jp)
+    normalized = sys.intern(normalized)
+
+    tokens = normalized.split()
     if len(tokens) == 1 and _has_japanese(tokens[0]) and len(tokens[0]) > 2:
         s = tokens[0]
         tokens = [s[i : i + 2] for i in range(len(s) - 1)]
-    return tokens
+    tokens = tuple(sys.intern(t) for t in tokens)
 
+    if len(normalized) < 2:
+        bigrams = frozenset((normalized,))
+    else:
+        bigrams = frozenset(normalized[i : i + 2] for i in range(len(normalized) - 1))
+
+    words = frozenset(normalized.split())
+    sorted_words = " ".join(sorted(words))
+    return TitleFeatures(
+        normalized,
+        tokens,
+        frozenset(tokens),
+        bigrams,
+        has_jp,
+        words=words,
+        char_counts=Counter(normalized),
+        sorted_words=sorted_words,
+        sorted_word_char_counts=Counter(sorted_words),
+    )
 
-def _token_overlap_score(a: str, b: str) -> float:
-    ta = _tokenize_title(a)
-    tb = _tokenize_title(b)
-    if not ta or not tb:
-        return 0.0
-    sa = set(ta)
-    sb = set(tb)
+
+def clear_title_feature_cache() -> None:
+    """Clear cached title features."""
+    _title_features.cache_clear()
+    _count_pattern_hits.cache_clear()
+
+
+def _normalize_title(text: str) -> str:
+    if not text:
+        return ""
+    return _title_features(text).normalized
+
+
+def _tokenize_title(text: str) -> List[str]:
+    return list(_title_features(text).tokens)
+
+
+def _set_jaccard(sa: FrozenSet[str], sb: FrozenSet[str]) -> float:
     if not sa or not sb:
         return 0.0
     return len(sa & sb) / len(sa | sb)
 
 
+def _token_overlap_score(a: str, b: str) -> float:
+    return _set_jaccard(_title_features(a).token_set, _title_features(b).token_set)
+
+
 def _contains_all_tokens(short_title: str, long_title: str) -> bool:
-    short_tokens = _tokenize_title(short_title)
-    long_tokens = _tokenize_title(long_title)
+    short_tokens = _title_features(short_title).token_set
+    long_tokens = _title_features(long_title).token_set
     if not short_tokens or not long_tokens:
         return False
-    return set(short_tokens).issubset(set(long_tokens))
-
-
+    return short_tokens.issubset(long_tokens)
 
 
 def _ngram_jaccard(a: str, b: str, n: int = 2) -> float:
@@ -231,16 +513,16 @@ def _ngram_jaccard(a: str, b: str, n: int = 2) -> float:
     return len(na & nb) / len(na | nb)
 
 
-def _similarity_score(a: str, b: str, mode: str = "normal") -> float:
-    if not a or not b:
-        return 0.0
-    na = _normalize_title(a)
-    nb = _normalize_title(b)
+def _similarity_from_features(
+    fa: TitleFeatures, fb: TitleFeatures, mode: str = "normal"
+) -> float:
+    na = fa.normalized
+    nb = fb.normalized
     if not na or not nb:
         return 0.0
+    jac = _set_jaccard(fa.bigrams, fb.bigrams)
+    tok = _set_jaccard(fa.token_set, fb.token_set)
     seq = SequenceMatcher(None, na, nb).ratio()
-    jac = _ngram_jaccard(na, nb, n=2)
-    tok = _token_overlap_score(a, b)
     rf = 0.0
     if rapidfuzz_fuzz:
         try:
@@ -263,6 +545,66 @@ def _similarity_score(a: str, b: str, mode: str = "normal") -> float:
     return base_score
 
 
+def _char_overlap_ratio(ca: Counter, la: int, cb: Counter, lb: int) -> float:
+    # 与 SequenceMatcher.quick_ratio 相同：公共字符数给出 ratio 的上界
+    if not la or not lb:
+        return 0.0
+    if len(ca) > len(cb):
+        ca, cb = cb, ca
+    common = 0
+    for ch, cnt in ca.items():
+        other = cb.get(ch)
+        if other:
+            common += cnt if cnt < other else other
+    return 2.0 * common / (la + lb)
+
+
+def _similarity_upper_bound(
+    fa: TitleFeatures, fb: TitleFeatures, mode: str = "normal"
+) -> float:
+    """
+    _similarity_from_features 的廉价上界（不含向量相似度）。
+
+    SequenceMatcher 与 rapidfuzz 的 ratio 都不超过字符多重集重合度，
+    Jaccard 两项直接精确计算；加权方式单调，因此组合后仍为上界。
+    """
+    na = fa.normalized
+    nb = fb.normalized
+    if not na or not nb:
+        return 0.0
+    seq = _char_overlap_ratio(fa.char_counts, len(na), fb.char_counts, len(nb))
+    jac = _set_jaccard(fa.bigrams, fb.bigrams)
+    tok = _set_jaccard(fa.token_set, fb.token_set)
+    rf = 0.0
+    if rapidfuzz_fuzz:
+        if fa.words & fb.words:
+            rf = 1.0
+        else:
+            rf = _char_overlap_ratio(
+                fa.sorted_word_char_counts,
+                len(fa.sorted_words),
+                fb.sorted_word_char_counts,
+                len(fb.sorted_words),
+            )
+    scores = [seq, jac, tok, rf]
+    scores.sort()
+    if mode == "strict":
+        return scores[-1] * 0.6 + scores[-2] * 0.3 + scores[-3] * 0.1
+    if mode == "recall":
+        return scores[-1] * 0.55 + scores[-2] * 0.45
+    return scores[-1] * 0.65 + scores[-2] * 0.35
+
+
+# rapidfuzz 与 difflib 的浮点舍入可能略高于解析上界
+_UPPER_BOUND_SLACK = 1e-9
+
+
+def _similarity_score(a: str, b: str, mode: str = "normal") -> float:
+    if not a or not b:
+        return 0.0
+    return _similarity_from_features(_title_features(a), _title_features(b), mode)
+
+
 def _get_embedding_model():
     global _EMBEDDING_MODEL
     if _EMBEDDING_MODEL is not None:
@@ -393,16 +735,17 @@ def _extract_numeric_score(value: object, min_value: float = 0.0, max_value: flo
     return score
 
 
-@lru_cache(maxsize=1)
-def _load_local_score_index() -> Dict[str, Dict[str, dict]]:
+_LOCAL_SCORE_PATHS = (
+    os.path.join(work_dir, "data", "jsons", "score_sorted.json"),
+    os.path.join(work_dir, "data", "jsons", "sub_score_sorted.json"),
+)
+
+
+def _build_local_score_index() -> Dict[str, Dict[str, dict]]:
     by_bgm: Dict[str, dict] = {}
     by_mal: Dict[str, dict] = {}
     by_title: Dict[str, dict] = {}
-    paths = [
-        os.path.join(work_dir, "data", "jsons", "score_sorted.json"),
-        os.path.join(work_dir, "data", "jsons", "sub_score_sorted.json"),
-    ]
-    for p in paths:
+    for p in _LOCAL_SCORE_PATHS:
         if not os.path.exists(p):
             continue
         try:
@@ -428,6 +771,14 @@ def _load_local_score_index() -> Dict[str, Dict[str, dict]]:
     return {"bgm": by_bgm, "mal": by_mal, "title": by_title}
 
 
+# 分数文件被其他进程重写后自动在后台重建
+_LOCAL_SCORE_SNAPSHOT = FileSnapshot("local_scores", _LOCAL_SCORE_PATHS, _build_local_score_index)
+
+
+def _load_local_score_index() -> Dict[str, Dict[str, dict]]:
+    return _LOCAL_SCORE_SNAPSHOT.get()
+
+
 def _lookup_local_score(item: dict) -> Optional[dict]:
     idx = _load_local_score_index()
     bgm_id = item.get("bgm_id")
@@ -463,47 +814,210 @@ def _merge_local_extra_scores(item: dict, debug: Optional[dict] = None) -> None:
                 debug["local_fallback"]["fm_score"] = parsed_fm
 
 
-@lru_cache(maxsize=1024)
-def _fetch_extra_scores(name: str, name_cn: str, name_jp: str) -> dict:
-    result = {}
-    candidates = _extra_title_candidates(name, name_cn, name_jp)
-    if not candidates:
-        return result
-    queries = _anikore_query_variants(candidates)
+_EXTRA_SCORE_TTL = float(os.getenv("EXTRA_SCORE_CACHE_TTL", "21600"))
+_EXTRA_SCORE_NEGATIVE_TTL = float(os.getenv("EXTRA_SCORE_NEGATIVE_TTL", "600"))
+_EXTRA_SCORE_STALE_TTL = float(os.getenv("EXTRA_SCORE_STALE_TTL", "86400"))
+_EXTRA_SCORE_CACHE_SIZE = int(os.getenv("EXTRA_SCORE_CACHE_SIZE", "4096"))
+_EXTRA_SCORE_CACHE_DB = os.getenv(
+    "EXTRA_SCORE_CACHE_DB", os.path.join(work_dir, "data", "extra_scores.db")
+)
 
-    ank = _get_anikore_client()
-    if ank and ENABLE_ANIKORE:
-        for title in queries:
+
+class ExtraScoreCache:
+    """
+    站外评分缓存 (Filmarks / Anikore)
+
+    抓到评分与未抓到分别使用 ttl / negative_ttl；过期后 stale_ttl 内仍返回旧值，
+    由调用方在后台刷新。内存 LRU 之外可选一个 SQLite 文件，多个 worker 共享结果。
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+
+    def __init__(
+        self,
+        ttl: float,
+        negative_ttl: float,
+        stale_ttl: float,
+        maxsize: int,
+        db_path: str = "",
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = max(0.0, stale_ttl)
+        self.enabled = ttl > 0
+        self._mem = LRUCache(maxsize=max(1, maxsize))
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "stores": 0, "refreshes": 0}
+
+    @staticmethod
+    def make_key(name: str, name_cn: str, name_jp: str) -> str:
+        return "\x1f".join(t or "" for t in (name, name_cn, name_jp))
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self._db_path and not self._db_failed:
             try:
-                ank_id = ank.get_ani_id(title)
-                if ank_id and ank_id != "Error":
-                    score = ank.get_ani_score(ank_id)
-                    if score and score != "None":
-                        parsed = _extract_numeric_score(score, min_value=0.0, max_value=5.0)
-                        if parsed is not None:
-                            result["ank_score"] = round(2 * parsed, 2)
-                            result["ank_id"] = str(ank_id)
-                            break
-            except Exception:
-                continue
+                os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self._db_path, timeout=0.5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS extra_scores ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, debug TEXT, stored_at REAL NOT NULL)"
+                )
+                conn.commit()
+                self._db = conn
+            except Exception as e:
+                print(f"站外评分缓存数据库不可用: {e}")
+                self._db_failed = True
+        return self._db
+
+    def _load(self, key: str) -> Optional[tuple]:
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT value, debug, stored_at FROM extra_scores WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception:
+            return None
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0]), json.loads(row[1]) if row[1] else None, float(row[2])
+        except Exception:
+            return None
+
+    def _state(self, entry: tuple, now: float) -> Optional[str]:
+        value, _, stored_at = entry
+        ttl = self.ttl if value else self.negative_ttl
+        age = now - stored_at
+        if age < ttl:
+            return self.FRESH
+        if age < ttl + self.stale_ttl:
+            return self.STALE
+        return None
 
-    fm = _get_filmarks_client()
-    if fm:
-        for title in candidates:
+    def get(self, key: str) -> Optional[Tuple[dict, Optional[dict], str, float]]:
+        """返回 (评分, 调试信息, fresh|stale, 缓存时长秒)；超出 stale 窗口视为未命中"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None or self._state(entry, now) != self.FRESH:
+                # 其他 worker 可能已写入更新的结果
+                stored = self._load(key)
+                if stored is not None and (entry is None or stored[2] > entry[2]):
+                    entry = stored
+                    self._mem[key] = entry
+            state = self._state(entry, now) if entry is not None else None
+            if state == self.FRESH:
+                self._stats["hits"] += 1
+            elif state == self.STALE:
+                self._stats["stale_hits"] += 1
+            else:
+                self._stats["misses"] += 1
+        if state is None:
+            return None
+        value, debug, stored_at = entry
+        return dict(value), copy.deepcopy(debug), state, now - stored_at
+
+    def put(self, key: str, value: dict, debug: Optional[dict] = None) -> None:
+        if not self.enabled:
+            return
+        entry = (dict(value), copy.deepcopy(debug), time.time())
+        with self._lock:
+            self._mem[key] = entry
+            self._stats["stores"] += 1
+            conn = self._conn()
+            if conn is None:
+                return
             try:
-                fm_score = fm.get_fm_score(title)
-                if fm_score and fm_score != "Error":
-                    parsed = _extract_numeric_score(fm_score, min_value=0.0, max_value=5.0)
-                    if parsed is not None:
-                        result["fm_score"] = round(2 * parsed, 2)
-                        break
+                conn.execute(
+                    "INSERT OR REPLACE INTO extra_scores (key, value, debug, stored_at) VALUES (?, ?, ?, ?)",
+                    (
+                        key,
+                        json.dumps(entry[0], ensure_ascii=False),
+                        json.dumps(entry[1], ensure_ascii=False, default=str) if entry[1] else None,
+                        entry[2],
+                    ),
+                )
+                conn.commit()
             except Exception:
-                continue
+                pass
+
+    def begin_refresh(self, key: str) -> bool:
+        """标记后台刷新；同一键已在刷新时返回 False"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
 
-    return result
+    def end_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "entries": len(self._mem),
+                "maxsize": int(self._mem.maxsize),
+                "ttl": self.ttl,
+                "negative_ttl": self.negative_ttl,
+                "stale_ttl": self.stale_ttl,
+                "shared_db": bool(self._db is not None),
+                "refreshing": len(self._refreshing),
+                **self._stats,
+            }
 
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+            conn = self._conn()
+            if conn is not None:
+                try:
+                    conn.execute("DELETE FROM extra_scores")
+                    conn.commit()
+                except Exception:
+                    pass
 
-def _fetch_extra_scores_debug(name: str, name_cn: str, name_jp: str) -> Tuple[dict, dict]:
+
+_EXTRA_SCORE_CACHE = ExtraScoreCache(
+    _EXTRA_SCORE_TTL,
+    _EXTRA_SCORE_NEGATIVE_TTL,
+    _EXTRA_SCORE_STALE_TTL,
+    _EXTRA_SCORE_CACHE_SIZE,
+    _EXTRA_SCORE_CACHE_DB,
+)
+# 后台刷新任务的引用，防止被回收
+_BACKGROUND_TASKS: Set[asyncio.Task] = set()
+
+
+def get_extra_score_cache_stats() -> Dict[str, object]:
+    return _EXTRA_SCORE_CACHE.stats()
+
+
+def clear_extra_score_cache() -> None:
+    _EXTRA_SCORE_CACHE.clear()
+
+
+def _with_cache_debug(debug: Optional[dict], state: str, age: float) -> dict:
+    debug = debug or {}
+    debug["cache"] = {"state": state, "age": round(age, 1)}
+    return debug
+
+
+def _scrape_extra_scores(name: str, name_cn: str, name_jp: str) -> Tuple[dict, dict]:
+    """同步抓取站外评分，返回 (评分, 调试信息)"""
     result = {}
     base_titles = _extra_title_candidates(name, name_cn, name_jp)
     queries = _anikore_query_variants(base_titles)
@@ -565,29 +1079,271 @@ def _fetch_extra_scores_debug(name: str, name_cn: str, name_jp: str) -> Tuple[di
     return result, debug
 
 
-class BaseSearcher:
-    """搜索器基类"""
+def _refresh_extra_scores(key: str, name: str, name_cn: str, name_jp: str) -> None:
+    try:
+        value, debug = _scrape_extra_scores(name, name_cn, name_jp)
+        _EXTRA_SCORE_CACHE.put(key, value, debug)
+    except Exception as e:
+        print(f"站外评分后台刷新错误: {e}")
+    finally:
+        _EXTRA_SCORE_CACHE.end_refresh(key)
+
+
+def _fetch_extra_scores_debug(name: str, name_cn: str, name_jp: str) -> Tuple[dict, dict]:
+    """带缓存的同步站外评分抓取；过期(stale)时返回旧值并起后台线程刷新"""
+    key = ExtraScoreCache.make_key(name, name_cn, name_jp)
+    hit = _EXTRA_SCORE_CACHE.get(key)
+    if hit is not None:
+        value, debug, state, age = hit
+        if state == ExtraScoreCache.STALE and _EXTRA_SCORE_CACHE.begin_refresh(key):
+            threading.Thread(
+                target=_refresh_extra_scores,
+                args=(key, name, name_cn, name_jp),
+                daemon=True,
+            ).start()
+        return value, _with_cache_debug(debug, state, age)
+    value, debug = _scrape_extra_scores(name, name_cn, name_jp)
+    _EXTRA_SCORE_CACHE.put(key, value, debug)
+    return value, debug
+
+
+def _fetch_extra_scores(name: str, name_cn: str, name_jp: str) -> dict:
+    return _fetch_extra_scores_debug(name, name_cn, name_jp)[0]
+
+
+async def _first_success(coros: List[Awaitable[Any]]) -> Tuple[Optional[int], Any]:
+    """
+    并发运行各候选，按候选顺序取第一个成功(非 None)的结果，结果确定后取消其余候选。
+
+    与逐个尝试的顺序语义一致：靠后的候选先返回也要等靠前的候选失败。
+    返回 (命中的下标, 结果)，全部失败时为 (None, None)。
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        for idx, task in enumerate(tasks):
+            try:
+                value = await task
+            except Exception:
+                continue
+            if value is not None:
+                return idx, value
+        return None, None
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _anikore_attempt(ank, title: str, attempt: dict) -> Optional[dict]:
+    try:
+        ank_id = await ank.get_ani_id_async(title)
+        attempt["ank_id"] = ank_id
+        if not ank_id or ank_id == "Error":
+            return None
+        raw = await ank.get_ani_score_async(ank_id)
+        attempt["raw_score"] = raw
+        parsed = _extract_numeric_score(raw, min_value=0.0, max_value=5.0)
+        attempt["parsed"] = parsed
+    except Exception as e:
+        attempt["error"] = str(e)
+        return None
+    if parsed is None:
+        return None
+    return {"ank_score": round(2 * parsed, 2), "ank_id": str(ank_id)}
+
+
+async def _filmarks_attempt(fm, title: str, attempt: dict) -> Optional[dict]:
+    try:
+        raw = await fm.get_fm_score_async(title)
+        attempt["raw_score"] = raw
+        parsed = _extract_numeric_score(raw, min_value=0.0, max_value=5.0)
+        attempt["parsed"] = parsed
+    except Exception as e:
+        attempt["error"] = str(e)
+        return None
+    if parsed is None:
+        return None
+    return {"fm_score": round(2 * parsed, 2)}
+
+
+async def _race_extra_channel(
+    attempt_fn, client, titles: List[str], channel: dict
+) -> Optional[dict]:
+    """一个站点的全部候选标题并发查询，取第一个成功者；调试信息记录到命中为止的尝试"""
+    attempts = [{"title": t} for t in titles]
+    idx, value = await _first_success(
+        [attempt_fn(client, t, a) for t, a in zip(titles, attempts)]
+    )
+    channel["attempts"].extend(attempts if idx is None else attempts[: idx + 1])
+    if idx is not None:
+        channel["hit"] = True
+        channel["selected"] = attempts[idx]
+    return value
+
+
+async def _afetch_extra_scores(
+    name: str, name_cn: str, name_jp: str
+) -> Tuple[dict, dict]:
+    """
+    _scrape_extra_scores 的异步版本：各站点、各候选标题同时发出，
+    经共享连接池与主机限速；返回 (评分, 调试信息)
+    """
+    result: dict = {}
+    base_titles = _extra_title_candidates(name, name_cn, name_jp)
+    queries = _anikore_query_variants(base_titles)
+    debug = {
+        "titles": base_titles,
+        "anikore_queries": queries,
+        "anikore": {"enabled": ENABLE_ANIKORE, "attempts": [], "hit": False},
+        "filmarks": {"attempts": [], "hit": False},
+    }
+    if not base_titles:
+        return result, debug
+
+    channels = []
+    ank = _get_anikore_client()
+    if ank and ENABLE_ANIKORE:
+        channels.append(_race_extra_channel(_anikore_attempt, ank, queries, debug["anikore"]))
+    elif not ENABLE_ANIKORE:
+        debug["anikore"]["reason"] = "disabled"
+    fm = _get_filmarks_client()
+    if fm:
+        channels.append(
+            _race_extra_channel(_filmarks_attempt, fm, base_titles, debug["filmarks"])
+        )
+
+    for value in await asyncio.gather(*channels):
+        if value:
+            result.update(value)
+    return result, debug
+
+
+async def _afetch_and_cache_extra_scores(
+    key: str, name: str, name_cn: str, name_jp: str
+) -> Tuple[dict, dict]:
+    value, debug = await _afetch_extra_scores(name, name_cn, name_jp)
+    _EXTRA_SCORE_CACHE.put(key, value, debug)
+    return value, debug
 
-    def __init__(self, name: str):
+
+async def _arefresh_extra_scores(key: str, name: str, name_cn: str, name_jp: str) -> None:
+    try:
+        await _UPSTREAM_FLIGHT.do(
+            ("extra_scores", key),
+            lambda: _afetch_and_cache_extra_scores(key, name, name_cn, name_jp),
+        )
+    except Exception as e:
+        print(f"站外评分后台刷新错误: {e}")
+    finally:
+        _EXTRA_SCORE_CACHE.end_refresh(key)
+
+
+async def _aget_extra_scores(name: str, name_cn: str, name_jp: str) -> Tuple[dict, dict]:
+    """
+    带缓存的异步站外评分抓取，返回 (评分, 调试信息)
+
+    过期(stale)时先返回旧值并在后台刷新；未命中时并发的相同标题只抓取一次。
+    """
+    key = ExtraScoreCache.make_key(name, name_cn, name_jp)
+    hit = _EXTRA_SCORE_CACHE.get(key)
+    if hit is not None:
+        value, debug, state, age = hit
+        if state == ExtraScoreCache.STALE and _EXTRA_SCORE_CACHE.begin_refresh(key):
+            task = asyncio.ensure_future(
+                _arefresh_extra_scores(key, name, name_cn, name_jp)
+            )
+            _BACKGROUND_TASKS.add(task)
+            task.add_done_callback(_BACKGROUND_TASKS.discard)
+        return value, _with_cache_debug(debug, state, age)
+    (value, debug), _ = await _UPSTREAM_FLIGHT.do(
+        ("extra_scores", key),
+        lambda: _afetch_and_cache_extra_scores(key, name, name_cn, name_jp),
+    )
+    return dict(value), copy.deepcopy(debug)
+
+
+class BaseSearcher(ABC):
+    """搜索器基类；子类实现 `_afetch`"""
+
+    def __init__(self, name: str, http: Optional[HttpClientRegistry] = None):
         self.name = name
+        # 按上游主机共享的异步连接池
+        self.http = http or get_http_registry()
+        self.endpoint = ""
+
+    def async_client(self) -> httpx.AsyncClient:
+        """该源上游主机对应的共享AsyncClient"""
+        return self.http.client_for(self.endpoint)
+
+    async def asearch(
+        self, client: httpx.AsyncClient, keyword: str, **filters
+    ) -> List[AnimeInfo]:
+        """
+        异步搜索：先查响应缓存，未命中时合并相同的进行中子查询；
+        上游出错(_afetch 返回 None)时返回空列表且不缓存
+        """
+        key = SearchResultCache.make_key(self.name, keyword, filters)
+        cached = _SEARCH_CACHE.get(key)
+        if cached is not None:
+            # 规范化后相同的关键词仍按本次原文重算匹配度
+            self._assign_confidences(keyword, cached)
+            return cached
+
+        async def _fetch() -> Tuple[str, List[AnimeInfo]]:
+            fetched = await self._afetch(client, keyword, **filters)
+            if fetched is None:
+                return keyword, []
+            _SEARCH_CACHE.put(key, fetched)
+            return keyword, fetched
+
+        (leader_keyword, results), shared = await _UPSTREAM_FLIGHT.do(key, _fetch)
+        if not shared:
+            return results
+        # 共享结果会被各调用方分别补全/合并，必须拷贝
+        results = [replace(info) for info in results]
+        if leader_keyword != keyword:
+            self._assign_confidences(keyword, results)
+        return results
+
+    @abstractmethod
+    async def _afetch(
+        self, client: httpx.AsyncClient, keyword: str, **filters
+    ) -> Optional[List[AnimeInfo]]:
+        """请求上游并解析；请求或解析失败时返回 None(区别于上游确实没有结果的空列表)"""
+
+    # 参与置信度计算的标题字段
+    CONFIDENCE_FIELDS: Tuple[str, ...] = ("name", "name_cn", "name_jp")
 
     def _calculate_confidence(self, keyword: str, *titles: Optional[str]) -> float:
         max_ratio = 0.0
+        if not keyword:
+            return max_ratio
+        kf = _title_features(keyword)
         for title in titles:
             if title:
-                ratio = _similarity_score(keyword, title)
+                ratio = _similarity_from_features(kf, _title_features(title))
                 max_ratio = max(max_ratio, ratio)
         return max_ratio
 
+    def _assign_confidences(self, keyword: str, results: List[AnimeInfo]) -> None:
+        """为整批结果计算匹配度"""
+        for info in results:
+            info.confidence = self._calculate_confidence(
+                keyword, *(getattr(info, field) for field in self.CONFIDENCE_FIELDS)
+            )
+
 
 
 
 class BangumiSearcher(BaseSearcher):
     """Bangumi搜索器"""
 
-    def __init__(self):
-        super().__init__("Bangumi")
+    CONFIDENCE_FIELDS = ("name", "name_cn")
+
+    def __init__(self, http: Optional[HttpClientRegistry] = None):
+        super().__init__("Bangumi", http)
         self.api_base = "https://api.bgm.tv"
+        self.endpoint = self.api_base
         self.headers = {"User-Agent": "precise-search/1.0"}
 
     def search(self, keyword: str, **filters) -> List[AnimeInfo]:
@@ -671,21 +1427,19 @@ class BangumiSearcher(BaseSearcher):
                     # 获取简介
                     info.summary = item.get("summary", "")[:200]
 
-                    # 计算匹配度
-                    info.confidence = self._calculate_confidence(
-                        keyword, info.name, info.name_cn
-                    )
-
                     results.append(info)
 
+                # 计算匹配度
+                self._assign_confidences(keyword, results)
+
         except Exception as e:
             print(f"Bangumi搜索错误: {e}")
 
         return results
 
-    async def asearch(
+    async def _afetch(
         self, client: httpx.AsyncClient, keyword: str, **filters
-    ) -> List[AnimeInfo]:
+    ) -> Optional[List[AnimeInfo]]:
         """异步搜索Bangumi"""
         results: List[AnimeInfo] = []
         try:
@@ -716,8 +1470,14 @@ class BangumiSearcher(BaseSearcher):
                 }
                 payload["filter"]["month"] = [[month_map[filters["month"]]]]
 
-            async with _get_search_semaphore():
-                response = await client.post(url, headers=self.headers, json=payload)
+            response = await self.http.request(
+                "POST",
+                url,
+                client=client,
+                headers=self.headers,
+                json=payload,
+                timeout=_ASYNC_TIMEOUT,
+            )
             response.raise_for_status()
             data = response.json()
 
@@ -749,20 +1509,18 @@ class BangumiSearcher(BaseSearcher):
                             info.source = value
 
                 info.summary = item.get("summary", "")[:200]
-                info.confidence = self._calculate_confidence(keyword, info.name, info.name_cn)
                 results.append(info)
+            self._assign_confidences(keyword, results)
         except Exception as e:
             print(f"Bangumi异步搜索错误: {e}")
+            return None
         return results
 
 
 class AniListSearcher(BaseSearcher):
     """AniList GraphQL搜索器"""
 
-    GRAPHQL_QUERY = """
-    query ($search: String, $type: MediaType, $year: Int, $season: MediaSeason) {
-        Page(page: 1, perPage: 20) {
-            media(search: $search, type: $type, seasonYear: $year, season: $season) {
+    MEDIA_FIELDS = """
                 id
                 title { romaji, english, native }
                 startDate { year, month }
@@ -772,10 +1530,20 @@ class AniListSearcher(BaseSearcher):
                 description
                 averageScore
                 meanScore
+    """
+
+    GRAPHQL_QUERY = """
+    query ($search: String, $type: MediaType, $year: Int, $season: MediaSeason) {
+        Page(page: 1, perPage: 20) {
+            media(search: $search, type: $type, seasonYear: $year, season: $season) {
+                %s
             }
         }
     }
-    """
+    """ % MEDIA_FIELDS
+
+    # 一个别名批量请求最多包含的搜索词数
+    BATCH_SIZE = int(os.getenv("PRECISE_ANILIST_BATCH_SIZE", "4"))
 
     SOURCE_MAP = {
         "MANGA": "漫画",
@@ -793,31 +1561,82 @@ class AniListSearcher(BaseSearcher):
         (9, 10, 11): "FALL",
     }
 
-    def __init__(self):
-        super().__init__("AniList")
+    def __init__(self, http: Optional[HttpClientRegistry] = None):
+        super().__init__("AniList", http)
         self.api_url = "https://graphql.anilist.co"
+        self.endpoint = self.api_url
         self.headers = {
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
 
+    @classmethod
+    @lru_cache(maxsize=16)
+    def _batch_query(cls, n: int) -> str:
+        """n 个搜索词的别名查询: q0: Page(...) {...} q1: ..."""
+        params = ", ".join(f"$s{i}: String" for i in range(n))
+        pages = "\n".join(
+            f"""
+        q{i}: Page(page: 1, perPage: 20) {{
+            media(search: $s{i}, type: $type, seasonYear: $year, season: $season) {{
+                {cls.MEDIA_FIELDS}
+            }}
+        }}"""
+            for i in range(n)
+        )
+        return (
+            f"query ({params}, $type: MediaType, $year: Int, $season: MediaSeason) "
+            f"{{{pages}\n    }}"
+        )
+
+    def _build_variables(self, filters: dict) -> dict:
+        variables = {"type": "ANIME"}
+        if filters.get("year"):
+            variables["year"] = filters["year"]
+        if filters.get("month"):
+            month = filters["month"]
+            for months, season in self.SEASON_MAP.items():
+                if month in months:
+                    variables["season"] = season
+                    break
+        return variables
+
+    def _parse_media(self, item: dict) -> AnimeInfo:
+        info = AnimeInfo()
+        info.anilist_id = str(item.get("id"))
+
+        title = item.get("title", {})
+        info.name = title.get("romaji", "")
+        info.name_jp = title.get("native", "")
+        info.name_cn = title.get("english", "")
+
+        start_date = item.get("startDate", {})
+        info.year = start_date.get("year")
+        info.month = start_date.get("month")
+
+        studios = item.get("studios", {}).get("nodes", [])
+        if studios:
+            info.studio = studios[0].get("name", "")
+
+        for staff in item.get("staff", {}).get("edges", []):
+            if staff.get("role") == "Director":
+                info.director = staff["node"]["name"]["full"]
+                break
+
+        info.source = self.SOURCE_MAP.get(item.get("source"), item.get("source", ""))
+        if item.get("meanScore"):
+            info.anilist_score = item["meanScore"] / 10
+
+        summary = item.get("description") or ""
+        info.summary = re.sub(r"<[^>]+", "", summary)[:200]
+        return info
+
     def search(self, keyword: str, **filters) -> List[AnimeInfo]:
         """搜索AniList"""
         results = []
         try:
-            variables = {"search": keyword, "type": "ANIME"}
-
-            # 添加年份过滤
-            if filters.get("year"):
-                variables["year"] = filters["year"]
-
-            # 添加季度/月份推断
-            if filters.get("month"):
-                month = filters["month"]
-                for months, season in self.SEASON_MAP.items():
-                    if month in months:
-                        variables["season"] = season
-                        break
+            variables = self._build_variables(filters)
+            variables["search"] = keyword
 
             response = httpx.post(
                 self.api_url,
@@ -827,118 +1646,132 @@ class AniListSearcher(BaseSearcher):
             )
             data = response.json()
 
-            if "data" in data and data["data"]["Page"]["media"]:
-                for item in data["data"]["Page"]["media"]:
-                    info = AnimeInfo()
-                    info.anilist_id = str(item.get("id"))
-
-                    title = item.get("title", {})
-                    info.name = title.get("romaji", "")
-                    info.name_jp = title.get("native", "")
-                    info.name_cn = title.get("english", "")
-
-                    # 日期
-                    start_date = item.get("startDate", {})
-                    info.year = start_date.get("year")
-                    info.month = start_date.get("month")
-
-                    # 制作公司
-                    studios = item.get("studios", {}).get("nodes", [])
-                    if studios:
-                        info.studio = studios[0].get("name", "")
-
-                    # 监督
-                    for staff in item.get("staff", {}).get("edges", []):
-                        if staff.get("role") == "Director":
-                            info.director = staff["node"]["name"]["full"]
-                            break
-
-                    # 原作类型
-                    info.source = self.SOURCE_MAP.get(
-                        item.get("source"), item.get("source", "")
-                    )
-
-                    # 评分 (转换为10分制)
-                    if item.get("meanScore"):
-                        info.anilist_score = item["meanScore"] / 10
-
-                    # 简介，移除HTML标签
-                    summary = item.get("description") or ""
-                    info.summary = re.sub(r"<[^>]+", "", summary)[:200]
-
-                    # 计算匹配度
-                    info.confidence = self._calculate_confidence(
-                        keyword, info.name, info.name_cn, info.name_jp
-                    )
-
-                    results.append(info)
+            for item in (data.get("data") or {}).get("Page", {}).get("media", []) or []:
+                results.append(self._parse_media(item))
+            # 计算匹配度
+            self._assign_confidences(keyword, results)
 
         except Exception as e:
             print(f"AniList搜索错误: {e}")
 
         return results
 
-    async def asearch(
+    async def _afetch(
         self, client: httpx.AsyncClient, keyword: str, **filters
-    ) -> List[AnimeInfo]:
+    ) -> Optional[List[AnimeInfo]]:
         """异步搜索AniList"""
         results: List[AnimeInfo] = []
         try:
-            variables = {"search": keyword, "type": "ANIME"}
-            if filters.get("year"):
-                variables["year"] = filters["year"]
-            if filters.get("month"):
-                month = filters["month"]
-                for months, season in self.SEASON_MAP.items():
-                    if month in months:
-                        variables["season"] = season
-                        break
+            variables = self._build_variables(filters)
+            variables["search"] = keyword
 
-            async with _get_search_semaphore():
-                response = await client.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json={"query": self.GRAPHQL_QUERY, "variables": variables},
-                )
+            response = await self.http.request(
+                "POST",
+                self.api_url,
+                client=client,
+                headers=self.headers,
+                json={"query": self.GRAPHQL_QUERY, "variables": variables},
+                timeout=_ASYNC_TIMEOUT,
+            )
             response.raise_for_status()
             data = response.json()
 
             for item in data.get("data", {}).get("Page", {}).get("media", []) or []:
-                info = AnimeInfo()
-                info.anilist_id = str(item.get("id"))
-
-                title = item.get("title", {})
-                info.name = title.get("romaji", "")
-                info.name_jp = title.get("native", "")
-                info.name_cn = title.get("english", "")
-
-                start_date = item.get("startDate", {})
-                info.year = start_date.get("year")
-                info.month = start_date.get("month")
-
-                studios = item.get("studios", {}).get("nodes", [])
-                if studios:
-                    info.studio = studios[0].get("name", "")
-
-                for staff in item.get("staff", {}).get("edges", []):
-                    if staff.get("role") == "Director":
-                        info.director = staff["node"]["name"]["full"]
-                        break
-
-                info.source = self.SOURCE_MAP.get(item.get("source"), item.get("source", ""))
-                if item.get("meanScore"):
-                    info.anilist_score = item["meanScore"] / 10
-
-                summary = item.get("description") or ""
-                info.summary = re.sub(r"<[^>]+", "", summary)[:200]
-                info.confidence = self._calculate_confidence(
-                    keyword, info.name, info.name_cn, info.name_jp
-                )
-                results.append(info)
+                results.append(self._parse_media(item))
+            self._assign_confidences(keyword, results)
         except Exception as e:
             print(f"AniList异步搜索错误: {e}")
+            return None
         return results
 
+    async def _afetch_batch(
+        self, client: httpx.AsyncClient, keywords: List[str], filters: dict
+    ) -> List[Optional[List[AnimeInfo]]]:
+        """
+        一个别名 GraphQL 请求搜索多个词；返回与 keywords 对齐的结果，
+        请求失败或该别名出错时对应位置为 None
+        """
+        out: List[Optional[List[AnimeInfo]]] = [None] * len(keywords)
+        try:
+            variables = self._build_variables(filters)
+            for i, kw in enumerate(keywords):
+                variables[f"s{i}"] = kw
+            response = await self.http.request(
+                "POST",
+                self.api_url,
+                client=client,
+                headers=self.headers,
+                json={"query": self._batch_query(len(keywords)), "variables": variables},
+                timeout=_ASYNC_TIMEOUT,
+            )
+            payload = response.json()
+        except Exception as e:
+            print(f"AniList批量搜索错误: {e}")
+            return out
+
+        data = payload.get("data") or {}
+        failed = {
+            (err.get("path") or [None])[0] for err in payload.get("errors") or []
+        }
+        for i, kw in enumerate(keywords):
+            alias = f"q{i}"
+            page = data.get(alias)
+            if alias in failed or page is None:
+                continue
+            results = [self._parse_media(item) for item in page.get("media") or []]
+            self._assign_confidences(kw, results)
+            out[i] = results
+        return out
+
+    async def asearch_many(
+        self, client: httpx.AsyncClient, keywords: List[str], **filters
+    ) -> List[List[AnimeInfo]]:
+        """
+        批量异步搜索：缓存未命中的词按 BATCH_SIZE 合并为别名请求，
+        批量中失败的词退回单独搜索。返回与 keywords 对齐的结果列表。
+        """
+        out: List[Optional[List[AnimeInfo]]] = [None] * len(keywords)
+        pending: Dict[tuple, List[int]] = {}
+        for i, kw in enumerate(keywords):
+            key = SearchResultCache.make_key(self.name, kw, filters)
+            cached = _SEARCH_CACHE.get(key)
+            if cached is not None:
+                self._assign_confidences(kw, cached)
+                out[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+
+        keys = list(pending)
+        size = max(1, self.BATCH_SIZE)
+        for start in range(0, len(keys), size):
+            chunk = keys[start : start + size]
+            chunk_kws = [keywords[pending[k][0]] for k in chunk]
+
+            async def _fetch(kws=chunk_kws, ks=chunk):
+                lists = await self._afetch_batch(client, kws, filters)
+                for k, results in zip(ks, lists):
+                    if results is not None:
+                        _SEARCH_CACHE.put(k, results)
+                return kws, lists
+
+            (leader_kws, lists), shared = await _UPSTREAM_FLIGHT.do(
+                ("batch", self.name) + tuple(chunk), _fetch
+            )
+            for k, leader_kw, results in zip(chunk, leader_kws, lists):
+                for n, idx in enumerate(pending[k]):
+                    kw = keywords[idx]
+                    if results is None:
+                        out[idx] = await self.asearch(client, kw, **filters)
+                        continue
+                    if shared or n > 0:
+                        results_i = [replace(info) for info in results]
+                        if leader_kw != kw:
+                            self._assign_confidences(kw, results_i)
+                    else:
+                        results_i = results
+                    out[idx] = results_i
+        return [r if r is not None else [] for r in out]
+
 
 class JikanSearcher(BaseSearcher):
     """Jikan API (MAL非官方API) 搜索器"""
@@ -954,9 +1787,65 @@ class JikanSearcher(BaseSearcher):
         "Visual novel": "视觉小说",
     }
 
-    def __init__(self):
-        super().__init__("Jikan")
+    def __init__(self, http: Optional[HttpClientRegistry] = None):
+        super().__init__("Jikan", http)
         self.api_base = "https://api.jikan.moe/v4"
+        self.endpoint = self.api_base
+
+    def _parse_item(self, item: dict, year_filter: Optional[int] = None) -> Optional[AnimeInfo]:
+        """Jikan anime 对象转为 AnimeInfo；类型或年份不符时返回 None"""
+        # 仅允许动画剧集/电影/OVA
+        anime_type = str(item.get("type") or "").strip()
+        if anime_type and anime_type not in self.ALLOWED_TYPES:
+            return None
+
+        # 如果有年份过滤，跳过不匹配的结果
+        if year_filter and item.get("aired"):
+            from_date = item["aired"].get("from", "")
+            if from_date:
+                match = re.search(r"(\d{4})", from_date)
+                if match:
+                    item_year = int(match.group(1))
+                    # 允许前后一年的误差
+                    if abs(item_year - year_filter) > 1:
+                        return None
+
+        info = AnimeInfo()
+        info.mal_id = str(item.get("mal_id"))
+        info.name = item.get("titles", [{}])[0].get("title", "")
+
+        # 获取所有标题
+        for title_obj in item.get("titles", []):
+            title_type = title_obj.get("type", "")
+            title_text = title_obj.get("title", "")
+            if title_type == "Japanese":
+                info.name_jp = title_text
+            elif title_type == "English":
+                info.name_cn = title_text
+
+        # 日期
+        if item.get("aired"):
+            from_date = item["aired"].get("from", "")
+            if from_date:
+                match = re.search(r"(\d{4})-(\d{2})", from_date)
+                if match:
+                    info.year = int(match.group(1))
+                    info.month = int(match.group(2))
+
+        # 制作公司
+        studios = item.get("studios", [])
+        if studios:
+            info.studio = studios[0].get("name", "")
+
+        # 原作类型
+        info.source = self.SOURCE_MAP.get(item.get("source"), item.get("source", ""))
+
+        # 评分
+        info.mal_score = item.get("score")
+
+        # 简介
+        info.summary = (item.get("synopsis") or "")[:200]
+        return info
 
     def _search_once(self, keyword: str, **filters) -> List[AnimeInfo]:
         results = []
@@ -977,157 +1866,482 @@ class JikanSearcher(BaseSearcher):
         )
         data = response.json()
 
-        if "data" in data:
-            for item in data["data"]:
-                # 仅允许动画剧集/电影/OVA
-                anime_type = str(item.get("type") or "").strip()
-                if anime_type and anime_type not in self.ALLOWED_TYPES:
-                    continue
+        for item in data.get("data", []):
+            info = self._parse_item(item, year_filter)
+            if info is not None:
+                results.append(info)
 
-                # 如果有年份过滤，跳过不匹配的结果
-                if year_filter and item.get("aired"):
-                    from_date = item["aired"].get("from", "")
-                    if from_date:
-                        match = re.search(r"(\d{4})", from_date)
-                        if match:
-                            item_year = int(match.group(1))
-                            # 允许前后一年的误差
-                            if abs(item_year - year_filter) > 1:
-                                continue
+        # 计算匹配度
+        self._assign_confidences(keyword, results)
 
-                info = AnimeInfo()
-                info.mal_id = str(item.get("mal_id"))
-                info.name = item.get("titles", [{}])[0].get("title", "")
-
-                # 获取所有标题
-                for title_obj in item.get("titles", []):
-                    title_type = title_obj.get("type", "")
-                    title_text = title_obj.get("title", "")
-                    if title_type == "Japanese":
-                        info.name_jp = title_text
-                    elif title_type == "English":
-                        info.name_cn = title_text
-
-                # 日期
-                if item.get("aired"):
-                    from_date = item["aired"].get("from", "")
-                    if from_date:
-                        match = re.search(r"(\d{4})-(\d{2})", from_date)
-                        if match:
-                            info.year = int(match.group(1))
-                            info.month = int(match.group(2))
+        return results
 
-                # 制作公司
-                studios = item.get("studios", [])
-                if studios:
-                    info.studio = studios[0].get("name", "")
+    def search(self, keyword: str, **filters) -> List[AnimeInfo]:
+        """搜索MyAnimeList"""
+        results = []
+        try:
+            results = self._search_once(keyword, **filters)
 
-                # 原作类型
-                info.source = self.SOURCE_MAP.get(
-                    item.get("source"), item.get("source", "")
-                )
+        except Exception as e:
+            print(f"Jikan搜索错误: {e}")
 
-                # 评分
-                info.mal_score = item.get("score")
+        return results
 
-                # 简介
-                summary = item.get("synopsis") or ""
-                info.summary = summary[:200]
+    async def _asearch_once(
+        self, client: httpx.AsyncClient, keyword: str, **filters
+    ) -> List[AnimeInfo]:
+        results: List[AnimeInfo] = []
+        params = {
+            "q": keyword,
+            "sfw": "true",
+            "limit": 25,
+            "order_by": "popularity",
+            "sort": "desc",
+        }
+        year_filter = filters.get("year")
 
-                # 计算匹配度
-                info.confidence = self._calculate_confidence(
-                    keyword, info.name, info.name_cn, info.name_jp
-                )
+        response = await self.http.request(
+            "GET",
+            f"{self.api_base}/anime",
+            client=client,
+            params=params,
+            timeout=_ASYNC_TIMEOUT,
+        )
+        response.raise_for_status()
+        data = response.json()
 
+        for item in data.get("data", []):
+            info = self._parse_item(item, year_filter)
+            if info is not None:
                 results.append(info)
+        self._assign_confidences(keyword, results)
+        return results
+
+    async def _afetch(
+        self, client: httpx.AsyncClient, keyword: str, **filters
+    ) -> Optional[List[AnimeInfo]]:
+        """异步搜索Jikan"""
+        try:
+            return await self._asearch_once(client, keyword, **filters)
+        except Exception as e:
+            print(f"Jikan异步搜索错误: {e}")
+            return None
+
+    async def _aget_by_id(self, client: httpx.AsyncClient, mal_id: str) -> Optional[AnimeInfo]:
+        # 与关键词搜索分开命名空间，避免关键词 "mal_id:123" 与 ID 查询共用缓存
+        key = _SEARCH_CACHE.make_key(f"{self.name}:id", str(mal_id), {})
+        cached = _SEARCH_CACHE.get(key)
+        if cached is not None:
+            return cached[0] if cached else None
+
+        async def _fetch() -> Optional[AnimeInfo]:
+            try:
+                response = await self.http.request(
+                    "GET",
+                    f"{self.api_base}/anime/{mal_id}",
+                    client=client,
+                    timeout=_ASYNC_TIMEOUT,
+                )
+                response.raise_for_status()
+                info = self._parse_item(response.json().get("data") or {})
+            except Exception as e:
+                print(f"Jikan ID查询错误: {e}")
+                return None
+            if info is not None:
+                info.confidence = 1.0
+            _SEARCH_CACHE.put(key, [info] if info is not None else [])
+            return info
+
+        info, _ = await _UPSTREAM_FLIGHT.do(key, _fetch)
+        return replace(info) if info is not None else None
+
+    async def aget_many(self, client: httpx.AsyncClient, mal_ids: List[str]) -> List[AnimeInfo]:
+        """按 MAL ID 直接取条目(走缓存与主机限速)，用于已由本地映射确定 ID 的结果"""
+        found = await asyncio.gather(*(self._aget_by_id(client, i) for i in mal_ids))
+        return [info for info in found if info is not None]
+
+
+class LocalTitleIndex:
+    """
+    mapping/anime_map.json 的离线标题索引
+
+    规范化后的 name / name_cn(去空格)按字符 bigram 建倒排表；查询先按共享 bigram
+    的 Dice 系数取候选，再用交叉验证同款的标题相似度重排。不访问任何上游。
+    """
+
+    MAX_CANDIDATES = 64
+    MIN_DICE = 0.25
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        self._title_entry = array("I")  # 标题下标 -> 条目下标
+        self._title_grams = array("H")  # 标题下标 -> bigram 数
+        self._titles: List[str] = []
+        postings: Dict[str, List[int]] = {}
+        for ei, entry in enumerate(entries):
+            seen: Set[str] = set()
+            for title in (entry.get("name"), entry.get("name_cn")):
+                if not title:
+                    continue
+                key = self._key(str(title))
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                grams = self._grams(key)
+                ti = len(self._titles)
+                self._titles.append(str(title))
+                self._title_entry.append(ei)
+                self._title_grams.append(min(len(grams), 0xFFFF))
+                for gram in grams:
+                    postings.setdefault(gram, []).append(ti)
+        self._postings: Dict[str, array] = {g: array("I", ids) for g, ids in postings.items()}
+
+    @staticmethod
+    def _key(title: str) -> str:
+        return _compute_normalized_title(title).replace(" ", "")
+
+    @staticmethod
+    def _grams(key: str) -> Set[str]:
+        if len(key) < 2:
+            return {key}
+        return {key[i : i + 2] for i in range(len(key) - 1)}
+
+    @staticmethod
+    def entry_year_month(entry: dict) -> Tuple[Optional[int], Optional[int]]:
+        match = re.match(r"(\d{4})(?:-(\d{1,2}))?", str(entry.get("date") or ""))
+        if not match:
+            return None, None
+        return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(
+        self, keyword: str, limit: int = 10, year: Optional[int] = None, min_score: float = 0.5
+    ) -> List[Tuple[dict, float]]:
+        """返回 [(条目, 相似度)]，按相似度降序；year 允许前后一年误差"""
+        key = self._key(keyword or "")
+        if not key:
+            return []
+        grams = self._grams(key)
+        counts: Dict[int, int] = {}
+        get = counts.get
+        for gram in grams:
+            for ti in self._postings.get(gram, ()):
+                counts[ti] = get(ti, 0) + 1
+        if not counts:
+            return []
+
+        n_query = len(grams)
+        title_grams = self._title_grams
+        dice = [
+            (2.0 * c / (n_query + title_grams[ti]), ti)
+            for ti, c in counts.items()
+        ]
+        candidates = heapq.nlargest(self.MAX_CANDIDATES, (d for d in dice if d[0] >= self.MIN_DICE))
+
+        query_features = _title_features(keyword)
+        raw_query = _normalize_query_keyword(keyword)
+        # 条目下标 -> (相似度, 原文完全一致, -长度差)；规范化会去掉季度/OVA 等标记，
+        # 同分时原文更接近的排前
+        best: Dict[int, Tuple[float, bool, int]] = {}
+        for _, ti in candidates:
+            title = self._titles[ti]
+            if self._key(title) == key:
+                score = 1.0
+            else:
+                score = _similarity_from_features(query_features, _title_features(title))
+            if score < min_score:
+                continue
+            raw_title = _normalize_query_keyword(title)
+            rank = (score, raw_title == raw_query, -abs(len(raw_title) - len(raw_query)))
+            ei = self._title_entry[ti]
+            if ei not in best or rank > best[ei]:
+                best[ei] = rank
+
+        ranked: List[Tuple[Tuple[float, bool, int], dict]] = []
+        for ei, rank in best.items():
+            entry = self.entries[ei]
+            if year:
+                entry_year, _ = self.entry_year_month(entry)
+                if entry_year and abs(entry_year - year) > 1:
+                    continue
+            ranked.append((rank, entry))
+        ranked.sort(key=lambda h: h[0], reverse=True)
+        return [(entry, round(rank[0], 4)) for rank, entry in ranked[:limit]]
+
+
+_LOCAL_INDEX: Optional[LocalTitleIndex] = None
+_LOCAL_INDEX_MTIME: Optional[float] = None
+_LOCAL_INDEX_LOCK = threading.Lock()
+_LOCAL_INDEX_REBUILDING = False
+
+
+def _map_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(MAP_PATH)
+    except OSError:
+        return None
+
+
+def get_local_index() -> Optional[LocalTitleIndex]:
+    """
+    懒加载本地标题索引；映射文件更新(mtime 变化)后自动重建。
+    构建约 1 秒且持锁，只应在线程中调用，事件循环上使用 aget_local_index
+    """
+    global _LOCAL_INDEX, _LOCAL_INDEX_MTIME
+    if load_map_entries is None:
+        return None
+    mtime = _map_mtime()
+    with _LOCAL_INDEX_LOCK:
+        if _LOCAL_INDEX is None or mtime != _LOCAL_INDEX_MTIME:
+            try:
+                entries = load_map_entries() if mtime is not None else []
+                if _LOCAL_INDEX is not None and entries is _LOCAL_INDEX.entries:
+                    # 文件已变但映射缓存尚未清理
+                    entries = list(entries)
+                _LOCAL_INDEX = LocalTitleIndex(entries)
+                _LOCAL_INDEX_MTIME = mtime
+            except Exception as e:
+                print(f"本地索引构建错误: {e}")
+                return None
+        return _LOCAL_INDEX
+
+
+def _rebuild_local_index() -> None:
+    global _LOCAL_INDEX_REBUILDING
+    try:
+        get_local_index()
+    finally:
+        _LOCAL_INDEX_REBUILDING = False
+
+
+async def aget_local_index() -> Optional[LocalTitleIndex]:
+    """
+    事件循环上取本地索引：已有索引时直接返回(映射已更新则在后台线程重建，
+    完成前继续使用旧索引)；首次构建放到线程中等待，不阻塞事件循环
+    """
+    global _LOCAL_INDEX_REBUILDING
+    if load_map_entries is None:
+        return None
+    index = _LOCAL_INDEX
+    if index is None:
+        return await asyncio.to_thread(get_local_index)
+    if _LOCAL_INDEX_MTIME != _map_mtime() and not _LOCAL_INDEX_REBUILDING:
+        _LOCAL_INDEX_REBUILDING = True
+        threading.Thread(target=_rebuild_local_index, name="local-index", daemon=True).start()
+    return index
+
+
+def _on_map_update(_stats: Dict[str, int]) -> None:
+    """映射更新后在刷新线程中重建已加载的本地索引，请求路径不再承担重建"""
+    if _LOCAL_INDEX is not None:
+        get_local_index()
+
 
+if add_map_listener is not None:
+    add_map_listener(_on_map_update)
+
+
+class LocalSearcher(BaseSearcher):
+    """基于 mapping/anime_map.json 的离线搜索器，结果带 bgm_id / mal_id"""
+
+    def __init__(self, http: Optional[HttpClientRegistry] = None):
+        super().__init__("Local", http)
+
+    def search(
+        self, keyword: str, limit: int = 10, index: Optional[LocalTitleIndex] = None, **filters
+    ) -> List[AnimeInfo]:
+        index = index or get_local_index()
+        if index is None:
+            return []
+        results: List[AnimeInfo] = []
+        for entry, score in index.search(
+            keyword, limit=limit, year=filters.get("year"), min_score=_LOCAL_MIN_SCORE
+        ):
+            year, month = index.entry_year_month(entry)
+            name = str(entry.get("name") or "")
+            results.append(
+                AnimeInfo(
+                    bgm_id=_normalize_ext_id(entry.get("bgm_id")),
+                    mal_id=_normalize_ext_id(entry.get("mal_id")),
+                    name=name,
+                    name_cn=str(entry.get("name_cn") or ""),
+                    name_jp=name if _has_japanese(name) else "",
+                    year=year,
+                    month=month,
+                    confidence=score,
+                )
+            )
         return results
 
-    def search(self, keyword: str, **filters) -> List[AnimeInfo]:
-        """搜索MyAnimeList"""
-        results = []
-        try:
-            results = self._search_once(keyword, **filters)
+    async def asearch(self, client, keyword: str, **filters) -> List[AnimeInfo]:
+        # 纯内存查询，不经过响应缓存与 single-flight
+        return await self._afetch(client, keyword, **filters)
+
+    async def _afetch(self, client, keyword: str, **filters) -> List[AnimeInfo]:
+        # 索引构建不在事件循环上进行
+        index = await aget_local_index()
+        if index is None:
+            return []
+        return self.search(keyword, index=index, **filters)
+
+
+def _normalize_ext_id(value: object) -> Optional[str]:
+    text = str(value).strip() if value is not None else ""
+    return text or None
+
+
+def search_anime_local(
+    keyword: str,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    top_n: int = 10,
+) -> List[dict]:
+    """
+    离线搜索(source=local)：只查本地映射索引，返回带完整站外 ID 的结果字典
+    """
+    results = LocalSearcher().search(keyword, limit=top_n * 2 if month else top_n, year=year)
+    if month:
+        # 月份只做软排序，与 precise 的过滤加权一致
+        for r in results:
+            if r.month:
+                r.confidence = max(0.0, min(1.0, r.confidence + (0.03 if r.month == month else -0.01)))
+        results.sort(key=lambda x: x.confidence, reverse=True)
+    return [_result_to_item(r) for r in results[:top_n]]
+
+
+_CLUSTER_ENGINE = os.getenv("PRECISE_CLUSTER_ENGINE", "blocked").strip().lower()
+# 结果数少于该值时分块的建索引开销超过省下的比较，直接两两比较(基准约在 60~100 条持平)
+_CLUSTER_BLOCK_MIN_RESULTS = int(os.getenv("PRECISE_CLUSTER_BLOCK_MIN_RESULTS", "100"))
+_SHORT_TITLE_LEN = 5
+
+
+def _title_block_keys(title: str) -> Set[str]:
+    """
+    标题的分块键：凡能让 _titles_match 判定为真的两标题，必共享至少一个键。
+
+    - 规范化串的 bigram、空格分词、分词 token（相等/包含/token 重合/打分）
+    - 每个词的首尾边界 bigram（rapidfuzz 对排序后词串打分时产生的新 bigram）
+    - 短标题统一落入一个桶：无公共 bigram 时，只有两个短串的 LCS 比值可能过阈值
+    """
+    f = _title_features(title)
+    n = f.normalized
+    if not n:
+        return set()
+    keys = {"b" + g for g in f.bigrams}
+    keys.update("w" + w for w in f.words)
+    keys.update("t" + t for t in f.token_set)
+    # _contains_all_tokens 对规范化串再次分词
+    keys.update("t" + t for t in _title_features(n).token_set)
+    for w in f.words:
+        keys.add("b" + w[-1] + " ")
+        keys.add("b " + w[0])
+    if len(n) <= _SHORT_TITLE_LEN or len(f.sorted_words) <= _SHORT_TITLE_LEN:
+        keys.add("s")
+    return keys
+
+
+@lru_cache(maxsize=_TITLE_FEATURE_CACHE_SIZE)
+def _count_pattern_hits(
+    names: Tuple[str, ...], patterns: Tuple[Tuple[str, ...], ...]
+) -> Tuple[int, ...]:
+    """每组关键词在这些标题（规范化后）中命中的个数"""
+    norms = [_normalize_title(n) for n in names]
+    return tuple(
+        sum(1 for k in keywords if any(k in n for n in norms)) for keywords in patterns
+    )
 
-        except Exception as e:
-            print(f"Jikan搜索错误: {e}")
 
-        return results
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
 
-    async def _asearch_once(
-        self, client: httpx.AsyncClient, keyword: str, **filters
-    ) -> List[AnimeInfo]:
-        results: List[AnimeInfo] = []
-        params = {
-            "q": keyword,
-            "sfw": "true",
-            "limit": 25,
-            "order_by": "popularity",
-            "sort": "desc",
-        }
-        year_filter = filters.get("year")
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
 
-        async with _get_search_semaphore():
-            response = await client.get(f"{self.api_base}/anime", params=params)
-        response.raise_for_status()
-        data = response.json()
+    def union(self, a: int, b: int) -> None:
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra != rb:
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
 
-        for item in data.get("data", []):
-            anime_type = str(item.get("type") or "").strip()
-            if anime_type and anime_type not in self.ALLOWED_TYPES:
-                continue
 
-            if year_filter and item.get("aired"):
-                from_date = item["aired"].get("from", "")
-                if from_date:
-                    match = re.search(r"(\d{4})", from_date)
-                    if match:
-                        item_year = int(match.group(1))
-                        if abs(item_year - year_filter) > 1:
-                            continue
-
-            info = AnimeInfo()
-            info.mal_id = str(item.get("mal_id"))
-            info.name = item.get("titles", [{}])[0].get("title", "")
-
-            for title_obj in item.get("titles", []):
-                title_type = title_obj.get("type", "")
-                title_text = title_obj.get("title", "")
-                if title_type == "Japanese":
-                    info.name_jp = title_text
-                elif title_type == "English":
-                    info.name_cn = title_text
-
-            if item.get("aired"):
-                from_date = item["aired"].get("from", "")
-                if from_date:
-                    match = re.search(r"(\d{4})-(\d{2})", from_date)
-                    if match:
-                        info.year = int(match.group(1))
-                        info.month = int(match.group(2))
+class ResultBlocker:
+    """
+    交叉验证的候选生成器。
 
-            studios = item.get("studios", [])
-            if studios:
-                info.studio = studios[0].get("name", "")
+    1. 按 bgm/mal/anilist ID（含 lookup_ext_ids 补全的 ID）做并查集；
+    2. 标题分块键倒排索引，按年份分桶（年份差 >1 的结果不可能按标题匹配）；
+    3. TITLE_PATTERNS 关键词命中也作为分块键。
 
-            info.source = self.SOURCE_MAP.get(item.get("source"), item.get("source", ""))
-            info.mal_score = item.get("score")
-            info.summary = (item.get("synopsis") or "")[:200]
-            info.confidence = self._calculate_confidence(
-                keyword, info.name, info.name_cn, info.name_jp
-            )
-            results.append(info)
-        return results
+    candidates(i) 返回所有可能与 i 判为同一动画的下标（超集），
+    最终仍由 _is_same_anime 精确判断，因此分组结果与两两比较一致。
+    """
 
-    async def asearch(
-        self, client: httpx.AsyncClient, keyword: str, **filters
-    ) -> List[AnimeInfo]:
-        """异步搜索Jikan"""
-        try:
-            return await self._asearch_once(client, keyword, **filters)
-        except Exception as e:
-            print(f"Jikan异步搜索错误: {e}")
-            return []
+    def __init__(
+        self, results: List[AnimeInfo], title_patterns: Tuple[Tuple[str, ...], ...]
+    ):
+        n = len(results)
+        self._years: List[Optional[int]] = [r.year or None for r in results]
+
+        uf = _UnionFind(n)
+        owners: Dict[Tuple[str, str], int] = {}
+        for idx, r in enumerate(results):
+            for kind, value in (
+                ("bgm", r.bgm_id),
+                ("mal", r.mal_id),
+                ("anilist", r.anilist_id),
+            ):
+                if not value:
+                    continue
+                key = (kind, value)
+                if key in owners:
+                    uf.union(owners[key], idx)
+                else:
+                    owners[key] = idx
+        self._uf = uf
+        self._components: Dict[int, List[int]] = {}
+        for idx in range(n):
+            self._components.setdefault(uf.find(idx), []).append(idx)
+
+        self._keys: List[Set[str]] = []
+        self._index: Dict[str, Dict[Optional[int], List[int]]] = {}
+        for idx, r in enumerate(results):
+            keys: Set[str] = set()
+            names = r.get_all_names()
+            for name in names:
+                keys |= _title_block_keys(name)
+            hits = _count_pattern_hits(tuple(names), title_patterns)
+            for pattern_idx, count in enumerate(hits):
+                if count:
+                    keys.add("p%d" % pattern_idx)
+            self._keys.append(keys)
+            year = self._years[idx]
+            for key in keys:
+                self._index.setdefault(key, {}).setdefault(year, []).append(idx)
+
+    def candidates(self, i: int) -> List[int]:
+        cands: Set[int] = set(self._components[self._uf.find(i)])
+        year = self._years[i]
+        for key in self._keys[i]:
+            buckets = self._index[key]
+            if year is None:
+                for posting in buckets.values():
+                    cands.update(posting)
+            else:
+                for y in (year - 1, year, year + 1, None):
+                    posting = buckets.get(y)
+                    if posting:
+                        cands.update(posting)
+        return sorted(j for j in cands if j > i)
 
 
 class CrossValidator:
@@ -1146,10 +2360,14 @@ class CrossValidator:
         "onepiece": ["海贼", "one piece"],
     }
 
-    def __init__(self, match_mode: str = "normal"):
-        self.bgm = BangumiSearcher()
-        self.anilist = AniListSearcher()
-        self.jikan = JikanSearcher()
+    def __init__(
+        self, match_mode: str = "normal", http: Optional[HttpClientRegistry] = None
+    ):
+        self.http = http or get_http_registry()
+        self.bgm = BangumiSearcher(self.http)
+        self.anilist = AniListSearcher(self.http)
+        self.jikan = JikanSearcher(self.http)
+        self.local = LocalSearcher(self.http) if _LOCAL_FIRST else None
         self.match_mode = match_mode
 
     @staticmethod
@@ -1213,15 +2431,7 @@ class CrossValidator:
         all_results.extend(jikan_results)
 
         # Enrich IDs using BangumiExtLinker mapping
-        if lookup_ext_ids:
-            for info in all_results:
-                ext = lookup_ext_ids(bgm_id=info.bgm_id, mal_id=info.mal_id)
-                if not ext:
-                    continue
-                if not info.bgm_id and ext.get("bgm_id"):
-                    info.bgm_id = str(ext.get("bgm_id"))
-                if not info.mal_id and ext.get("mal_id"):
-                    info.mal_id = str(ext.get("mal_id"))
+        self._link_ext_ids(all_results)
 
         # 合并和交叉验证
         validated = self._cross_validate(all_results, filters)
@@ -1233,129 +2443,347 @@ class CrossValidator:
 
         return validated
 
-    async def asearch(self, keyword: str, **filters) -> List[AnimeInfo]:
-        """异步多源交叉验证搜索"""
-        all_results: List[AnimeInfo] = []
-
-        async with _build_async_client() as client:
-            bgm_task = self.bgm.asearch(client, keyword, **filters)
-            anl_task = self.anilist.asearch(client, keyword, **filters)
-            bgm_results, anilist_results = await asyncio.gather(
-                bgm_task, anl_task, return_exceptions=True
-            )
-
-            if isinstance(bgm_results, Exception):
-                bgm_results = []
-            if isinstance(anilist_results, Exception):
-                anilist_results = []
+    # 原始结果按固定的源顺序拼接，分组结果与各源返回的先后无关
+    STAGE_ORDER = ("local", "bangumi", "anilist", "anilist_extra", "jikan")
 
-            all_results.extend(bgm_results)
-            all_results.extend(anilist_results)
+    async def astages(
+        self,
+        keyword: str,
+        deadline: Optional[Deadline] = None,
+        *,
+        jikan_seen: Optional[Dict[str, List[AnimeInfo]]] = None,
+        **filters,
+    ) -> AsyncIterator[Tuple[str, List[AnimeInfo]]]:
+        """
+        按数据到达顺序产出 (阶段, 截至该阶段的全部原始结果)
 
-            extra_queries = self._build_extra_name_queries(keyword, bgm_results, anilist_results)
+        阶段依次为 local(本地映射有高置信命中时)、bangumi / anilist(先返回者在前)、
+        anilist_extra(有额外查询时)、jikan。local 命中已确定时跳过 anilist_extra，
+        jikan 阶段改为按 MAL ID 直接取条目。
+        给定 deadline 时各阶段只等待剩余预算，未完成的源/阶段记入 deadline.skipped。
+        给定 jikan_seen 时记录 Jikan 阶段各查询的结果(按规范化关键词)，供 MAL 补全复用。
+        """
+        deadline = deadline or Deadline()
+        bgm_client = self.bgm.async_client()
+        anl_client = self.anilist.async_client()
+        jikan_client = self.jikan.async_client()
+        slots: Dict[str, List[AnimeInfo]] = {stage: [] for stage in self.STAGE_ORDER}
+
+        def snapshot() -> List[AnimeInfo]:
+            return [info for stage in self.STAGE_ORDER for info in slots[stage]]
+
+        tasks = {
+            asyncio.ensure_future(self.bgm.asearch(bgm_client, keyword, **filters)): "bangumi",
+            asyncio.ensure_future(
+                self.anilist.asearch(anl_client, keyword, **filters)
+            ): "anilist",
+        }
+        try:
+            if self.local is not None:
+                slots["local"] = [
+                    r
+                    for r in await self.local.asearch(None, keyword, **filters)
+                    if r.confidence >= _LOCAL_RESOLVE_SCORE
+                ]
+                if slots["local"]:
+                    yield "local", snapshot()
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=deadline.remaining(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    for task in pending:
+                        deadline.skip(tasks[task])
+                    break
+                for task in sorted(done, key=lambda t: self.STAGE_ORDER.index(tasks[t])):
+                    try:
+                        slots[tasks[task]] = task.result()
+                    except Exception:
+                        slots[tasks[task]] = []
+                    yield tasks[task], snapshot()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        resolved_mal_ids = list(dict.fromkeys(r.mal_id for r in slots["local"] if r.mal_id))
+        if resolved_mal_ids:
+            if deadline.expired():
+                deadline.skip("jikan")
+                return
+            try:
+                slots["jikan"] = await asyncio.wait_for(
+                    self.jikan.aget_many(jikan_client, resolved_mal_ids[:6]),
+                    deadline.remaining(),
+                )
+            except asyncio.TimeoutError:
+                deadline.skip("jikan")
+            yield "jikan", snapshot()
+            return
 
-            anl_extra_tasks = [
-                self.anilist.asearch(client, q, **filters) for q in extra_queries[1:4]
-            ]
-            if anl_extra_tasks:
-                anl_extra = await asyncio.gather(*anl_extra_tasks, return_exceptions=True)
-                for one in anl_extra:
-                    if isinstance(one, list):
-                        all_results.extend(one)
-
-            jikan_tasks = [
-                self.jikan.asearch(client, q, **filters) for q in extra_queries[1:6]
-            ]
-            jikan_tasks.append(self.jikan.asearch(client, keyword, **filters))
-            jikan_extra = await asyncio.gather(*jikan_tasks, return_exceptions=True)
-            for one in jikan_extra:
-                if isinstance(one, list):
-                    all_results.extend(one)
+        extra_queries = self._build_extra_name_queries(
+            keyword, slots["bangumi"], slots["anilist"]
+        )
 
-        if lookup_ext_ids:
-            for info in all_results:
-                ext = lookup_ext_ids(bgm_id=info.bgm_id, mal_id=info.mal_id)
-                if not ext:
-                    continue
-                if not info.bgm_id and ext.get("bgm_id"):
-                    info.bgm_id = str(ext.get("bgm_id"))
-                if not info.mal_id and ext.get("mal_id"):
-                    info.mal_id = str(ext.get("mal_id"))
+        if extra_queries[1:4]:
+            if deadline.expired():
+                deadline.skip("anilist_extra")
+            else:
+                # 额外 AniList 查询合并为一个别名 GraphQL 请求
+                try:
+                    anl_extra = await asyncio.wait_for(
+                        self.anilist.asearch_many(anl_client, extra_queries[1:4], **filters),
+                        deadline.remaining(),
+                    )
+                except asyncio.TimeoutError:
+                    deadline.skip("anilist_extra")
+                    anl_extra = []
+                except Exception:
+                    anl_extra = []
+                slots["anilist_extra"] = [info for one in anl_extra for info in one]
+                yield "anilist_extra", snapshot()
+
+        if deadline.expired():
+            deadline.skip("jikan")
+            return
+        jikan_queries = extra_queries[1:6] + [keyword]
+        jikan_tasks = [
+            asyncio.ensure_future(self.jikan.asearch(jikan_client, q, **filters))
+            for q in jikan_queries
+        ]
+        try:
+            done, pending = await asyncio.wait(jikan_tasks, timeout=deadline.remaining())
+        finally:
+            for task in jikan_tasks:
+                if not task.done():
+                    task.cancel()
+        if pending:
+            # 部分完成：保留已返回的查询
+            deadline.skip("jikan")
+        jikan_results: List[AnimeInfo] = []
+        for q, task in zip(jikan_queries, jikan_tasks):
+            if task in done and not task.cancelled() and task.exception() is None:
+                jikan_results.extend(task.result())
+                if jikan_seen is not None:
+                    jikan_seen[_normalize_query_keyword(q)] = [
+                        replace(info) for info in task.result()
+                    ]
+        slots["jikan"] = jikan_results
+        yield "jikan", snapshot()
+
+    def _link_ext_ids(self, results: List[AnimeInfo]) -> None:
+        """用 BangumiExtLinker 映射补全 bgm_id / mal_id"""
+        if not lookup_ext_ids:
+            return
+        for info in results:
+            ext = lookup_ext_ids(bgm_id=info.bgm_id, mal_id=info.mal_id)
+            if not ext:
+                continue
+            if not info.bgm_id and ext.get("bgm_id"):
+                info.bgm_id = str(ext.get("bgm_id"))
+            if not info.mal_id and ext.get("mal_id"):
+                info.mal_id = str(ext.get("mal_id"))
 
+    async def _afinalize(
+        self,
+        all_results: List[AnimeInfo],
+        filters: Dict,
+        deadline: Optional[Deadline] = None,
+        jikan_seen: Optional[Dict[str, List[AnimeInfo]]] = None,
+    ) -> List[AnimeInfo]:
+        self._link_ext_ids(all_results)
         validated = self._cross_validate(all_results, filters)
-        self._enrich_missing_mal(validated, filters)
+        if deadline is not None and deadline.expired():
+            deadline.skip("mal_enrich")
+        else:
+            await self._aenrich_missing_mal(validated, filters, deadline, jikan_seen)
+        validated.sort(key=lambda x: x.confidence, reverse=True)
+        return validated
+
+    def _provisional(self, all_results: List[AnimeInfo], filters: Dict) -> List[AnimeInfo]:
+        """中间阶段的排序：在副本上合并(过滤加权会改置信度)，不做 MAL 补全"""
+        copies = [replace(info) for info in all_results]
+        self._link_ext_ids(copies)
+        validated = self._cross_validate(copies, filters)
         validated.sort(key=lambda x: x.confidence, reverse=True)
         return validated
 
+    async def asearch(
+        self, keyword: str, deadline: Optional[Deadline] = None, **filters
+    ) -> List[AnimeInfo]:
+        """异步多源交叉验证搜索；给定 deadline 时超时阶段被跳过，用已完成的结果合并"""
+        all_results: List[AnimeInfo] = []
+        jikan_seen: Dict[str, List[AnimeInfo]] = {}
+        async for _, all_results in self.astages(
+            keyword, deadline, jikan_seen=jikan_seen, **filters
+        ):
+            pass
+        return await self._afinalize(all_results, filters, deadline, jikan_seen)
+
+    async def asearch_stream(
+        self, keyword: str, deadline: Optional[Deadline] = None, **filters
+    ) -> AsyncIterator[Tuple[str, List[AnimeInfo]]]:
+        """
+        流式多源搜索：每个阶段产出 (阶段, 当前排序结果)，
+        最后产出 ("final", 结果)，与 asearch 的返回一致
+        """
+        all_results: List[AnimeInfo] = []
+        jikan_seen: Dict[str, List[AnimeInfo]] = {}
+        async for stage, all_results in self.astages(
+            keyword, deadline, jikan_seen=jikan_seen, **filters
+        ):
+            yield stage, self._provisional(all_results, filters)
+        yield "final", await self._afinalize(all_results, filters, deadline, jikan_seen)
+
     @staticmethod
     def _best_title_similarity(target: AnimeInfo, cand: AnimeInfo) -> float:
         t_names = [n for n in target.get_all_names() if n]
         c_names = [n for n in cand.get_all_names() if n]
         if not t_names or not c_names:
             return 0.0
+        t_feats = [_title_features(n) for n in t_names]
+        c_feats = [_title_features(n) for n in c_names]
         best = 0.0
-        for a in t_names:
-            for b in c_names:
-                best = max(best, _similarity_score(a, b))
+        for fa in t_feats:
+            for fb in c_feats:
+                best = max(best, _similarity_from_features(fa, fb))
         return best
 
+    @classmethod
+    def _best_title_similarities(
+        cls, target: AnimeInfo, cands: List[AnimeInfo]
+    ) -> List[float]:
+        """target 与每个候选的最佳标题相似度"""
+        return [cls._best_title_similarity(target, c) for c in cands]
+
+    @staticmethod
+    def _mal_enrich_queries(item: AnimeInfo) -> List[str]:
+        """MAL 补全的查询词：日文名/名称/中文名，按规范化去重，最多 3 个"""
+        seen = set()
+        queries = []
+        for q in [item.name_jp, item.name, item.name_cn]:
+            if not q:
+                continue
+            nq = _normalize_title(q)
+            if not nq or nq in seen:
+                continue
+            seen.add(nq)
+            queries.append(q)
+        return queries[:3]
+
+    def _pick_mal_candidate(
+        self, item: AnimeInfo, candidates: List[AnimeInfo]
+    ) -> Optional[Tuple[AnimeInfo, float]]:
+        # 规范：优先使用 MAL 搜索结果第一条（在基础匹配通过时）
+        scores = self._best_title_similarities(item, candidates)
+        for idx, (cand, score) in enumerate(zip(candidates, scores)):
+            if idx == 0 and score >= 0.60:
+                return cand, score
+            if score >= 0.72:
+                return cand, score
+        return None
+
+    @staticmethod
+    def _apply_mal_match(item: AnimeInfo, best_match: AnimeInfo, best_score: float) -> None:
+        item.mal_id = best_match.mal_id
+        if item.mal_score is None:
+            item.mal_score = best_match.mal_score
+        if not item.name_jp and best_match.name_jp:
+            item.name_jp = best_match.name_jp
+        if not item.name_cn and best_match.name_cn:
+            item.name_cn = best_match.name_cn
+        item.confidence = min(1.0, max(item.confidence, best_score))
+
     def _enrich_missing_mal(self, results: List[AnimeInfo], filters: Dict) -> None:
         if not results:
             return
 
+        # OVA/Movie can be far from base year; don't hard-limit by year here.
+        relaxed_filters = {k: v for k, v in filters.items() if k != "year"}
+
         cache: Dict[str, List[AnimeInfo]] = {}
         for item in results:
             if item.mal_id:
                 continue
 
-            queries = []
-            for t in [item.name_jp, item.name, item.name_cn]:
-                if t:
-                    queries.append(t)
-
-            # unique + normalized
-            seen = set()
-            uniq_queries = []
-            for q in queries:
-                nq = _normalize_title(q)
-                if not nq or nq in seen:
-                    continue
-                seen.add(nq)
-                uniq_queries.append(q)
-
-            # OVA/Movie can be far from base year; don't hard-limit by year here.
-            relaxed_filters = {k: v for k, v in filters.items() if k != "year"}
-
             picked = None
-            for q in uniq_queries[:3]:
+            for q in self._mal_enrich_queries(item):
                 if q not in cache:
                     try:
                         cache[q] = self.jikan.search(q, **relaxed_filters)
                     except Exception:
                         cache[q] = []
-
-                # 规范：优先使用 MAL 搜索结果第一条（在基础匹配通过时）
-                for idx, cand in enumerate(cache[q]):
-                    score = self._best_title_similarity(item, cand)
-                    if idx == 0 and score >= 0.60:
-                        picked = (cand, score)
-                        break
-                    if score >= 0.72:
-                        picked = (cand, score)
-                        break
+                picked = self._pick_mal_candidate(item, cache[q])
                 if picked:
                     break
 
             if picked:
-                best_match, best_score = picked
-                item.mal_id = best_match.mal_id
-                if item.mal_score is None:
-                    item.mal_score = best_match.mal_score
-                if not item.name_jp and best_match.name_jp:
-                    item.name_jp = best_match.name_jp
-                if not item.name_cn and best_match.name_cn:
-                    item.name_cn = best_match.name_cn
-                item.confidence = min(1.0, max(item.confidence, best_score))
+                self._apply_mal_match(item, *picked)
+
+    async def _aenrich_missing_mal(
+        self,
+        results: List[AnimeInfo],
+        filters: Dict,
+        deadline: Optional[Deadline] = None,
+        jikan_seen: Optional[Dict[str, List[AnimeInfo]]] = None,
+    ) -> None:
+        """
+        _enrich_missing_mal 的异步版本
+
+        各条目并发查询，经 JikanSearcher.asearch 走共享连接池与限速(以及缓存、single-flight)，
+        同一查询词只请求一次；jikan_seen 中本次搜索 Jikan 阶段已取得的结果优先复用。
+        给定 deadline 时只等待剩余预算，已完成的条目保留补全结果。
+        """
+        missing = [item for item in results if not item.mal_id]
+        if not missing:
+            return
+
+        # OVA/Movie can be far from base year; don't hard-limit by year here.
+        relaxed_filters = {k: v for k, v in filters.items() if k != "year"}
+        # Jikan 阶段带着完整过滤条件查询；有年份过滤时其结果只是放宽查询的子集
+        seen_is_relaxed = relaxed_filters == filters
+        jikan_seen = jikan_seen or {}
+        client = self.jikan.async_client()
+        lookups: Dict[str, asyncio.Future] = {}
+
+        def lookup(q: str) -> asyncio.Future:
+            key = _normalize_query_keyword(q)
+            task = lookups.get(key)
+            if task is None:
+                task = asyncio.ensure_future(
+                    self.jikan.asearch(client, q, **relaxed_filters)
+                )
+                lookups[key] = task
+            return task
+
+        async def enrich(item: AnimeInfo) -> None:
+            for q in self._mal_enrich_queries(item):
+                seen = jikan_seen.get(_normalize_query_keyword(q))
+                picked = self._pick_mal_candidate(item, seen) if seen else None
+                if picked is None and not (seen is not None and seen_is_relaxed):
+                    try:
+                        candidates = await asyncio.shield(lookup(q))
+                    except Exception:
+                        candidates = []
+                    picked = self._pick_mal_candidate(item, candidates)
+                if picked:
+                    self._apply_mal_match(item, *picked)
+                    return
+
+        tasks = [asyncio.ensure_future(enrich(item)) for item in missing]
+        try:
+            _, pending = await asyncio.wait(
+                tasks, timeout=deadline.remaining() if deadline else None
+            )
+        finally:
+            for task in tasks + list(lookups.values()):
+                if not task.done():
+                    task.cancel()
+        if pending and deadline is not None:
+            deadline.skip("mal_enrich")
 
     def _cross_validate(
         self, results: List[AnimeInfo], filters: Dict
@@ -1365,6 +2793,66 @@ class CrossValidator:
             return []
 
         # 按名称相似度分组
+        groups = self._group_results(results)
+
+        # 合并每组
+        merged = [self._merge_group(group) for group in groups]
+
+        # 应用额外过滤
+        return self._apply_filters(merged, filters)
+
+    @classmethod
+    def _pattern_keywords(cls) -> Tuple[Tuple[str, ...], ...]:
+        cached = cls.__dict__.get("_PATTERN_KEYWORDS_CACHE")
+        if cached is None:
+            cached = tuple(tuple(v) for v in cls.TITLE_PATTERNS.values())
+            cls._PATTERN_KEYWORDS_CACHE = cached
+        return cached
+
+    @classmethod
+    def _pattern_has_long_keyword(cls) -> Tuple[bool, ...]:
+        cached = cls.__dict__.get("_PATTERN_LONG_CACHE")
+        if cached is None:
+            cached = tuple(
+                any(len(k) >= 4 for k in keywords) for keywords in cls._pattern_keywords()
+            )
+            cls._PATTERN_LONG_CACHE = cached
+        return cached
+
+    def _group_results(self, results: List[AnimeInfo]) -> List[List[AnimeInfo]]:
+        """
+        分组：每个未分组结果作为种子，收集其后所有判定为同一动画的结果。
+
+        结果较多时通过 ResultBlocker 只比较候选对；结果少于 PRECISE_CLUSTER_BLOCK_MIN_RESULTS
+        或启用向量模型(相似度没有上界)时两两比较（PRECISE_CLUSTER_ENGINE=pairwise 可强制回退）。
+        """
+        if (
+            _CLUSTER_ENGINE == "pairwise"
+            or len(results) < max(3, _CLUSTER_BLOCK_MIN_RESULTS)
+            or _get_embedding_model() is not None
+        ):
+            return self._group_pairwise(results)
+        return self._group_blocked(results)
+
+    def _group_blocked(self, results: List[AnimeInfo]) -> List[List[AnimeInfo]]:
+        blocker = ResultBlocker(results, self._pattern_keywords())
+        groups: List[List[AnimeInfo]] = []
+        used = [False] * len(results)
+        for i, info in enumerate(results):
+            if used[i]:
+                continue
+            group = [info]
+            used[i] = True
+            for j in blocker.candidates(i):
+                if used[j]:
+                    continue
+                if self._is_same_anime(info, results[j]):
+                    group.append(results[j])
+                    used[j] = True
+            groups.append(group)
+        return groups
+
+    def _group_pairwise(self, results: List[AnimeInfo]) -> List[List[AnimeInfo]]:
         groups: List[List[AnimeInfo]] = []
         used = set()
 
@@ -1385,12 +2873,7 @@ class CrossValidator:
                     used.add(j)
 
             groups.append(group)
-
-        # 合并每组
-        merged = [self._merge_group(group) for group in groups]
-
-        # 应用额外过滤
-        return self._apply_filters(merged, filters)
+        return groups
 
     def _is_same_anime(self, a: AnimeInfo, b: AnimeInfo) -> bool:
         """判断两个AnimeInfo是否代表同一部动画"""
@@ -1423,20 +2906,14 @@ class CrossValidator:
                     return True
 
         # 4. 检查关键词匹配
-        for pattern_keywords in self.TITLE_PATTERNS.values():
-            a_matches = sum(
-                1
-                for k in pattern_keywords
-                if any(k in _normalize_title(n) for n in a_names)
-            )
-            b_matches = sum(
-                1
-                for k in pattern_keywords
-                if any(k in _normalize_title(n) for n in b_names)
-            )
+        patterns = self._pattern_keywords()
+        a_hits = _count_pattern_hits(tuple(a_names), patterns)
+        b_hits = _count_pattern_hits(tuple(b_names), patterns)
+        has_long = self._pattern_has_long_keyword()
+        for long_kw, a_matches, b_matches in zip(has_long, a_hits, b_hits):
             if a_matches >= 2 and b_matches >= 2:
                 return True
-            if any(len(k) >= 4 for k in pattern_keywords) and a_matches > 0 and b_matches > 0:
+            if long_kw and a_matches > 0 and b_matches > 0:
                 return True
 
         return False
@@ -1451,15 +2928,16 @@ class CrossValidator:
         if not title1 or not title2:
             return False
 
-        n1 = _normalize_title(title1)
-        n2 = _normalize_title(title2)
+        f1 = _title_features(title1)
+        f2 = _title_features(title2)
+        n1 = f1.normalized
+        n2 = f2.normalized
         if not n1 or not n2:
             return False
         if n1 == n2:
             return True
 
-        score = _similarity_score(title1, title2, mode=mode)
-        both_jp = _has_japanese(title1) and _has_japanese(title2)
+        both_jp = f1.has_japanese and f2.has_japanese
         threshold = 0.80 if both_jp else 0.86
         if year_delta == 0:
             threshold -= 0.03
@@ -1472,10 +2950,17 @@ class CrossValidator:
         min_len = min(len(n1), len(n2))
         if min_len <= 4:
             threshold += 0.06
-        if score >= threshold:
+        score = None
+        # 上界达不到阈值时跳过完整打分（启用向量模型时上界不成立）
+        if (
+            _get_embedding_model() is not None
+            or _similarity_upper_bound(f1, f2, mode) + _UPPER_BOUND_SLACK >= threshold
+        ):
+            score = _similarity_from_features(f1, f2, mode=mode)
+        if score is not None and score >= threshold:
             return True
 
-        token_overlap = _token_overlap_score(title1, title2)
+        token_overlap = _set_jaccard(f1.token_set, f2.token_set)
         if token_overlap >= 0.85:
             return True
 
@@ -1625,6 +3110,26 @@ class CrossValidator:
         return normalized
 
 
+def _precise_search_key(
+    keyword: str,
+    filters: dict,
+    match_mode: str,
+    include_extra_scores: bool,
+    debug_scores: bool,
+    top_n: int,
+    deadline_ms: int,
+) -> tuple:
+    return (
+        _normalize_query_keyword(keyword),
+        _filters_key(filters),
+        match_mode,
+        bool(include_extra_scores),
+        bool(debug_scores),
+        top_n,
+        deadline_ms,
+    )
+
+
 async def search_anime_precise_async(
     keyword: str,
     year: Optional[int] = None,
@@ -1636,9 +3141,18 @@ async def search_anime_precise_async(
     debug_scores: bool = False,
     match_mode: str = "normal",
     top_n: int = 10,
+    deadline_ms: Optional[int] = None,
+    meta: Optional[dict] = None,
 ) -> List[dict]:
     """
     异步便捷函数：执行精确搜索并返回字典列表。
+
+    相同 (规范化关键词, 过滤条件, match_mode, 站外评分选项, top_n, deadline_ms)
+    的并发调用只执行一次，其余调用方共享结果。
+
+    deadline_ms 为整体延迟预算(默认取 PRECISE_SEARCH_DEADLINE_MS，0 为不限)，
+    超时的阶段被跳过，用已完成的结果返回；传入 meta 字典时写入
+    {deadline_ms, elapsed_ms, partial, skipped}。
     """
     filters = {
         "year": year,
@@ -1649,56 +3163,238 @@ async def search_anime_precise_async(
     }
     filters = {k: v for k, v in filters.items() if v is not None}
 
+    if deadline_ms is None:
+        deadline_ms = _DEFAULT_DEADLINE_MS
+
+    key = _precise_search_key(
+        keyword, filters, match_mode, include_extra_scores, debug_scores, top_n, deadline_ms
+    )
+    (output, report), shared = await _SEARCH_FLIGHT.do(
+        key,
+        lambda: _search_anime_precise_async(
+            keyword,
+            filters,
+            include_extra_scores,
+            debug_scores,
+            match_mode,
+            top_n,
+            deadline_ms,
+        ),
+    )
+    if shared:
+        output = [dict(item) for item in output]
+    if meta is not None:
+        meta.update(report)
+        meta["skipped"] = list(report["skipped"])
+    return output
+
+
+_SEARCH_BATCH_CONCURRENCY = int(os.getenv("PRECISE_SEARCH_BATCH_CONCURRENCY", "8"))
+
+
+async def search_anime_precise_batch(
+    queries: List[dict], concurrency: Optional[int] = None
+) -> AsyncIterator[Tuple[List[int], List[dict], dict, Optional[Exception]]]:
+    """
+    批量精确搜索：queries 为 search_anime_precise_async 的关键字参数(keyword, year, ...)。
+
+    规范化后相同的查询只执行一次；整个批次共享子查询备忘(含空结果)，
+    不同查询派生出的相同额外查询 / MAL ID 也只请求一次，上游仍走各主机限速。
+    最多 concurrency(默认 PRECISE_SEARCH_BATCH_CONCURRENCY) 个查询同时执行，
+    每完成一个产出 (该查询对应的下标列表, 结果, meta, 异常)。
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for i, q in enumerate(queries):
+        filters = {
+            k: q.get(k)
+            for k in ("year", "month", "studio", "director", "source")
+            if q.get(k) is not None
+        }
+        deadline_ms = q.get("deadline_ms")
+        key = _precise_search_key(
+            q.get("keyword", ""),
+            filters,
+            q.get("match_mode", "normal"),
+            q.get("include_extra_scores", False),
+            q.get("debug_scores", False),
+            q.get("top_n", 10),
+            _DEFAULT_DEADLINE_MS if deadline_ms is None else deadline_ms,
+        )
+        groups.setdefault(key, []).append(i)
+
+    memo: Dict[tuple, Tuple[AnimeInfo, ...]] = {}
+    semaphore = asyncio.Semaphore(max(1, concurrency or _SEARCH_BATCH_CONCURRENCY))
+
+    async def _run(indices: List[int]):
+        # 每个任务有独立的上下文副本，这里设置不会影响调用方
+        _BATCH_MEMO.set(memo)
+        meta: dict = {}
+        async with semaphore:
+            try:
+                output = await search_anime_precise_async(**queries[indices[0]], meta=meta)
+            except Exception as e:
+                return indices, [], meta, e
+        return indices, output, meta, None
+
+    tasks = [asyncio.ensure_future(_run(indices)) for indices in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def _result_to_item(r: AnimeInfo) -> dict:
+    """AnimeInfo 转为输出字典，并附加映射表中的站外 ID"""
+    item = r.to_dict()
+    if lookup_ext_ids:
+        ext = lookup_ext_ids(bgm_id=item.get("bgm_id"), mal_id=item.get("mal_id"))
+        if ext:
+            if not item.get("bgm_id") and ext.get("bgm_id"):
+                item["bgm_id"] = str(ext.get("bgm_id"))
+            if not item.get("mal_id") and ext.get("mal_id"):
+                item["mal_id"] = str(ext.get("mal_id"))
+            for key in [
+                "douban_id",
+                "bili_id",
+                "anidb_id",
+                "tmdb_id",
+                "imdb_id",
+                "tvdb_id",
+                "wikidata_id",
+            ]:
+                if ext.get(key) and not item.get(key):
+                    item[key] = ext.get(key)
+    return item
+
+
+async def _attach_extra_scores_async(item: dict, debug_scores: bool) -> dict:
+    """抓取站外评分(Filmarks 等)并写入 item"""
+    extra, debug = await _aget_extra_scores(
+        item.get("name", ""), item.get("name_cn", ""), item.get("name_jp", "")
+    )
+    debug_payload = debug if debug_scores else None
+    if extra:
+        item.update(extra)
+    _merge_local_extra_scores(item, debug=debug_payload)
+    if debug_scores:
+        item["debug_scores"] = debug_payload or {}
+    return item
+
+
+async def _search_anime_precise_async(
+    keyword: str,
+    filters: dict,
+    include_extra_scores: bool,
+    debug_scores: bool,
+    match_mode: str,
+    top_n: int,
+    deadline_ms: Optional[int] = None,
+) -> Tuple[List[dict], dict]:
+    deadline = Deadline(deadline_ms)
     validator = CrossValidator(match_mode=match_mode)
-    results = await validator.asearch(keyword, **filters)
+    results = await validator.asearch(keyword, deadline, **filters)
+
+    output = [_result_to_item(r) for r in results[:top_n]]
+    if include_extra_scores and output:
+        if deadline.expired():
+            deadline.skip("extra_scores")
+        else:
+            # 所有条目同时抓取；到期未完成的条目保持无站外评分
+            tasks = [
+                asyncio.ensure_future(_attach_extra_scores_async(item, debug_scores))
+                for item in output
+            ]
+            try:
+                _, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()
+            if pending:
+                deadline.skip("extra_scores")
 
-    output = []
-    for r in results[:top_n]:
-        item = r.to_dict()
-        if lookup_ext_ids:
-            ext = lookup_ext_ids(bgm_id=item.get("bgm_id"), mal_id=item.get("mal_id"))
-            if ext:
-                if not item.get("bgm_id") and ext.get("bgm_id"):
-                    item["bgm_id"] = str(ext.get("bgm_id"))
-                if not item.get("mal_id") and ext.get("mal_id"):
-                    item["mal_id"] = str(ext.get("mal_id"))
-                for key in [
-                    "douban_id",
-                    "bili_id",
-                    "anidb_id",
-                    "tmdb_id",
-                    "imdb_id",
-                    "tvdb_id",
-                    "wikidata_id",
-                ]:
-                    if ext.get(key) and not item.get(key):
-                        item[key] = ext.get(key)
+    return output, deadline.report()
 
-        if include_extra_scores:
-            debug_payload = None
-            if debug_scores:
-                extra, debug_payload = await asyncio.to_thread(
-                    _fetch_extra_scores_debug,
-                    item.get("name", ""),
-                    item.get("name_cn", ""),
-                    item.get("name_jp", ""),
-                )
-            else:
-                extra = await asyncio.to_thread(
-                    _fetch_extra_scores,
-                    item.get("name", ""),
-                    item.get("name_cn", ""),
-                    item.get("name_jp", ""),
-                )
-            if extra:
-                item.update(extra)
-            _merge_local_extra_scores(item, debug=debug_payload)
-            if debug_scores:
-                item["debug_scores"] = debug_payload or {}
 
-        output.append(item)
+async def search_anime_precise_stream(
+    keyword: str,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    studio: Optional[str] = None,
+    director: Optional[str] = None,
+    source: Optional[str] = None,
+    include_extra_scores: bool = False,
+    debug_scores: bool = False,
+    match_mode: str = "normal",
+    top_n: int = 10,
+    deadline_ms: Optional[int] = None,
+) -> AsyncIterator[dict]:
+    """
+    流式精确搜索，产出事件字典 {"event", "stage", "results"}
 
-    return output
+    event 依次为 provisional(Bangumi/AniList 首个返回)、revised(后续每个阶段，
+    以及开启站外评分时每条评分到达)、final(与 search_anime_precise_async 结果一致，
+    另带 deadline 报告 "meta")。
+    """
+    filters = {
+        "year": year,
+        "month": month,
+        "studio": studio,
+        "director": director,
+        "source": source,
+    }
+    filters = {k: v for k, v in filters.items() if v is not None}
+
+    deadline = Deadline(_DEFAULT_DEADLINE_MS if deadline_ms is None else deadline_ms)
+    validator = CrossValidator(match_mode=match_mode)
+    event = "provisional"
+    final_items: List[dict] = []
+    async for stage, ranked in validator.asearch_stream(keyword, deadline, **filters):
+        items = [_result_to_item(r) for r in ranked[:top_n]]
+        if stage == "final":
+            final_items = items
+            break
+        yield {"event": event, "stage": stage, "results": items}
+        event = "revised"
+
+    if include_extra_scores and final_items:
+        yield {"event": "revised", "stage": "validated", "results": [dict(i) for i in final_items]}
+        tasks = [
+            asyncio.ensure_future(_attach_extra_scores_async(item, debug_scores))
+            for item in final_items
+        ]
+        try:
+            for fut in asyncio.as_completed(tasks, timeout=deadline.remaining()):
+                try:
+                    await fut
+                except asyncio.TimeoutError:
+                    raise
+                except Exception:
+                    continue
+                yield {
+                    "event": "revised",
+                    "stage": "extra_scores",
+                    "results": [dict(i) for i in final_items],
+                }
+        except asyncio.TimeoutError:
+            deadline.skip("extra_scores")
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    yield {
+        "event": "final",
+        "stage": "final",
+        "results": final_items,
+        "meta": deadline.report(),
+    }
 
 
 def search_anime_precise(
@@ -1,4 +1,7 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+# 预先编译映射索引，各 worker 直接 mmap 共享
+/app/venv/bin/python /app/scripts/build_map_index.py || true
+
 exec /app/venv/bin/supervisord -c /etc/supervisord.conf
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CrossValidator 分组性能基准
+
+用 mapping/anime_map.json 合成多源搜索结果（同一作品在 Bangumi/AniList/Jikan
+中的不同标题、季度后缀、缺失年份等），对比两两比较与 ResultBlocker 分组的耗时，
+并校验两者分组完全一致（用于确定 PRECISE_CLUSTER_BLOCK_MIN_RESULTS）。
+
+用法:
+    python scripts/bench_cross_validate.py [--sizes 50,200,1000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from apis.precise import AnimeInfo, CrossValidator, clear_title_feature_cache
+
+SUFFIXES = ["", " 2nd Season", " Season 2", " Part 2", " (TV)", " Movie"]
+
+
+def _load_entries() -> list:
+    path = os.path.join(PROJECT_ROOT, "mapping", "anime_map.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_results(entries: list, size: int, seed: int = 7) -> list:
+    rnd = random.Random(seed)
+    base = rnd.sample(entries, max(1, size // 3))
+    results = []
+    while len(results) < size:
+        e = rnd.choice(base)
+        year = None
+        if e.get("date"):
+            try:
+                year = int(str(e["date"])[:4])
+            except ValueError:
+                year = None
+        info = AnimeInfo()
+        kind = rnd.randint(0, 3)
+        if kind == 0:
+            info.bgm_id = e.get("bgm_id")
+            info.name = e.get("name", "")
+            info.name_cn = e.get("name_cn", "")
+        elif kind == 1:
+            info.mal_id = e.get("mal_id")
+            info.name = e.get("name", "") + rnd.choice(SUFFIXES)
+            info.name_jp = e.get("name", "")
+        elif kind == 2:
+            info.anilist_id = str(rnd.randint(1, 10**6))
+            info.name_jp = e.get("name", "")
+            info.name_cn = e.get("name_cn", "")
+        else:
+            info.name = e.get("name_cn") or e.get("name", "")
+        info.year = year if rnd.random() < 0.9 else None
+        info.confidence = rnd.random()
+        results.append(info)
+    return results
+
+
+def _timed(fn, repeat: int):
+    best = None
+    out = None
+    for _ in range(repeat):
+        clear_title_feature_cache()
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark CrossValidator grouping")
+    parser.add_argument("--sizes", default="50,200,1000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", default="normal", choices=["normal", "recall", "strict"])
+    args = parser.parse_args()
+
+    entries = _load_entries()
+    validator = CrossValidator(match_mode=args.mode)
+    ok = True
+
+    print(f"{'size':>6} {'groups':>7} {'pairwise(s)':>12} {'blocked(s)':>11} {'speedup':>8}")
+    for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        results = make_results(entries, size)
+        t_pair, g_pair = _timed(lambda: validator._group_pairwise(results), args.repeat)
+        t_block, g_block = _timed(lambda: validator._group_blocked(results), args.repeat)
+        same = [[id(x) for x in g] for g in g_pair] == [[id(x) for x in g] for g in g_block]
+        ok = ok and same
+        speedup = t_pair / t_block if t_block else float("inf")
+        flag = "" if same else "  MISMATCH"
+        print(f"{size:>6} {len(g_block):>7} {t_pair:>12.4f} {t_block:>11.4f} {speedup:>7.1f}x{flag}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编译 mapping/anime_map.json 为 SQLite 索引 (mapping/anime_map.db)
+
+lookup_ext_ids 通过 mmap 读取该索引；索引缺失或旧于 JSON 时也会在首次查询时自动构建，
+这里用于部署时预先构建（Docker 入口在启动 worker 前执行）。
+
+用法:
+    python scripts/build_map_index.py [--src mapping/anime_map.json] [--dst mapping/anime_map.db]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.ext_linker import INDEX_PATH, MAP_PATH, build_map_index
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compile anime_map.json into the SQLite lookup index")
+    parser.add_argument("--src", default=MAP_PATH)
+    parser.add_argument("--dst", default=INDEX_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.src):
+        print(f"[map] missing {args.src}")
+        return 1
+    start = time.perf_counter()
+    count = build_map_index(args.src, args.dst)
+    size = os.path.getsize(args.dst) / 1024 / 1024
+    print(f"[map] index built: {count} entries, {size:.1f} MB, {time.perf_counter() - start:.2f}s -> {args.dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# 测试不触发映射文件的后台下载
+os.environ.setdefault("MAP_AUTO_UPDATE", "0")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
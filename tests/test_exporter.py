@@ -0,0 +1,156 @@
+"""流式导出：各格式的输出能被对应的读取方还原"""
+
+import csv
+import gzip
+import io
+import json
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from utils import exporter
+from utils.exporter import (
+    EXPORT_COLUMNS,
+    compress_stream,
+    flatten,
+    iter_csv,
+    iter_json_object,
+    iter_ndjson,
+    iter_xlsx,
+    pick_encoding,
+)
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+# 跨过多个 CHUNK_ROWS 块
+ROW_COUNT = exporter.CHUNK_ROWS * 2 + 7
+
+
+def _rows(count: int = ROW_COUNT) -> list:
+    rows = []
+    for i in range(count):
+        rows.append(
+            {
+                "name": f"アニメ {i}",
+                "name_cn": f"动画 <{i}> & \"引号\"" if i % 3 else None,
+                "name_en": None,
+                "ids": {"bgm_id": str(1000 + i), "mal_id": str(i) if i % 2 else None},
+                "scores": {"bgm": 7.5, "mal": None, "total": round(6 + i / count, 3)},
+                "time": {"year": 2024, "month": i % 12 + 1, "day": None},
+                "studio": "MAPPA, Inc.\n第二行" if i % 5 == 0 else None,
+                "poster": None,
+            }
+        )
+    return rows
+
+
+def _join(chunks) -> bytes:
+    return b"".join(chunks)
+
+
+def test_csv_has_bom_and_round_trips():
+    rows = _rows()
+    data = _join(iter_csv(rows))
+    assert data.startswith("﻿".encode("utf-8"))
+    parsed = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    assert parsed[0] == EXPORT_COLUMNS
+    assert len(parsed) == len(rows) + 1
+    for row, line in zip(rows, parsed[1:]):
+        flat = flatten(row)
+        assert line == ["" if flat[c] is None else str(flat[c]) for c in EXPORT_COLUMNS]
+
+
+def test_ndjson_round_trips():
+    rows = _rows()
+    lines = _join(iter_ndjson(rows)).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == rows
+
+
+def test_json_object_round_trips():
+    items = [(row["name"], row) for row in _rows()]
+    assert json.loads(_join(iter_json_object(items))) == dict(items)
+    assert json.loads(_join(iter_json_object([]))) == {}
+
+
+def _sheet_rows(data: bytes) -> list:
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert "[Content_Types].xml" in zf.namelist()
+        root = ET.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row in root.iterfind(".//s:row", SHEET_NS):
+        cells = {}
+        for cell in row.iterfind("s:c", SHEET_NS):
+            col = "".join(ch for ch in cell.get("r") if ch.isalpha())
+            if cell.get("t") == "inlineStr":
+                cells[col] = cell.find("s:is/s:t", SHEET_NS).text or ""
+            else:
+                cells[col] = float(cell.find("s:v", SHEET_NS).text)
+        rows.append(cells)
+    return rows
+
+
+def test_xlsx_is_valid_zip_with_all_rows():
+    rows = _rows()
+    sheet = _sheet_rows(_join(iter_xlsx(rows)))
+    cols = [exporter._xlsx_col(i) for i in range(len(EXPORT_COLUMNS))]
+    assert [sheet[0][col] for col in cols] == EXPORT_COLUMNS
+    assert len(sheet) == len(rows) + 1
+    for row, cells in zip(rows, sheet[1:]):
+        flat = flatten(row)
+        expected = {col: flat[c] for col, c in zip(cols, EXPORT_COLUMNS) if flat[c] is not None}
+        assert cells == expected
+
+
+def test_xlsx_strips_xml_illegal_characters():
+    row = _rows(1)[0]
+    row["name"] = "bad\x00\x07name\x1f￾ ok\ttab"
+    sheet = _sheet_rows(_join(iter_xlsx([row])))
+    assert sheet[1]["A"] == "badname ok\ttab"
+
+
+@pytest.mark.parametrize("index, name", [(0, "A"), (25, "Z"), (26, "AA"), (51, "AZ"), (52, "BA"), (702, "AAA")])
+def test_xlsx_column_names(index, name):
+    assert exporter._xlsx_col(index) == name
+
+
+def test_pick_encoding():
+    assert pick_encoding("gzip, deflate", "csv") == "gzip"
+    assert pick_encoding("gzip", "xlsx") is None
+    assert pick_encoding("", "ndjson") is None
+    assert pick_encoding("zstd, gzip", "csv") == ("zstd" if exporter.ZSTD_AVAILABLE else "gzip")
+
+
+def test_gzip_stream_round_trips():
+    raw = _join(iter_ndjson(_rows()))
+    assert gzip.decompress(_join(compress_stream(iter_ndjson(_rows()), "gzip"))) == raw
+    assert _join(compress_stream(iter_ndjson(_rows()), None)) == raw
+
+
+def _expected_table(rows: list) -> dict:
+    flat = [flatten(row) for row in rows]
+    return {c: [f[c] for f in flat] for c in EXPORT_COLUMNS}
+
+
+requires_pyarrow = pytest.mark.skipif(not exporter.PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+
+@requires_pyarrow
+def test_arrow_round_trips():
+    import pyarrow.ipc
+
+    rows = _rows()
+    table = pyarrow.ipc.open_stream(pyarrow.BufferReader(_join(exporter.iter_arrow(rows)))).read_all()
+    assert table.column_names == EXPORT_COLUMNS
+    assert table.to_pydict() == _expected_table(rows)
+
+
+@requires_pyarrow
+def test_parquet_round_trips(monkeypatch):
+    import pyarrow.parquet
+
+    monkeypatch.setattr(exporter, "PARQUET_ROW_GROUP", 100)
+    rows = _rows()
+    parquet = pyarrow.parquet.ParquetFile(pyarrow.BufferReader(_join(exporter.iter_parquet(rows))))
+    assert parquet.metadata.num_row_groups == -(-len(rows) // 100)
+    assert parquet.read().to_pydict() == _expected_table(rows)
@@ -0,0 +1,110 @@
+"""映射索引的增量更新：计数、文件顺序与回退全量重建"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from utils.ext_linker import POS_GAP, apply_map_update, build_map_index
+
+
+def _entry(bgm_id: int, **extra) -> dict:
+    entry = {"name": f"anime {bgm_id}", "bgm_id": str(bgm_id), "mal_id": str(bgm_id + 50000)}
+    entry.update(extra)
+    return entry
+
+
+def _rows(path: str) -> list:
+    conn = sqlite3.connect(path)
+    try:
+        return [json.loads(row[0]) for row in conn.execute("SELECT data FROM entries ORDER BY pos")]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def base():
+    return [_entry(i) for i in range(1, 21)]
+
+
+@pytest.fixture
+def db(tmp_path, base):
+    path = str(tmp_path / "anime_map.db")
+    build_map_index(dst=path, entries=base)
+    return path
+
+
+def _counts(stats: dict) -> tuple:
+    return stats["added"], stats["changed"], stats["removed"], stats["moved"], stats["rebuilt"]
+
+
+def test_add_change_remove_counts(db, base):
+    new = [e for e in base if e["bgm_id"] not in ("3", "17")]
+    new[4] = dict(new[4], name_cn="变更")
+    new.insert(0, _entry(100))
+    new.insert(10, _entry(101))
+    new.append(_entry(102))
+
+    stats = apply_map_update(new, dst=db)
+    assert _counts(stats) == (3, 1, 2, 0, 0)
+    assert stats["entries"] == len(new)
+    assert _rows(db) == new
+
+
+def test_reorder_moves_only_displaced_rows(db, base):
+    new = list(base)
+    new[2], new[15] = new[15], new[2]
+    stats = apply_map_update(new, dst=db)
+    assert _counts(stats) == (0, 0, 0, 2, 0)
+    assert _rows(db) == new
+
+    block = new[5:9]
+    new = new[:5] + new[9:]
+    new[12:12] = block
+    stats = apply_map_update(new, dst=db)
+    assert _counts(stats) == (0, 0, 0, 4, 0)
+    assert _rows(db) == new
+
+
+def test_unchanged_snapshot_touches_index(db, base):
+    os.utime(db, (1, 1))
+    stats = apply_map_update(base, dst=db)
+    assert _counts(stats) == (0, 0, 0, 0, 0)
+    assert os.path.getmtime(db) > 1
+    assert _rows(db) == base
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda entries: entries + [dict(entries[0], name="dup")],
+        lambda entries: entries + [{"name": "no bgm id"}],
+    ],
+    ids=["duplicate-bgm-id", "missing-bgm-id"],
+)
+def test_ambiguous_snapshot_rebuilds(db, base, mutate):
+    new = mutate(list(base))
+    stats = apply_map_update(new, dst=db)
+    assert stats["rebuilt"] == 1
+    assert stats["added"] == len(new)
+    assert _rows(db) == new
+
+
+def test_missing_index_rebuilds(tmp_path, base):
+    path = str(tmp_path / "missing.db")
+    stats = apply_map_update(base, dst=path)
+    assert stats["rebuilt"] == 1
+    assert _rows(path) == base
+
+
+def test_exhausted_gap_rebuilds(db, base):
+    # 同一位置反复插入，直到两个相邻条目之间没有空位
+    new = list(base)
+    for i in range(POS_GAP.bit_length() + 2):
+        new.insert(1, _entry(1000 + i))
+        stats = apply_map_update(new, dst=db)
+        assert _rows(db) == new
+        if stats["rebuilt"]:
+            break
+    assert stats["rebuilt"] == 1
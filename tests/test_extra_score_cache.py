@@ -0,0 +1,126 @@
+"""站外评分缓存：fresh / stale / 过期三种状态，stale 时先返回旧值再后台刷新"""
+
+import asyncio
+
+import pytest
+
+from apis import precise
+from apis.precise import ExtraScoreCache
+
+TTL, NEGATIVE_TTL, STALE_TTL = 100.0, 10.0, 50.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(precise.time, "time", lambda: now[0])
+    return now
+
+
+def _cache(db_path: str = "") -> ExtraScoreCache:
+    return ExtraScoreCache(TTL, NEGATIVE_TTL, STALE_TTL, maxsize=16, db_path=db_path)
+
+
+@pytest.mark.parametrize(
+    "value, ttl",
+    [({"fm_score": 4.1}, TTL), ({}, NEGATIVE_TTL)],
+    ids=["found", "not-found"],
+)
+def test_states_follow_ttl_and_stale_window(clock, value, ttl):
+    cache = _cache()
+    cache.put("k", value)
+    start = clock[0]
+
+    clock[0] = start + ttl - 1
+    assert cache.get("k")[2] == ExtraScoreCache.FRESH
+    clock[0] = start + ttl + 1
+    got, _, state, age = cache.get("k")
+    assert (got, state, age) == (value, ExtraScoreCache.STALE, ttl + 1)
+    clock[0] = start + ttl + STALE_TTL + 1
+    assert cache.get("k") is None
+    assert cache.get("other") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_returned_values_are_copies(clock):
+    cache = _cache()
+    cache.put("k", {"fm_score": 4.1}, {"filmarks": {"hit": True}})
+    value, debug, _, _ = cache.get("k")
+    value["fm_score"] = 0
+    debug["filmarks"]["hit"] = False
+    assert cache.get("k")[:2] == ({"fm_score": 4.1}, {"filmarks": {"hit": True}})
+
+
+def test_shared_db_serves_other_workers(clock, tmp_path):
+    path = str(tmp_path / "extra_scores.db")
+    first, second = _cache(path), _cache(path)
+    first.put("k", {"fm_score": 3.9})
+    assert second.get("k")[:3] == ({"fm_score": 3.9}, None, ExtraScoreCache.FRESH)
+
+    # 另一个 worker 刷新后，本进程过期的内存条目换成数据库里更新的结果
+    clock[0] += TTL + 1
+    assert second.get("k")[2] == ExtraScoreCache.STALE
+    first.put("k", {"fm_score": 4.2})
+    assert second.get("k")[::2] == ({"fm_score": 4.2}, ExtraScoreCache.FRESH)
+
+
+def test_begin_refresh_once_per_key():
+    cache = _cache()
+    assert cache.begin_refresh("k")
+    assert not cache.begin_refresh("k")
+    assert cache.begin_refresh("other")
+    cache.end_refresh("k")
+    assert cache.begin_refresh("k")
+    assert cache.stats()["refreshes"] == 3
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """替换真实抓取：记录调用次数，返回 fm_score=调用序号"""
+    cache = _cache()
+    monkeypatch.setattr(precise, "_EXTRA_SCORE_CACHE", cache)
+    calls = []
+
+    async def fake_fetch(name, name_cn, name_jp):
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        return {"fm_score": float(len(calls))}, {"filmarks": {"hit": True}}
+
+    monkeypatch.setattr(precise, "_afetch_extra_scores", fake_fetch)
+    return cache, calls
+
+
+def test_miss_fetches_once_for_concurrent_callers(upstream):
+    cache, calls = upstream
+
+    async def _run():
+        return await asyncio.gather(*(precise._aget_extra_scores("A", "", "") for _ in range(5)))
+
+    results = asyncio.run(_run())
+    assert calls == ["A"]
+    assert all(value == {"fm_score": 1.0} for value, _ in results)
+    assert cache.get(ExtraScoreCache.make_key("A", "", ""))[0] == {"fm_score": 1.0}
+
+
+def test_stale_hit_returns_old_value_and_refreshes_in_background(upstream, clock):
+    cache, calls = upstream
+    key = ExtraScoreCache.make_key("A", "", "")
+    cache.put(key, {"fm_score": 0.5})
+    clock[0] += TTL + 1
+
+    async def _run():
+        stale = await asyncio.gather(*(precise._aget_extra_scores("A", "", "") for _ in range(3)))
+        await asyncio.gather(*list(precise._BACKGROUND_TASKS))
+        fresh = await precise._aget_extra_scores("A", "", "")
+        return stale, fresh
+
+    stale, fresh = asyncio.run(_run())
+    for value, debug in stale:
+        assert value == {"fm_score": 0.5}
+        assert debug["cache"]["state"] == ExtraScoreCache.STALE
+    assert calls == ["A"]
+    assert fresh[0] == {"fm_score": 1.0}
+    assert fresh[1]["cache"]["state"] == ExtraScoreCache.FRESH
+    assert cache.stats()["refreshing"] == 0
@@ -0,0 +1,133 @@
+"""批量搜索：相同查询合并、批次内子查询备忘，上游出错的结果不入备忘"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from apis import precise
+from apis.precise import BangumiSearcher, SearchResultCache, search_anime_precise_batch
+from utils.http_pool import RETRY_ON_429, HttpClientRegistry
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    precise._SEARCH_CACHE.clear()
+    yield
+    precise._SEARCH_CACHE.clear()
+
+
+def _bangumi_upstream(statuses: list):
+    """按 statuses 依次返回状态码(用完后一直 200)，记录收到的关键词"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        keyword = json.loads(request.content)["keyword"]
+        calls.append(keyword)
+        status = statuses.pop(0) if statuses else 200
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"}, json={"error": "upstream"})
+        if keyword.startswith("empty"):
+            return httpx.Response(200, json={"data": []})
+        return httpx.Response(200, json={"data": [{"id": 1, "name": keyword, "name_cn": keyword}]})
+
+    return calls, httpx.MockTransport(handler)
+
+
+async def _in_batch(memo: dict, coro_fn):
+    # 与 search_anime_precise_batch 相同：每个任务在自己的上下文里设置备忘
+    async def _task():
+        precise._BATCH_MEMO.set(memo)
+        return await coro_fn()
+
+    return await asyncio.create_task(_task())
+
+
+def _search_twice(keywords: list, statuses: list, memo: dict):
+    calls, transport = _bangumi_upstream(statuses)
+    searcher = BangumiSearcher(HttpClientRegistry(profiles={}))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [await searcher.asearch(client, keyword) for keyword in keywords]
+
+    return calls, asyncio.run(_in_batch(memo, _run))
+
+
+def test_batch_memo_dedups_normalized_subqueries(monkeypatch):
+    monkeypatch.setattr(precise._SEARCH_CACHE, "enabled", False)
+    memo = {}
+    calls, results = _search_twice(["Frieren", "  FRIEREN ", "empty one", "Empty  One"], [], memo)
+    assert calls == ["Frieren", "empty one"]
+    assert [r.name for r in results[0]] == [r.name for r in results[1]] == ["Frieren"]
+    # 上游确实没有结果：空列表也记入备忘
+    assert results[2] == results[3] == []
+    assert SearchResultCache.make_key("Bangumi", "empty one", {}) in memo
+    # 备忘返回拷贝，调用方修改不影响后续命中
+    results[0][0].name = "changed"
+    assert memo[SearchResultCache.make_key("Bangumi", "frieren", {})][0].name == "Frieren"
+    assert precise.get_search_cache_stats()["sources"]["Bangumi"]["batch_hits"] == 2
+
+
+@pytest.mark.parametrize(
+    "statuses, failed_calls",
+    # 429 先按 Retry-After 重试，重试也失败才算出错
+    [([500], 1), ([503], 1), ([429] * (RETRY_ON_429 + 1), RETRY_ON_429 + 1)],
+    ids=["500", "503", "429"],
+)
+def test_failed_upstream_is_not_memoized(statuses, failed_calls):
+    memo = {}
+    calls, results = _search_twice(["Frieren", "Frieren"], list(statuses), memo)
+    assert calls == ["Frieren"] * (failed_calls + 1)
+    assert results[0] == []
+    assert [r.name for r in results[1]] == ["Frieren"]
+    assert list(memo) == [SearchResultCache.make_key("Bangumi", "Frieren", {})]
+
+
+def test_failed_upstream_is_not_cached_outside_batch():
+    calls, transport = _bangumi_upstream([500])
+    searcher = BangumiSearcher(HttpClientRegistry(profiles={}))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [await searcher.asearch(client, "Frieren") for _ in range(3)]
+
+    results = asyncio.run(_run())
+    assert calls == ["Frieren", "Frieren"]
+    assert results[0] == []
+    assert [r.name for r in results[2]] == ["Frieren"]
+
+
+def test_batch_runs_each_distinct_query_once(monkeypatch):
+    seen = []
+    memos = set()
+
+    async def fake_search(keyword, meta=None, **kwargs):
+        seen.append((keyword, kwargs.get("year")))
+        memos.add(id(precise._BATCH_MEMO.get()))
+        await asyncio.sleep(0)
+        if keyword == "boom":
+            raise RuntimeError("upstream down")
+        return [{"name": keyword}]
+
+    monkeypatch.setattr(precise, "search_anime_precise_async", fake_search)
+    queries = [
+        {"keyword": "Frieren"},
+        {"keyword": " frieren"},
+        {"keyword": "Frieren", "year": 2023},
+        {"keyword": "boom"},
+        {"keyword": "FRIEREN"},
+    ]
+
+    async def _collect():
+        return [item async for item in search_anime_precise_batch(queries, concurrency=2)]
+
+    done = asyncio.run(_collect())
+    assert len(seen) == 3
+    assert len(memos) == 1 and None not in memos
+    assert precise._BATCH_MEMO.get() is None
+    by_indices = {tuple(indices): (output, error) for indices, output, _, error in done}
+    assert set(by_indices) == {(0, 1, 4), (2,), (3,)}
+    assert by_indices[(0, 1, 4)] == ([{"name": "Frieren"}], None)
+    assert isinstance(by_indices[(3,)][1], RuntimeError)
@@ -0,0 +1,75 @@
+"""CrossValidator 分组：分块引擎与两两比较的结果必须一致"""
+
+import random
+
+import pytest
+
+from apis import precise
+from apis.precise import AnimeInfo, CrossValidator
+from utils.ext_linker import load_map_entries
+
+SUFFIXES = ["", " 2nd Season", " Season 2", " Part 2", " (TV)", " Movie"]
+
+
+def _make_results(size: int, seed: int) -> list:
+    """用映射表合成多源结果：同一作品在各源的不同标题、季度后缀、缺失年份"""
+    rnd = random.Random(seed)
+    entries = [e for e in load_map_entries() if e.get("name")]
+    base = rnd.sample(entries, max(1, size // 3))
+    results = []
+    while len(results) < size:
+        e = rnd.choice(base)
+        info = AnimeInfo()
+        kind = rnd.randint(0, 3)
+        if kind == 0:
+            info.bgm_id = e.get("bgm_id")
+            info.name = e.get("name", "")
+            info.name_cn = e.get("name_cn", "")
+        elif kind == 1:
+            info.mal_id = e.get("mal_id")
+            info.name = e.get("name", "") + rnd.choice(SUFFIXES)
+            info.name_jp = e.get("name", "")
+        elif kind == 2:
+            info.name_jp = e.get("name", "")
+            info.name_cn = e.get("name_cn", "")
+        else:
+            info.name = e.get("name_cn") or e.get("name", "")
+        date = str(e.get("date") or "")
+        info.year = int(date[:4]) if date[:4].isdigit() and rnd.random() < 0.9 else None
+        results.append(info)
+    return results
+
+
+def _ids(groups):
+    return [[id(x) for x in g] for g in groups]
+
+
+@pytest.mark.parametrize("mode", ["normal", "recall", "strict"])
+@pytest.mark.parametrize("size,seed", [(30, 1), (120, 2), (250, 3)])
+def test_blocked_matches_pairwise(mode, size, seed):
+    validator = CrossValidator(match_mode=mode)
+    results = _make_results(size, seed)
+    assert _ids(validator._group_blocked(results)) == _ids(validator._group_pairwise(results))
+
+
+def test_same_anime_across_sources_is_grouped():
+    results = [
+        AnimeInfo(bgm_id="400602", name="葬送のフリーレン", name_cn="葬送的芙莉莲", year=2023),
+        AnimeInfo(mal_id="52991", name="Sousou no Frieren", name_jp="葬送のフリーレン", year=2023),
+        AnimeInfo(anilist_id="154587", name="Sousou no Frieren", name_cn="Frieren: Beyond Journey's End", year=2023),
+        AnimeInfo(bgm_id="1", name="進撃の巨人", name_cn="进击的巨人", year=2013),
+    ]
+    groups = CrossValidator()._group_results(results)
+    assert _ids(groups) == [[id(r) for r in results[:3]], [id(results[3])]]
+
+
+def test_small_inputs_use_pairwise(monkeypatch):
+    validator = CrossValidator()
+    results = _make_results(20, 4)
+    called = []
+    monkeypatch.setattr(validator, "_group_blocked", lambda r: called.append(len(r)) or [])
+    validator._group_results(results)
+    assert called == []
+    monkeypatch.setattr(precise, "_CLUSTER_BLOCK_MIN_RESULTS", 10)
+    validator._group_results(results)
+    assert called == [20]
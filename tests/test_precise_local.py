@@ -0,0 +1,86 @@
+"""本地标题索引搜索(最低相似度)与 Jikan 按 ID 查询的缓存命名空间"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from apis import precise
+from apis.precise import JikanSearcher, LocalSearcher, LocalTitleIndex
+from utils.http_pool import HttpClientRegistry
+
+ENTRIES = [
+    {"name": "葬送のフリーレン", "name_cn": "葬送的芙莉莲", "date": "2023-09-29", "bgm_id": "400602", "mal_id": "52991"},
+    {"name": "葬送のフリーレン 第2期", "name_cn": "葬送的芙莉莲 第二季", "date": "2026-01-16", "bgm_id": "500001"},
+    {"name": "ぼっち・ざ・ろっく！", "name_cn": "孤独摇滚！", "date": "2022-10-08", "bgm_id": "328609", "mal_id": "47917"},
+    {"name": "フリーレンの日常", "name_cn": "", "date": "2024-04-01", "bgm_id": "500002"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return LocalTitleIndex(ENTRIES)
+
+
+def _search(index, keyword, **filters):
+    return LocalSearcher().search(keyword, index=index, **filters)
+
+
+@pytest.mark.parametrize("keyword", ["葬送的芙莉莲", "葬送のフリーレン", " 葬送の フリーレン "])
+def test_exact_title_ranks_first(index, keyword):
+    results = _search(index, keyword)
+    assert results[0].bgm_id == "400602"
+    assert results[0].mal_id == "52991"
+    assert results[0].confidence == 1.0
+    assert (results[0].year, results[0].month) == (2023, 9)
+
+
+def test_results_respect_min_score(index):
+    results = _search(index, "葬送のフリーレン")
+    assert results
+    assert all(r.confidence >= precise._LOCAL_MIN_SCORE for r in results)
+    assert "500002" not in {r.bgm_id for r in results}
+
+
+def test_year_filter_allows_one_year_drift(index):
+    assert {r.bgm_id for r in _search(index, "葬送的芙莉莲", year=2024)} == {"400602"}
+    assert {r.bgm_id for r in _search(index, "葬送的芙莉莲 第二季", year=2026)} == {"500001"}
+
+
+def test_romaji_is_not_covered(index):
+    # 映射表不收录罗马音，低于阈值的近似结果不返回
+    assert _search(index, "Sousou no Frieren") == []
+
+
+def test_min_score_is_configurable(index, monkeypatch):
+    monkeypatch.setattr(precise, "_LOCAL_MIN_SCORE", 0.0)
+    assert "500002" in {r.bgm_id for r in _search(index, "葬送のフリーレン", limit=10)}
+
+
+def test_jikan_id_lookup_has_own_cache_namespace(monkeypatch):
+    monkeypatch.setattr(precise, "_SEARCH_CACHE", precise.SearchResultCache(600, 1 << 20))
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path == "/v4/anime/52991":
+            item = {"mal_id": 52991, "type": "TV", "titles": [{"type": "Default", "title": "Sousou no Frieren"}]}
+            return httpx.Response(200, json={"data": item})
+        item = {"mal_id": 1, "type": "TV", "titles": [{"type": "Default", "title": "52991"}]}
+        return httpx.Response(200, json={"data": [item]})
+
+    searcher = JikanSearcher(HttpClientRegistry(profiles={}))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            by_keyword = await searcher.asearch(client, "52991")
+            by_id = await searcher._aget_by_id(client, "52991")
+            again = await searcher._aget_by_id(client, "52991")
+            return by_keyword, by_id, again
+
+    by_keyword, by_id, again = asyncio.run(_run())
+    assert [r.mal_id for r in by_keyword] == ["1"]
+    assert by_id.mal_id == again.mal_id == "52991"
+    assert by_id.confidence == 1.0
+    assert paths.count("/v4/anime/52991") == 1
+    assert by_id is not again
@@ -0,0 +1,46 @@
+"""搜索器基类：子类必须实现 _afetch，上游出错时 asearch 返回空列表且不缓存"""
+
+import asyncio
+
+import pytest
+
+from apis import precise
+from apis.precise import AniListSearcher, AnimeInfo, BangumiSearcher, BaseSearcher, JikanSearcher, LocalSearcher
+
+
+def test_base_searcher_is_abstract():
+    with pytest.raises(TypeError):
+        BaseSearcher("base")
+
+    class NoFetch(BaseSearcher):
+        pass
+
+    with pytest.raises(TypeError):
+        NoFetch("no-fetch")
+
+
+@pytest.mark.parametrize("cls", [BangumiSearcher, AniListSearcher, JikanSearcher, LocalSearcher])
+def test_concrete_searchers_instantiate(cls):
+    assert isinstance(cls(), BaseSearcher)
+
+
+def test_asearch_caches_only_successful_fetches(monkeypatch):
+    monkeypatch.setattr(precise, "_SEARCH_CACHE", precise.SearchResultCache(600, 1 << 20))
+    replies = [None, [AnimeInfo(name="Frieren")]]
+    calls = []
+
+    class Scripted(BaseSearcher):
+        async def _afetch(self, client, keyword, **filters):
+            calls.append(keyword)
+            return replies.pop(0)
+
+    searcher = Scripted("scripted")
+
+    async def _run():
+        return [await searcher.asearch(None, "Frieren") for _ in range(3)]
+
+    failed, fetched, cached = asyncio.run(_run())
+    assert failed == []
+    assert [r.name for r in fetched] == [r.name for r in cached] == ["Frieren"]
+    assert calls == ["Frieren", "Frieren"]
+    assert cached[0] is not fetched[0]
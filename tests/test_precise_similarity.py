@@ -0,0 +1,72 @@
+"""标题相似度：与原始公式逐项一致，上界不低于实际得分"""
+
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from apis import precise
+from apis.precise import (
+    AnimeInfo,
+    BangumiSearcher,
+    _ngram_jaccard,
+    _normalize_title,
+    _similarity_score,
+    _similarity_upper_bound,
+    _title_features,
+    _token_overlap_score,
+)
+from utils.ext_linker import load_map_entries
+
+WEIGHTS = {"strict": (0.6, 0.3, 0.1), "recall": (0.55, 0.45), "normal": (0.65, 0.35)}
+
+
+def _reference_score(a: str, b: str, mode: str) -> float:
+    """未做特征缓存前的打分公式"""
+    na, nb = _normalize_title(a), _normalize_title(b)
+    if not na or not nb:
+        return 0.0
+    scores = [
+        SequenceMatcher(None, na, nb).ratio(),
+        _ngram_jaccard(na, nb, n=2),
+        _token_overlap_score(a, b),
+        precise.rapidfuzz_fuzz.token_set_ratio(na, nb) / 100.0 if precise.rapidfuzz_fuzz else 0.0,
+    ]
+    scores.sort(reverse=True)
+    return sum(w * s for w, s in zip(WEIGHTS[mode], scores))
+
+
+@pytest.fixture(scope="module")
+def title_pairs():
+    rnd = random.Random(7)
+    titles = [t for e in load_map_entries() for t in (e.get("name"), e.get("name_cn")) if t]
+    if len(titles) < 100:
+        pytest.skip("mapping/anime_map.json not available")
+    sample = rnd.sample(titles, 300)
+    pairs = [(sample[i], sample[i + 1]) for i in range(0, len(sample), 2)]
+    # 同一作品的变体：季度 / 括号 / 空格 / 大小写
+    pairs += [(t, t + " 第2期") for t in sample[:50]]
+    pairs += [(t, f"{t.upper()} (TV)") for t in sample[50:100]]
+    pairs += [("", "x"), ("   ", "x"), ("!!!", "???")]
+    return pairs
+
+
+@pytest.mark.parametrize("mode", sorted(WEIGHTS))
+def test_scores_match_reference_formula(title_pairs, mode):
+    for a, b in title_pairs:
+        assert _similarity_score(a, b, mode) == pytest.approx(_reference_score(a, b, mode), abs=1e-12), (a, b)
+
+
+@pytest.mark.parametrize("mode", sorted(WEIGHTS))
+def test_upper_bound_never_below_score(title_pairs, mode):
+    for a, b in title_pairs:
+        bound = _similarity_upper_bound(_title_features(a), _title_features(b), mode)
+        assert bound + precise._UPPER_BOUND_SLACK >= _similarity_score(a, b, mode), (a, b)
+
+
+def test_confidence_is_best_title_score():
+    searcher = BangumiSearcher()
+    info = AnimeInfo(name="Sousou no Frieren", name_cn="葬送的芙莉莲")
+    searcher._assign_confidences("葬送的芙莉莲 第二季", [info])
+    expected = max(_similarity_score("葬送的芙莉莲 第二季", t) for t in (info.name, info.name_cn))
+    assert info.confidence == pytest.approx(expected)
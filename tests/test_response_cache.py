@@ -0,0 +1,69 @@
+"""列表接口的响应缓存：各编码的 ETag 与 304 协商"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from web_api.api_v1.response_cache import _etag_for, _etag_matches
+from web_api.main import app
+
+ETAG = '"0123456789abcdef"'
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_etag_for_adds_encoding_suffix():
+    assert _etag_for(ETAG, None) == ETAG
+    assert _etag_for(ETAG, "gzip") == '"0123456789abcdef-gz"'
+    assert _etag_for(ETAG, "br") == '"0123456789abcdef-br"'
+    assert _etag_for(ETAG, "zstd") == ETAG
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        ETAG,
+        '"0123456789abcdef-gz"',
+        '"0123456789abcdef-br"',
+        'W/"0123456789abcdef-gz"',
+        '"other", "0123456789abcdef-br"',
+        "*",
+    ],
+)
+def test_etag_matches_any_encoding(header):
+    assert _etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", ['"other"', '"0123456789abcdef-zz"', '"0123456789abcde-gz"', ""])
+def test_etag_mismatch(header):
+    assert not _etag_matches(header, ETAG)
+
+
+def test_encoded_responses_have_distinct_etags(client):
+    plain = client.get("/api/v1/anime/airing", headers={"Accept-Encoding": "identity"})
+    gz = client.get("/api/v1/anime/airing", headers={"Accept-Encoding": "gzip"})
+    assert plain.status_code == gz.status_code == 200
+    assert gz.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert gz.headers["etag"] == _etag_for(plain.headers["etag"], "gzip")
+    assert gz.json() == plain.json()
+
+
+def test_revalidation_across_encodings_returns_304(client):
+    plain = client.get("/api/v1/anime/airing", headers={"Accept-Encoding": "identity"})
+    gz_etag = _etag_for(plain.headers["etag"], "gzip")
+
+    resp = client.get("/api/v1/anime/airing", headers={"Accept-Encoding": "identity", "If-None-Match": gz_etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == plain.headers["etag"]
+
+    resp = client.get(
+        "/api/v1/anime/airing", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]}
+    )
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == gz_etag
+
+    resp = client.get("/api/v1/anime/airing", headers={"Accept-Encoding": "gzip", "If-None-Match": '"stale"'})
+    assert resp.status_code == 200
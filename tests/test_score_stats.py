@@ -0,0 +1,81 @@
+"""刷新时的 infobox 解析、staff 缓存与统计计算"""
+
+import json
+
+import pytest
+
+from apis import bangumi
+from utils import score
+from utils.score import get_staff, parse_infobox
+from utils.stats import compute_stats
+
+
+def test_parse_infobox_fields():
+    infobox = [
+        {"key": "中文名", "value": "葬送的芙莉莲"},
+        {"key": "动画制作", "value": "MADHOUSE"},
+        {"key": "监督", "value": " 斋藤圭一郎 "},
+        {"key": "导演", "value": "另一个人"},
+        {"key": "原作", "value": [{"v": "山田钟人"}, {"v": "阿部司"}]},
+    ]
+    assert parse_infobox(infobox) == {"studio": "MADHOUSE", "director": "斋藤圭一郎", "source": "山田钟人、阿部司"}
+
+
+@pytest.mark.parametrize(
+    "infobox, expected",
+    [
+        (None, {}),
+        ([], {}),
+        (["not a dict", {"key": "动画制作"}], {}),
+        ([{"key": "动画制作", "value": ""}, {"key": "动画制作", "value": "WIT STUDIO"}], {"studio": "WIT STUDIO"}),
+        ([{"key": "导演", "value": [{"v": None}, "A-1"]}], {"director": "A-1"}),
+        ([{"key": "原作", "value": [{"v": None}]}], {}),
+    ],
+)
+def test_parse_infobox_tolerates_bad_values(infobox, expected):
+    assert parse_infobox(infobox) == expected
+
+
+def test_get_staff_fetches_only_new_ids(tmp_path, monkeypatch):
+    path = tmp_path / "staff.json"
+    path.write_text(json.dumps({"1": {"studio": "cached"}}), encoding="utf-8")
+    monkeypatch.setattr(score, "staff_path", str(path))
+
+    fetched = []
+
+    class FakeBangumi:
+        def get_anime_info(self, bgm_id):
+            fetched.append(bgm_id)
+            if bgm_id == "3":
+                raise RuntimeError("boom")
+            return {"infobox": [{"key": "动画制作", "value": f"studio {bgm_id}"}]}
+
+    monkeypatch.setattr(bangumi, "Bangumi", FakeBangumi)
+
+    staff = get_staff([1, 2, 3])
+    assert fetched == ["2", "3"]
+    assert staff["1"] == {"studio": "cached"}
+    assert staff["2"] == {"studio": "studio 2"}
+    assert "3" not in staff
+    assert json.loads(path.read_text(encoding="utf-8")) == staff
+
+
+def test_compute_stats_skips_missing_scores():
+    airing = {
+        "total": 4,
+        "a": {"score": 7.6, "studio": "X", "time": {"year": 2024}},
+        "b": {"score": "None", "studio": "X", "time": {"year": 2024}},
+        "c": {"score": 6.2, "studio": "Y", "time": {"year": 2023}},
+        "d": {"score": 6.9},
+    }
+    stats = compute_stats(airing, {"total": 1, "e": {"score": 8}}, last_updated="2026-01-01T00:00:00")
+
+    assert stats["total_anime"] == 5
+    assert stats["airing_count"] == 4
+    assert stats["score_distribution"] == {"7-8": 1, "6-7": 2}
+    assert stats["score_buckets"] == {"6.0": 1, "7.0": 1, "7.5": 1}
+    assert stats["year_distribution"] == {"2024": 2, "2023": 1}
+    assert stats["studio_ranking"] == [
+        {"studio": "X", "count": 2, "avg_score": 7.6},
+        {"studio": "Y", "count": 1, "avg_score": 6.2},
+    ]
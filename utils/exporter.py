@@ -0,0 +1,359 @@
+"""
+流式导出：CSV(UTF-8) / NDJSON / JSON / Parquet / Arrow / XLSX，可选 gzip / zstd 压缩
+
+输入为 API 层的动漫记录(AnimeInfo 的 JSON 字典)，按块产出 bytes，不写临时文件。
+"""
+
+import csv
+import io
+import json
+import re
+import zipfile
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except Exception:
+    ZSTD_AVAILABLE = False
+
+# 表格类格式(CSV / Parquet / XLSX)的列
+EXPORT_COLUMNS = [
+    "name",
+    "name_cn",
+    "name_en",
+    "bgm_id",
+    "mal_id",
+    "anilist_id",
+    "anikore_id",
+    "filmarks_id",
+    "bgm_score",
+    "mal_score",
+    "anilist_score",
+    "anikore_score",
+    "filmarks_score",
+    "score",
+    "year",
+    "month",
+    "day",
+    "studio",
+    "director",
+    "source",
+    "poster",
+]
+NUMERIC_COLUMNS = {"bgm_score", "mal_score", "anilist_score", "anikore_score", "filmarks_score", "score"}
+INT_COLUMNS = {"year", "month", "day"}
+
+CHUNK_ROWS = 256
+# Parquet 每个行组的行数(行组写完即可输出)
+PARQUET_ROW_GROUP = 8192
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# 自身已压缩的格式不再做传输压缩
+COMPRESSED_FORMATS = {"parquet", "xlsx"}
+
+
+def flatten(row: dict) -> dict:
+    ids = row.get("ids") or {}
+    scores = row.get("scores") or {}
+    t = row.get("time") or {}
+    return {
+        "name": row.get("name"),
+        "name_cn": row.get("name_cn"),
+        "name_en": row.get("name_en"),
+        "bgm_id": ids.get("bgm_id"),
+        "mal_id": ids.get("mal_id"),
+        "anilist_id": ids.get("anilist_id"),
+        "anikore_id": ids.get("anikore_id"),
+        "filmarks_id": ids.get("filmarks_id"),
+        "bgm_score": scores.get("bgm"),
+        "mal_score": scores.get("mal"),
+        "anilist_score": scores.get("anilist"),
+        "anikore_score": scores.get("anikore"),
+        "filmarks_score": scores.get("filmarks"),
+        "score": scores.get("total"),
+        "year": t.get("year"),
+        "month": t.get("month"),
+        "day": t.get("day"),
+        "studio": row.get("studio"),
+        "director": row.get("director"),
+        "source": row.get("source"),
+        "poster": row.get("poster"),
+    }
+
+
+def _chunks(rows: Iterable[dict], size: int = CHUNK_ROWS) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(rows: Iterable[dict]) -> Iterator[bytes]:
+    # 带 BOM，Excel 可直接识别 UTF-8
+    buf = io.StringIO()
+    writer = csv.writer(buf, dialect="excel")
+    buf.write("﻿")
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(rows):
+        for row in chunk:
+            flat = flatten(row)
+            writer.writerow(["" if flat[c] is None else flat[c] for c in EXPORT_COLUMNS])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    for chunk in _chunks(rows):
+        yield "".join(
+            json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in chunk
+        ).encode("utf-8")
+
+
+def iter_json_object(items: Iterable[tuple]) -> Iterator[bytes]:
+    """(key, value) 流式写成紧凑的 JSON 对象(与分数文件结构相同)"""
+    yield b"{"
+    first = True
+    for chunk in _chunks(items):
+        parts = []
+        for key, value in chunk:
+            prefix = "" if first else ","
+            first = False
+            parts.append(
+                prefix
+                + json.dumps(str(key), ensure_ascii=False)
+                + ":"
+                + json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+            )
+        yield "".join(parts).encode("utf-8")
+    yield b"}"
+
+
+class _ChunkSink(io.RawIOBase):
+    """只追加的写入目标：写入的字节暂存，由生成器按块取走(不支持 seek，zipfile 会改用数据描述符)"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_schema():
+    fields = []
+    for c in EXPORT_COLUMNS:
+        if c in NUMERIC_COLUMNS:
+            fields.append(pyarrow.field(c, pyarrow.float64()))
+        elif c in INT_COLUMNS:
+            fields.append(pyarrow.field(c, pyarrow.int32()))
+        else:
+            fields.append(pyarrow.field(c, pyarrow.string()))
+    return pyarrow.schema(fields)
+
+
+def _arrow_batch(chunk: List[dict], schema):
+    return pyarrow.RecordBatch.from_pylist([flatten(row) for row in chunk], schema=schema)
+
+
+def iter_parquet(rows: Iterable[dict]) -> Iterator[bytes]:
+    # 每个行组写完即输出，内存只保留一个行组；文件尾(元数据)最后写出
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for chunk in _chunks(rows, PARQUET_ROW_GROUP):
+            writer.write_table(pyarrow.Table.from_batches([_arrow_batch(chunk, schema)]))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def iter_arrow(rows: Iterable[dict]) -> Iterator[bytes]:
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for chunk in _chunks(rows):
+            writer.write_batch(_arrow_batch(chunk, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _xlsx_col(index: int) -> str:
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+# XML 1.0 不允许的字符(制表、换行、回车以外的控制字符、代理项、U+FFFE/U+FFFF)
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def _xlsx_cell(ref: str, value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>'
+
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="anime" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def iter_xlsx(rows: Iterable[dict]) -> Iterator[bytes]:
+    """
+    最小 XLSX(单工作表、内联字符串)，不依赖 openpyxl；
+    压缩后的数据每写完一块行即输出，不在内存中保留整个文件
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC.items():
+            zf.writestr(name, content)
+        yield sink.drain()
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            cols = [_xlsx_col(i) for i in range(len(EXPORT_COLUMNS))]
+            header = "".join(_xlsx_cell(f"{col}1", c) for col, c in zip(cols, EXPORT_COLUMNS))
+            sheet.write(f'<row r="1">{header}</row>'.encode("utf-8"))
+            line = 1
+            for chunk in _chunks(rows):
+                parts = []
+                for row in chunk:
+                    line += 1
+                    flat = flatten(row)
+                    cells = "".join(_xlsx_cell(f"{col}{line}", flat[c]) for col, c in zip(cols, EXPORT_COLUMNS))
+                    parts.append(f'<row r="{line}">{cells}</row>')
+                sheet.write("".join(parts).encode("utf-8"))
+                data = sink.drain()
+                if data:
+                    yield data
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+WRITERS: Dict[str, Callable[[Iterable[dict]], Iterator[bytes]]] = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+    "parquet": iter_parquet,
+    "arrow": iter_arrow,
+    "xlsx": iter_xlsx,
+}
+
+
+def available_formats() -> List[str]:
+    formats = ["csv", "ndjson", "json", "xlsx"]
+    if PYARROW_AVAILABLE:
+        formats += ["parquet", "arrow"]
+    return formats
+
+
+def pick_encoding(accept: str, fmt: str) -> Optional[str]:
+    """按 Accept-Encoding 选择 zstd / gzip；已压缩的格式不再压缩"""
+    if fmt in COMPRESSED_FORMATS:
+        return None
+    accepted = {part.split(";")[0].strip().lower() for part in (accept or "").split(",")}
+    if ZSTD_AVAILABLE and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
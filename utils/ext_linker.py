@@ -4,23 +4,63 @@
 BangumiExtLinker mapping loader.
 
 Provides lookup by bgm_id or mal_id.
+
+anime_map.json is compiled into a SQLite index (mapping/anime_map.db) that
+lookups read through mmap, so workers share pages through the OS cache
+instead of each parsing the JSON into ~23k dicts. The in-memory dict index
+is kept as a fallback when the compiled index is unavailable.
+
+Refreshes are conditional (ETag / If-None-Match) and incremental: the new
+snapshot is diffed against the index by bgm_id and only added, changed and
+removed rows are written; listeners are notified so derived in-memory
+indexes can be rebuilt off the request path.
 """
 
 from __future__ import annotations
 
+import asyncio
+import bisect
+import codecs
 import json
 import os
+import shutil
+import sqlite3
 import tempfile
+import threading
 import time
 from functools import lru_cache
-from typing import Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import httpx
 
 from data.config import work_dir
+from utils.http_pool import get_http_registry, host_of
 
 
 MAP_PATH = os.path.join(work_dir, "mapping", "anime_map.json")
+INDEX_PATH = os.getenv("ANIME_MAP_INDEX", os.path.join(work_dir, "mapping", "anime_map.db"))
+INDEX_MMAP_BYTES = int(os.getenv("ANIME_MAP_INDEX_MMAP_BYTES", str(64 * 1024 * 1024)))
+INDEX_CHECK_SECONDS = 1.0
+INDEX_SCHEMA = "4"
+# entries.pos is spaced by POS_GAP so an update can slot new entries between
+# existing ones without renumbering them
+POS_GAP = 1024
+# every cross-site ID carried by the mapping; lookups try them in this order
+ID_FIELDS = (
+    "bgm_id",
+    "mal_id",
+    "douban_id",
+    "bili_id",
+    "anidb_id",
+    "tmdb_id",
+    "imdb_id",
+    "tvdb_id",
+    "wikidata_id",
+)
+# SQLite host-parameter limit is 999 on older builds
+_LOOKUP_CHUNK = 500
+# ETag / 上次检查时间，供条件请求使用
+ETAG_PATH = MAP_PATH + ".etag"
 MAP_URL_ENV = "ANIME_MAP_URL"
 DEFAULT_MAP_URL = "https://github.com/Rhilip/BangumiExtLinker/blob/main/data/anime_map.json"
 
@@ -40,45 +80,419 @@ def _load_entries() -> list:
         return json.load(f)
 
 
+def load_map_entries() -> list:
+    """All mapping entries (name / name_cn / date / cross-site IDs)."""
+    conn = _index_conn()
+    if conn is not None:
+        try:
+            return [json.loads(row[0]) for row in conn.execute("SELECT data FROM entries ORDER BY pos")]
+        except sqlite3.Error:
+            pass
+    return _load_entries()
+
+
+_ID_COLUMNS = ", ".join(ID_FIELDS)
+_INSERT_SQL = f"INSERT INTO entries (pos, {_ID_COLUMNS}, data) VALUES (?, {', '.join('?' for _ in ID_FIELDS)}, ?)"
+_UPDATE_SQL = (
+    "UPDATE entries SET "
+    + ", ".join(f"{field} = ?" for field in ID_FIELDS[1:])
+    + ", data = ? WHERE bgm_id = ?"
+)
+
+
+def _entry_rows(entries: Iterable[dict]) -> List[tuple]:
+    """(pos, *ID_FIELDS, data) per entry; data is the compact JSON of the entry."""
+    rows = []
+    for item in entries:
+        if not isinstance(item, dict):
+            continue
+        rows.append(
+            (len(rows) * POS_GAP,)
+            + tuple(_normalize_id(item.get(field)) for field in ID_FIELDS)
+            + (json.dumps(item, ensure_ascii=False, separators=(",", ":")),)
+        )
+    return rows
+
+
+def build_map_index(src: str = MAP_PATH, dst: str = INDEX_PATH, entries: Optional[Iterable[dict]] = None) -> int:
+    """
+    Compile the mapping JSON into the SQLite index.
+
+    Written to a temp file and swapped in with os.replace(), so readers in
+    other workers keep a consistent file and reopen on the next lookup.
+    Returns the number of entries.
+    """
+    if entries is None:
+        with open(src, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    rows = _entry_rows(entries)
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="anime_map_", suffix=".db", dir=os.path.dirname(dst) or ".")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            columns = ", ".join(f"{field} TEXT" for field in ID_FIELDS)
+            conn.execute(
+                f"CREATE TABLE entries (rowid INTEGER PRIMARY KEY, pos INTEGER NOT NULL, {columns}, data TEXT NOT NULL)"
+            )
+            conn.executemany(_INSERT_SQL, rows)
+            # lookups take the first entry per ID in file order (lowest pos), as the dict index did
+            for field in ID_FIELDS:
+                conn.execute(
+                    f"CREATE INDEX ix_entries_{field} ON entries ({field}, pos) WHERE {field} IS NOT NULL"
+                )
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("schema", INDEX_SCHEMA), ("entries", str(len(rows))), ("built_at", str(time.time()))],
+            )
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(rows)
+
+
+def _slot_positions(lo: Optional[int], hi: Optional[int], count: int) -> Optional[List[int]]:
+    """`count` increasing positions strictly between lo and hi (None = open end), or None if there is no room."""
+    if lo is None and hi is None:
+        return [i * POS_GAP for i in range(count)]
+    if lo is None:
+        lo = hi - (count + 1) * POS_GAP
+    elif hi is None:
+        hi = lo + (count + 1) * POS_GAP
+    if hi - lo <= count:
+        return None
+    return [lo + (hi - lo) * (i + 1) // (count + 1) for i in range(count)]
+
+
+def _anchored(positions: List[int]) -> Set[int]:
+    """Indices of a longest increasing subsequence of `positions`: the rows that can keep their pos."""
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    parent = [-1] * len(positions)
+    for i, pos in enumerate(positions):
+        k = bisect.bisect_left(tails, pos)
+        if k == len(tails):
+            tails.append(pos)
+            tail_idx.append(i)
+        else:
+            tails[k] = pos
+            tail_idx[k] = i
+        parent[i] = tail_idx[k - 1] if k else -1
+    keep = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i >= 0:
+        keep.add(i)
+        i = parent[i]
+    return keep
+
+
+def apply_map_update(entries: List[dict], dst: str = INDEX_PATH) -> Dict[str, int]:
+    """
+    Apply a new mapping snapshot to the index incrementally.
+
+    Entries are diffed by bgm_id on their content only. File order lives in
+    the gapped `pos` column: rows that are still in relative order keep their
+    pos, and new or reordered rows take a position between their neighbours,
+    so deleting or inserting one entry writes only that entry. Changes go to
+    a copy of the index that is then swapped in. Falls back to a full build
+    when the index is missing, has an older schema, the snapshot has entries
+    without a unique bgm_id, or a gap between neighbours has run out.
+    """
+    rows = _entry_rows(entries)
+    keys = [r[1] for r in rows]
+    stats = {"entries": len(rows), "added": 0, "changed": 0, "removed": 0, "moved": 0, "rebuilt": 0}
+
+    old: Optional[Dict[str, Tuple[int, str]]] = None
+    if os.path.exists(dst) and all(keys) and len(set(keys)) == len(keys):
+        try:
+            conn = sqlite3.connect(f"file:{dst}?mode=ro", uri=True)
+            try:
+                schema = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+                if schema and schema[0] == INDEX_SCHEMA:
+                    old = {b: (pos, data) for b, pos, data in conn.execute("SELECT bgm_id, pos, data FROM entries")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            old = None
+
+    upserts = []
+    inserts = []
+    moves = []
+    if old is not None and not any(k is None for k in old):
+        prevs = [old.pop(row[1], None) for row in rows]
+        kept = [i for i, prev in enumerate(prevs) if prev is not None]
+        anchors = {kept[k] for k in _anchored([prevs[i][0] for i in kept])}
+        # 新条目与顺序变了的条目插在前后两个保持原位的条目之间
+        pending: List[int] = []
+        last_pos: Optional[int] = None
+        for i in list(range(len(rows))) + [None]:
+            if i is not None and i not in anchors:
+                pending.append(i)
+                continue
+            pos = prevs[i][0] if i is not None else None
+            if pending:
+                slots = _slot_positions(last_pos, pos, len(pending))
+                if slots is None:
+                    old = None
+                    break
+                for slot, j in zip(slots, pending):
+                    if prevs[j] is None:
+                        inserts.append((slot,) + rows[j][1:])
+                    else:
+                        moves.append((slot, rows[j][1]))
+                pending = []
+            last_pos = pos
+        else:
+            for row, prev in zip(rows, prevs):
+                if prev is not None and prev[1] != row[-1]:
+                    upserts.append(row[2:] + (row[1],))
+    if old is None or any(k is None for k in old):
+        build_map_index(dst=dst, entries=entries)
+        stats["added"] = len(rows)
+        stats["rebuilt"] = 1
+        return stats
+
+    removed = list(old)
+    stats["added"] = len(inserts)
+    stats["changed"] = len(upserts)
+    stats["moved"] = len(moves)
+    stats["removed"] = len(removed)
+    if not (inserts or upserts or moves or removed):
+        # 内容未变：仍把索引 mtime 推到新 JSON 之后，否则 _index_stale() 会在请求路径上触发全量重建
+        os.utime(dst)
+        return stats
+
+    fd, tmp_path = tempfile.mkstemp(prefix="anime_map_", suffix=".db", dir=os.path.dirname(dst) or ".")
+    os.close(fd)
+    try:
+        shutil.copyfile(dst, tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.executemany("DELETE FROM entries WHERE bgm_id = ?", [(k,) for k in removed])
+            conn.executemany(_UPDATE_SQL, upserts)
+            conn.executemany("UPDATE entries SET pos = ? WHERE bgm_id = ?", moves)
+            conn.executemany(_INSERT_SQL, inserts)
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("entries", str(len(rows))), ("built_at", str(time.time()))],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return stats
+
+
+_local = threading.local()
+_build_lock = threading.Lock()
+
+
+def _index_stale() -> bool:
+    try:
+        index_mtime = os.path.getmtime(INDEX_PATH)
+    except OSError:
+        return True
+    try:
+        return os.path.getmtime(MAP_PATH) > index_mtime
+    except OSError:
+        return False
+
+
+def _index_schema(path: str = INDEX_PATH) -> Optional[str]:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _ensure_index(outdated: bool = False) -> bool:
+    """Build the index when it is missing, older than the JSON map, or `outdated` (old schema)."""
+    if not outdated and not _index_stale():
+        return True
+    if not os.path.exists(MAP_PATH):
+        return os.path.exists(INDEX_PATH) and not outdated
+    with _build_lock:
+        if _index_stale() or (outdated and _index_schema() != INDEX_SCHEMA):
+            try:
+                build_map_index()
+            except Exception as e:
+                print(f"[map] index build failed: {e}")
+                return False
+    return True
+
+
+def _index_conn() -> Optional[sqlite3.Connection]:
+    """
+    Per-thread read-only connection to the compiled index.
+
+    The file identity is re-checked at most every INDEX_CHECK_SECONDS; after
+    a rebuild swaps the file the connection is reopened.
+    """
+    conn = getattr(_local, "conn", None)
+    now = time.monotonic()
+    if conn is not None and now - getattr(_local, "checked_at", 0.0) < INDEX_CHECK_SECONDS:
+        return conn
+    if not _ensure_index():
+        return None
+    try:
+        st = os.stat(INDEX_PATH)
+    except OSError:
+        return None
+    ident = (st.st_ino, st.st_mtime_ns)
+    _local.checked_at = now
+    if conn is not None and getattr(_local, "ident", None) == ident:
+        return conn
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    try:
+        conn = sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size={INDEX_MMAP_BYTES}")
+        schema = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+    except sqlite3.Error as e:
+        print(f"[map] index open failed: {e}")
+        return None
+    if not schema or schema[0] != INDEX_SCHEMA:
+        # 旧版本索引(缺少部分 ID 列)，重建后下次调用重新打开
+        conn.close()
+        _ensure_index(outdated=True)
+        _local.checked_at = 0.0
+        return None
+    _local.conn = conn
+    _local.ident = ident
+    return conn
+
+
+def _lookup_indexed(conn: sqlite3.Connection, column: str, value: str) -> Optional[dict]:
+    row = conn.execute(
+        f"SELECT data FROM entries WHERE {column} = ? ORDER BY pos LIMIT 1", (value,)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
 @lru_cache()
-def _build_index() -> Tuple[Dict[str, dict], Dict[str, dict]]:
-    by_bgm: Dict[str, dict] = {}
-    by_mal: Dict[str, dict] = {}
+def _build_index() -> Dict[str, Dict[str, dict]]:
+    """id_type -> {id: first entry in file order}, for every ID type in one pass."""
+    indexes: Dict[str, Dict[str, dict]] = {field: {} for field in ID_FIELDS}
 
     for item in _load_entries():
-        bgm_id = _normalize_id(item.get("bgm_id"))
-        if bgm_id and bgm_id not in by_bgm:
-            by_bgm[bgm_id] = item
-
-        mal_id = _normalize_id(item.get("mal_id"))
-        if mal_id and mal_id not in by_mal:
-            by_mal[mal_id] = item
+        for field in ID_FIELDS:
+            key = _normalize_id(item.get(field))
+            if key and key not in indexes[field]:
+                indexes[field][key] = item
 
-    return by_bgm, by_mal
+    return indexes
 
 
-def lookup_ext_ids(bgm_id: Optional[str] = None, mal_id: Optional[str] = None) -> Optional[dict]:
+def lookup_ext_ids(
+    bgm_id: Optional[str] = None,
+    mal_id: Optional[str] = None,
+    *,
+    douban_id: Optional[str] = None,
+    bili_id: Optional[str] = None,
+    anidb_id: Optional[str] = None,
+    tmdb_id: Optional[str] = None,
+    imdb_id: Optional[str] = None,
+    tvdb_id: Optional[str] = None,
+    wikidata_id: Optional[str] = None,
+) -> Optional[dict]:
     """
-    Lookup external IDs from mapping.
-    Prefer bgm_id, fallback to mal_id.
+    Lookup external IDs from mapping by any ID type.
+    IDs are tried in ID_FIELDS order (bgm_id, then mal_id, ...); the first hit wins.
     """
-    by_bgm, by_mal = _build_index()
+    given = locals()
+    keys = [(field, _normalize_id(given[field])) for field in ID_FIELDS]
+    keys = [(field, key) for field, key in keys if key]
+    if not keys:
+        return None
 
-    key_bgm = _normalize_id(bgm_id)
-    if key_bgm and key_bgm in by_bgm:
-        return by_bgm[key_bgm]
+    conn = _index_conn()
+    if conn is not None:
+        try:
+            for field, key in keys:
+                entry = _lookup_indexed(conn, field, key)
+                if entry is not None:
+                    return entry
+            return None
+        except sqlite3.Error:
+            pass
 
-    key_mal = _normalize_id(mal_id)
-    if key_mal and key_mal in by_mal:
-        return by_mal[key_mal]
+    indexes = _build_index()
+    for field, key in keys:
+        entry = indexes[field].get(key)
+        if entry is not None:
+            return entry
 
     return None
 
 
+def lookup_ext_ids_many(id_type: str, values: Iterable[str]) -> Dict[str, Optional[dict]]:
+    """
+    Bulk lookup of one ID type: {normalized id: entry or None}.
+    Uses batched IN queries on the index instead of one query per ID.
+    """
+    if id_type not in ID_FIELDS:
+        raise ValueError(f"unknown id type: {id_type}")
+    keys = list(dict.fromkeys(k for k in map(_normalize_id, values) if k))
+    result: Dict[str, Optional[dict]] = dict.fromkeys(keys)
+
+    conn = _index_conn()
+    if conn is not None:
+        try:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                marks = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT {id_type}, data FROM entries WHERE {id_type} IN ({marks}) ORDER BY pos", chunk
+                )
+                for key, data in rows:
+                    if result[key] is None:
+                        result[key] = json.loads(data)
+            return result
+        except sqlite3.Error:
+            result = dict.fromkeys(keys)
+
+    index = _build_index()[id_type]
+    for key in keys:
+        result[key] = index.get(key)
+    return result
+
+
+_MAP_LISTENERS: List[Callable[[Dict[str, int]], None]] = []
+
+
+def add_map_listener(callback: Callable[[Dict[str, int]], None]) -> None:
+    """Register a callback run (in the refresh thread) after the mapping changed."""
+    if callback not in _MAP_LISTENERS:
+        _MAP_LISTENERS.append(callback)
+
+
 def clear_ext_linker_cache() -> None:
     """Clear in-memory mapping cache after map file updates."""
     _load_entries.cache_clear()
     _build_index.cache_clear()
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
 
 
 def _normalize_map_url(url: str) -> str:
@@ -92,6 +506,194 @@ def _normalize_map_url(url: str) -> str:
     return text
 
 
+def _read_etag_state() -> dict:
+    try:
+        with open(ETAG_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except Exception:
+        return {}
+
+
+def _write_etag_state(url: str, etag: Optional[str]) -> None:
+    try:
+        with open(ETAG_PATH, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": etag, "checked_at": time.time()}, f)
+    except Exception:
+        pass
+
+
+def _map_is_fresh(state: dict, max_age_hours: int) -> bool:
+    """Last successful check (or file write) within max_age_hours."""
+    checked_at = state.get("checked_at")
+    if not checked_at:
+        try:
+            checked_at = os.path.getmtime(MAP_PATH)
+        except OSError:
+            return False
+    try:
+        return float(checked_at) + int(max_age_hours) * 3600 > time.time()
+    except Exception:
+        return False
+
+
+def _conditional_headers(state: dict, url: str, force: bool) -> Dict[str, str]:
+    if force or not os.path.exists(MAP_PATH):
+        return {}
+    if state.get("etag") and state.get("url") == url:
+        return {"If-None-Match": state["etag"]}
+    return {}
+
+
+def _install_map_update(entries: List[dict], tmp_json: str, url: str, etag: Optional[str]) -> Dict[str, int]:
+    """
+    Swap in the downloaded JSON, apply the diff to the index and refresh
+    in-memory indexes. Runs off the event loop.
+    """
+    os.replace(tmp_json, MAP_PATH)
+    try:
+        stats = apply_map_update(entries)
+    except Exception as e:
+        print(f"[map] index update failed: {e}")
+        stats = {"entries": len(entries), "added": 0, "changed": 0, "removed": 0, "moved": 0, "rebuilt": 0}
+    _write_etag_state(url, etag)
+
+    # 仅在已加载过时重建内存兜底索引，避免下一个请求承担重建
+    loaded = _load_entries.cache_info().currsize > 0
+    indexed = _build_index.cache_info().currsize > 0
+    _load_entries.cache_clear()
+    _build_index.cache_clear()
+    if loaded:
+        _load_entries()
+    if indexed:
+        _build_index()
+
+    for callback in list(_MAP_LISTENERS):
+        try:
+            callback(stats)
+        except Exception as e:
+            print(f"[map] listener failed: {e}")
+    return stats
+
+
+def _describe_update(stats: Dict[str, int]) -> str:
+    if stats.get("rebuilt"):
+        return f"updated: {stats['entries']} entries (index rebuilt)"
+    return (
+        f"updated: {stats['entries']} entries "
+        f"(+{stats['added']} ~{stats['changed']} -{stats['removed']} moved {stats.get('moved', 0)})"
+    )
+
+
+class _JsonArrayParser:
+    """
+    Incremental parser for a JSON array of objects.
+
+    feed() takes decoded text chunks and returns the elements completed so
+    far; close() raises if the array was truncated.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._started = False
+        self._done = False
+
+    def feed(self, text: str) -> List[Any]:
+        buf = self._buf + text
+        out: List[Any] = []
+        pos = 0
+        n = len(buf)
+        while not self._done:
+            while pos < n and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= n:
+                break
+            ch = buf[pos]
+            if not self._started:
+                if ch != "[":
+                    raise ValueError("invalid_payload: expected list")
+                self._started = True
+                pos += 1
+                continue
+            if ch == "]":
+                self._done = True
+                pos += 1
+                break
+            if ch != "{":
+                raise ValueError("invalid_payload: expected objects")
+            try:
+                obj, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # 元素不完整，等待下一块
+                break
+            out.append(obj)
+            pos = end
+        self._buf = buf[pos:]
+        return out
+
+    def close(self) -> None:
+        if not self._done:
+            raise ValueError("invalid_payload: truncated list")
+
+
+async def refresh_map_file_async(
+    *,
+    source_url: Optional[str] = None,
+    force: bool = False,
+    max_age_hours: int = 24,
+    timeout: int = 20,
+) -> Tuple[bool, str]:
+    """
+    Refresh the mapping without blocking the event loop.
+
+    Sends If-None-Match with the last ETag (304 -> nothing to do), streams
+    the body to disk while parsing entries incrementally, then applies the
+    diff to the index in a worker thread.
+    """
+    url = source_url or os.getenv(MAP_URL_ENV, "").strip() or DEFAULT_MAP_URL
+    url = _normalize_map_url(url)
+    if not url:
+        return False, f"skip: missing {MAP_URL_ENV}"
+
+    state = _read_etag_state()
+    if not force and os.path.exists(MAP_PATH) and _map_is_fresh(state, max_age_hours):
+        return False, "skip: local map is fresh"
+
+    registry = get_http_registry()
+    client = registry.client_for(url)
+    os.makedirs(os.path.dirname(MAP_PATH), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="anime_map_", suffix=".json", dir=os.path.dirname(MAP_PATH))
+    try:
+        parser = _JsonArrayParser()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        entries: List[dict] = []
+        with os.fdopen(fd, "wb") as f:
+            async with registry.limiter(host_of(url)):
+                async with client.stream(
+                    "GET", url, headers=_conditional_headers(state, url, force), timeout=timeout
+                ) as resp:
+                    if resp.status_code == 304:
+                        _write_etag_state(url, state.get("etag"))
+                        return False, "skip: not modified"
+                    resp.raise_for_status()
+                    etag = resp.headers.get("ETag")
+                    async for chunk in resp.aiter_bytes():
+                        f.write(chunk)
+                        entries.extend(parser.feed(decoder.decode(chunk)))
+        entries.extend(parser.feed(decoder.decode(b"", final=True)))
+        parser.close()
+        stats = await asyncio.to_thread(_install_map_update, entries, tmp_path, url, etag)
+    except ValueError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"download_failed: {e}"
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True, _describe_update(stats)
+
+
 def refresh_map_file(
     *,
     source_url: Optional[str] = None,
@@ -111,17 +713,15 @@ def refresh_map_file(
     if not url:
         return False, f"skip: missing {MAP_URL_ENV}"
 
-    if not force and os.path.exists(MAP_PATH):
-        try:
-            age_seconds = int(max_age_hours) * 3600
-            mtime = os.path.getmtime(MAP_PATH)
-            if (mtime + age_seconds) > time.time():
-                return False, "skip: local map is fresh"
-        except Exception:
-            pass
+    state = _read_etag_state()
+    if not force and os.path.exists(MAP_PATH) and _map_is_fresh(state, max_age_hours):
+        return False, "skip: local map is fresh"
 
     try:
-        resp = httpx.get(url, timeout=timeout)
+        resp = httpx.get(url, headers=_conditional_headers(state, url, force), timeout=timeout)
+        if resp.status_code == 304:
+            _write_etag_state(url, state.get("etag"))
+            return False, "skip: not modified"
         resp.raise_for_status()
         payload = resp.json()
     except Exception as e:
@@ -133,12 +733,10 @@ def refresh_map_file(
     os.makedirs(os.path.dirname(MAP_PATH), exist_ok=True)
     fd, tmp_path = tempfile.mkstemp(prefix="anime_map_", suffix=".json", dir=os.path.dirname(MAP_PATH))
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
-        os.replace(tmp_path, MAP_PATH)
+        with os.fdopen(fd, "wb") as f:
+            f.write(resp.content)
+        stats = _install_map_update(payload, tmp_path, url, resp.headers.get("ETag"))
     finally:
         if os.path.exists(tmp_path):
             os.remove(tmp_path)
-
-    clear_ext_linker_cache()
-    return True, f"updated: {len(payload)} entries"
+    return True, _describe_update(stats)
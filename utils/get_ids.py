@@ -1,8 +1,11 @@
+import asyncio
 import json
-import time
-import threading
+import os
+
+import httpx
 
 from utils.logger import Log
+from utils.http_pool import get_http_registry
 from apis.mal import MyAnimeList
 from apis.anikore import Anikore
 from apis.anilist import AniList
@@ -11,8 +14,6 @@ from apis.bangumi import Bangumi
 from data import config
 
 animes_path = config.work_dir + "/data/jsons/animes.json"
-animes = {}
-ids = {}
 
 mal = MyAnimeList()
 ank = Anikore()
@@ -22,121 +23,105 @@ bgm = Bangumi()
 
 log_id = Log(__name__).getlog()
 
+# 季度刷新每完成多少部动画写一次中间结果(中途退出时已取得的数据不丢)
+CHECKPOINT_EVERY = max(1, int(os.getenv("REFRESH_CHECKPOINT_EVERY", "10")))
 
-def get_mal_id(string, dicts: dict):
-    dicts["mal_id"] = mal.search_anime(string)
-    time.sleep(1)
 
+def run_sync(coro):
+    """
+    在新事件循环中运行协程(供定时任务、CLI 等同步调用方使用)，
+    结束时关闭该循环上的连接池；主机调度器进程内共享，与 API 共用各站配额
+    """
 
-def get_ank_id(string, dicts: dict):
-    dicts["ank_id"] = ank.get_ani_id(string)
-    time.sleep(1)
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await get_http_registry().aclose()
 
+    return asyncio.run(_main())
 
-def get_anl_id(string, dicts: dict):
-    dicts["anl_id"] = anl.get_al_id(string)
-    time.sleep(1)
 
+async def with_retry(factory, default, label: str):
+    """
+    网络错误(连接/超时/HTTP 状态)时退避重试，最多 config.retry_max 次；
+    解析失败等其他异常直接返回 default。上游限速由连接池的主机调度器负责，不再固定 sleep
+    """
+    for attempt in range(config.retry_max):
+        try:
+            return await factory()
+        except httpx.HTTPError as e:
+            if attempt == config.retry_max - 1:
+                log_id.error("{}失败: {}".format(label, e))
+                return default
+            await asyncio.sleep(min(config.time_sleep, 0.5 * 2**attempt))
+        except Exception as e:
+            log_id.debug("{}失败: {}".format(label, e))
+            return default
+    return default
+
+
+async def resolve_ids_async(name: str, anl_id=None) -> dict:
+    """同时查询一部动画在 Filmarks / MAL / Anikore / AniList 的 id；anl_id 已由整季批量预取时不再单独查询"""
+
+    async def _anl_id():
+        if anl_id not in (None, "Error"):
+            return anl_id
+        return await anl.get_al_id_async(name)
+
+    fm_id, mal_id, ank_id, anl_id_ = await asyncio.gather(
+        with_retry(lambda: fm.get_fm_score_async(name), "Error", "{}的fm分数获取".format(name)),
+        with_retry(lambda: mal.search_anime_async(name), "Error", "{}的mal_id获取".format(name)),
+        with_retry(lambda: ank.get_ani_id_async(name), "Error", "{}的ank_id获取".format(name)),
+        with_retry(_anl_id, "Error", "{}的anl_id获取".format(name)),
+    )
+    return {"fm_id": fm_id, "mal_id": mal_id, "ank_id": ank_id, "anl_id": anl_id_}
 
-def get_fm_id(string, dicts: dict):
-    dicts["fm_id"] = fm.get_fm_score(string)
-    time.sleep(1)
 
-
-def create_threads(dicts: dict, string: str):
-    tlist = []
-    t1 = threading.Thread(
-        target=get_fm_id,
-        args=(
-            string,
-            dicts,
-        ),
-    )
-    t2 = threading.Thread(
-        target=get_mal_id,
-        args=(
-            string,
-            dicts,
-        ),
-    )
-    t3 = threading.Thread(
-        target=get_ank_id,
-        args=(
-            string,
-            dicts,
-        ),
-    )
-    t4 = threading.Thread(
-        target=get_anl_id,
-        args=(
-            string,
-            dicts,
-        ),
-    )
-    t1.start()
-    log_id.debug("{}线程创建成功".format(t1.name))
-    t2.start()
-    log_id.debug("{}线程创建成功".format(t2.name))
-    t3.start()
-    log_id.debug("{}线程创建成功".format(t3.name))
-    t4.start()
-    log_id.debug("{}线程创建成功".format(t4.name))
-    tlist.append(t1)
-    tlist.append(t2)
-    tlist.append(t3)
-    tlist.append(t4)
-    for t in tlist:
-        t.join()
+def write_json(path: str, data: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps(data, sort_keys=True, indent=4, separators=(",", ":")))
+    os.replace(tmp_path, path)
 
 
-def get_ids():
+async def get_ids_async(path: str = animes_path) -> dict:
+    """整季所有动画的 id 并发查询(各站按主机限速)，每 CHECKPOINT_EVERY 部及结束(含异常退出)时写回 animes.json"""
     log_id.info("正在获取动画id，请稍后")
-    global animes
-    animes = json.load(open(animes_path, "r"))
+    animes = json.load(open(path, "r"))
     animes_count = animes["total"]
+    names = [k for k, v in animes.items() if k not in ("total", "time") and isinstance(v, dict)]
+    anl_ids = await anl.get_al_ids_async(names)
+
     count = 0
-    for k, v in animes.items():
-        keep = True
-        count_retry = 0
-        while keep and count_retry < config.retry_max:
-            if k != "time":
-                try:
-                    create_threads(v, k)
-                    f1 = open(animes_path, "w")
-                    f1.write(
-                        json.dumps(
-                            animes, sort_keys=True, indent=4, separators=(",", ":")
-                        )
-                    )
-                    f1.close()
-                    count += 1
-                    log_id.info("动画id获取已完成: " + str(count))
-                    keep = False
-                except:
-                    count_retry += 1
-                    time.sleep(config.time_sleep)
-                    log_id.info("已重试：" + str(count_retry))
-                    if count_retry == config.retry_max - 1:
-                        try:
-                            log_id.error("获取bgm_id: {}失败".format(v["bgm_id"]))
-                        except:
-                            pass
-    log_id.info("获取动画分数成功数 {}".format(str(count) + "/" + str(animes_count)))
 
+    async def _one(name: str):
+        nonlocal count
+        ids = await resolve_ids_async(name, anl_ids.get(name))
+        animes[name].update(ids)
+        count += 1
+        log_id.info("动画id获取已完成: " + str(count))
+        if count % CHECKPOINT_EVERY == 0:
+            write_json(path, animes)
 
-def get_single_id(bgm_id: str):
-    global ids
-    ids = {}
-    name = bgm.get_anime_name(bgm_id)
-    keep = True
-    count_retry = 0
-    while keep and count_retry < config.retry_max:
-        try:
-            ids["bgm_id"] = bgm_id
-            create_threads(ids, name)
-            keep = False
-        except:
-            count_retry += 1
-            time.sleep(config.time_sleep)
-            log_id.info("已重试：" + str(count_retry))
+    try:
+        await asyncio.gather(*(_one(name) for name in names))
+    finally:
+        write_json(path, animes)
+    log_id.info("获取动画id成功数 {}".format(str(count) + "/" + str(animes_count)))
+    return animes
+
+
+def get_ids():
+    return run_sync(get_ids_async())
+
+
+async def get_single_id_async(bgm_id: str) -> dict:
+    name = await bgm.get_anime_name_async(bgm_id)
+    ids = {"bgm_id": bgm_id}
+    ids.update(await resolve_ids_async(name))
     return ids
+
+
+def get_single_id(bgm_id: str):
+    return run_sync(get_single_id_async(bgm_id))
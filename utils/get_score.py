@@ -1,9 +1,9 @@
+import asyncio
 import json
 import time
-import threading
 
 from utils.logger import Log
-from utils.get_ids import get_single_id
+from utils.get_ids import CHECKPOINT_EVERY, get_single_id_async, run_sync, with_retry, write_json
 from apis.mal import MyAnimeList
 from apis.anikore import Anikore
 from apis.anilist import AniList
@@ -16,103 +16,54 @@ ank = Anikore()
 anl = AniList()
 fm = Filmarks()
 bgm = Bangumi()
-score = {}
-score_1 = {}
-score_2 = {}
-info_0 = {}
 
 log_score = Log(__name__).getlog()
 
 
-def get_bgm_id(bgm_id, score: dict):
-    score["bgm_score"] = bgm.get_score(bgm_id)
-    time.sleep(1)
+async def _bgm_score(bgm_id):
+    return await bgm.get_score_async(bgm_id)
 
 
-def get_ank_id(ank_id, score: dict):
-    if ank_id != "Error":
-        score["ank_score"] = 2 * float(ank.get_ani_score(ank_id))
-    time.sleep(1)
+async def _ank_score(ank_id):
+    if ank_id == "Error":
+        return None
+    return 2 * float(await ank.get_ani_score_async(ank_id))
 
 
-def get_anl_id(anl_id, score: dict):
-    if anl_id != "Error":
-        score["anl_score"] = anl.get_al_score(anl_id)
-    time.sleep(1)
+async def _anl_score(anl_id, anl_scores: dict):
+    if anl_id == "Error":
+        return None
+    if anl_id in anl_scores:
+        return anl_scores[anl_id]
+    return await anl.get_al_score_async(anl_id)
 
 
-def get_mal_id(mal_id, score: dict):
-    if mal_id != "404":
-        mal_score = mal.get_anime_score(mal_id)
-        if mal_score != "N/A":
-            score["mal_score"] = float(mal_score)
-    time.sleep(1)
+async def _mal_score(mal_id):
+    if mal_id in ("404", "Error"):
+        return None
+    mal_score = await mal.get_anime_score_async(mal_id)
+    if mal_score == "N/A":
+        return None
+    return float(mal_score)
 
 
-def get_bgm_info(bgm_id):
-    global info_0
-    info_0 = bgm.get_anime_info(bgm_id)
-    time.sleep(1)
-
-
-def get_bgm_name(bgm_id):
-    global score_1
-    score_1["name"] = bgm.get_anime_name(bgm_id)
-    time.sleep(1)
-
-
-def create_threads(dicts: dict, score: dict, method=0):
-    tlist = []
-    t1 = threading.Thread(
-        target=get_bgm_id,
-        args=(
-            str(dicts["bgm_id"]),
-            score,
-        ),
-    )
-    t2 = threading.Thread(
-        target=get_mal_id,
-        args=(
-            str(dicts["mal_id"]),
-            score,
-        ),
-    )
-    t3 = threading.Thread(
-        target=get_ank_id,
-        args=(
-            str(dicts["ank_id"]),
-            score,
-        ),
-    )
-    t4 = threading.Thread(
-        target=get_anl_id,
-        args=(
-            str(dicts["anl_id"]),
-            score,
+async def fetch_scores_async(ids: dict, anl_scores: dict = None) -> dict:
+    """
+    同时获取一部动画在 bgm / MAL / Anikore / AniList 的评分；
+    某个站点失败时不写对应字段(与原先各线程独立失败一致)
+    """
+    anl_scores = anl_scores or {}
+    bgm_id = str(ids["bgm_id"])
+    results = await asyncio.gather(
+        with_retry(lambda: _bgm_score(bgm_id), None, "{}的bgm评分获取".format(bgm_id)),
+        with_retry(lambda: _mal_score(str(ids["mal_id"])), None, "{}的mal评分获取".format(bgm_id)),
+        with_retry(lambda: _ank_score(str(ids["ank_id"])), None, "{}的ank评分获取".format(bgm_id)),
+        with_retry(
+            lambda: _anl_score(str(ids["anl_id"]), anl_scores), None, "{}的anl评分获取".format(bgm_id)
         ),
     )
-    if method == 1:
-        t5 = threading.Thread(target=get_bgm_info, args=(str(dicts["bgm_id"]),))
-        t5.start()
-        log_score.debug("{}线程创建成功".format(t5.name))
-        t6 = threading.Thread(target=get_bgm_name, args=(str(dicts["bgm_id"]),))
-        t6.start()
-        log_score.debug("{}线程创建成功".format(t6.name))
-        tlist.append(t5)
-    t1.start()
-    log_score.debug("{}线程创建成功".format(t1.name))
-    t2.start()
-    log_score.debug("{}线程创建成功".format(t2.name))
-    t3.start()
-    log_score.debug("{}线程创建成功".format(t3.name))
-    t4.start()
-    log_score.debug("{}线程创建成功".format(t4.name))
-    tlist.append(t1)
-    tlist.append(t2)
-    tlist.append(t3)
-    tlist.append(t4)
-    for t in tlist:
-        t.join()
+    keys = ("bgm_score", "mal_score", "ank_score", "anl_score")
+    return {k: v for k, v in zip(keys, results) if v is not None}
 
 
 def get_time():
@@ -124,7 +75,19 @@ def get_time():
     return time_dict
 
 
-def get_score(method):
+def _skip(k, v) -> bool:
+    if k in ("total", "time") or not isinstance(v, dict):
+        return True
+    if v.get("ank_id") == "Error" and v.get("anl_id") == "Error":
+        return True
+    return bool(v.get("fm_id")) and v["fm_id"] == "-"
+
+
+async def get_score_async(method) -> dict:
+    """
+    整季评分并发获取(各站按主机限速)，每部动画的状态只在各自的协程内；
+    每 CHECKPOINT_EVERY 部及结束(含异常退出)时写入
+    """
     if method == "sub":
         animes_path = config.work_dir + "/data/jsons/sub.json"
         score_path = config.work_dir + "/data/jsons/sub_score.json"
@@ -134,76 +97,67 @@ def get_score(method):
     log_score.info("正在获取动画评分")
     animes = json.load(open(animes_path, "r"))
     animes_count = animes["total"]
+    targets = {k: v for k, v in animes.items() if not _skip(k, v)}
+    anl_scores = await anl.get_al_scores_async([str(v.get("anl_id")) for v in targets.values()])
+
     scores = {}
     count = 0
-    for k, v in animes.items():
-        global score
+
+    async def _one(k, v):
+        nonlocal count
         try:
-            if k == "total":
-                pass
-            elif v["ank_id"] == "Error" and v["anl_id"] == "Error":
-                pass
-            elif v["fm_id"] and v["fm_id"] == "-" or k == "time":
-                pass
-            else:
-                keep = True
-                count_retry = 0
-                while keep and count_retry < config.retry_max:
-                    try:
-                        global score
-                        create_threads(v, score)
-                        score["fm_score"] = 2 * float(v["fm_id"])
-                        score["time"] = get_time()
-                        scores[k] = score
-                        f1 = open(score_path, "w")
-                        f1.write(
-                            json.dumps(
-                                scores, sort_keys=True, indent=4, separators=(",", ":")
-                            )
-                        )
-                        f1.close()
-                        count += 1
-                        log_score.info("动画评分获取已完成: " + str(count))
-                        keep = False
-                    except:
-                        count_retry += 1
-                        time.sleep(config.time_sleep)
-                        log_score.info("重试: " + str(count_retry))
-                        if count_retry == config.retry_max - 1:
-                            log_score.error(
-                                "获取bgm_id: {}失败".format(str(v["bgm_id"]))
-                            )
-            score = {}
-        except:
-            pass
+            # fm 的 id 字段保存的是搜索得到的评分
+            fm_score = 2 * float(v["fm_id"])
+        except (KeyError, TypeError, ValueError):
+            log_score.error("获取bgm_id: {}失败".format(str(v.get("bgm_id"))))
+            return
+        score = await fetch_scores_async(v, anl_scores)
+        score["fm_score"] = fm_score
+        score["time"] = get_time()
+        scores[k] = score
+        count += 1
+        log_score.info("动画评分获取已完成: " + str(count))
+        if count % CHECKPOINT_EVERY == 0:
+            write_json(score_path, scores)
+
+    try:
+        await asyncio.gather(*(_one(k, v) for k, v in targets.items()))
+    finally:
+        write_json(score_path, scores)
     log_score.info("获取动画分数成功数 {}".format(str(count) + "/" + str(animes_count)))
+    return scores
+
+
+def get_score(method):
+    return run_sync(get_score_async(method))
+
+
+async def get_single_score_async(bgm_id: str) -> dict:
+    ids = await get_single_id_async(bgm_id)
+    info_task = asyncio.ensure_future(bgm.get_anime_info_async(bgm_id))
+    try:
+        score = {}
+        if not (ids["ank_id"] == "Error" and ids["anl_id"] == "Error") and ids["fm_id"] != "-":
+            score = await fetch_scores_async(ids)
+            score["fm_score"] = 2 * float(ids["fm_id"])
+        info = await info_task
+    finally:
+        if not info_task.done():
+            info_task.cancel()
+    score["name"] = info["name"]
+    score["ids"] = ids
+    score["poster"] = info["images"]["large"]
+    score["name_cn"] = info["name_cn"]
+    score["time"] = get_time()
+    score["bgm_id"] = ids["bgm_id"]
+    return score
 
 
 def get_single_score(bgm_id: str):
-    global score_1
-    global info_0
-    score_1 = {}
-    ids = get_single_id(bgm_id)
-    print(ids)
-    if ids["ank_id"] == "Error" and ids["anl_id"] == "Error":
-        pass
-    elif ids["fm_id"] == "-":
-        pass
-    else:
-        keep = True
-        count_retry = 0
-        create_threads(ids, score_1, method=1)
-        score_1["fm_score"] = 2 * float(ids["fm_id"])
-    score_1["ids"] = ids
-    print(info_0)
-    score_1["poster"] = info_0["images"]["large"]
-    score_1["name_cn"] = info_0["name_cn"]
-    score_1["time"] = get_time()
-    score_1["bgm_id"] = ids["bgm_id"]
-    return score_1
+    return run_sync(get_single_score_async(bgm_id))
 
 
-def update_score(bgm_id: str):
+async def update_score_async(bgm_id: str):
     # 该函数用于更新sub下的分数
     # air由于会每日自动更新 故不添加update_score
     bgm_id = str(bgm_id)
@@ -215,27 +169,29 @@ def update_score(bgm_id: str):
         if str(data.get("bgm_id")) == bgm_id:
             info = data
             break
-    
+
     if not info:
         log_score.error(f"找不到 bgm_id: {bgm_id}")
         return
-    
-    global score_2
-    score_2 = {}
-    create_threads(info["ids"], score_2)
-    score_2["fm_score"] = fm.get_fm_score(info["name"])
-    info["bgm_score"] = score_2["bgm_score"]
-    info["fm_score"] = score_2["fm_score"]
-    info["mal_score"] = score_2["mal_score"]
-    info["ank_score"] = score_2["ank_score"]
-    info["anl_score"] = score_2["anl_score"]
+
+    fetched, fm_score = await asyncio.gather(
+        fetch_scores_async(info["ids"]),
+        with_retry(lambda: fm.get_fm_score_async(info["name"]), None, "{}的fm分数获取".format(info["name"])),
+    )
+    for k in ("bgm_score", "mal_score", "ank_score", "anl_score"):
+        if k in fetched:
+            info[k] = fetched[k]
+    if fm_score is not None:
+        info["fm_score"] = fm_score
     info["time"] = get_time()
-    
+
     # 更新json
     scores[info["name"]] = info
-    f1 = open(score_path, "w")
-    f1.write(json.dumps(scores, sort_keys=True, indent=4, separators=(",", ":")))
-    f1.close()
+    write_json(score_path, scores)
+
+
+def update_score(bgm_id: str):
+    return run_sync(update_score_async(bgm_id))
 
 
 if __name__ == "__main__":
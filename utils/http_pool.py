@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享的 httpx.AsyncClient 连接池
+
+每个上游主机(api.bgm.tv、graphql.anilist.co、api.jikan.moe 等)一个池化客户端，
+各有独立的连接数与 keep-alive 设置，安装 `h2` 后启用 HTTP/2。客户端首次使用时创建，
+绑定到创建它的事件循环；FastAPI 启动时打开、关闭时释放。
+
+经 `HttpClientRegistry.request()` 发出的请求按主机调度：并发上限 + 按上游公布的限速
+设定的令牌桶，429 时遵循 `Retry-After`。调度状态进程内共享且线程安全，
+在其他事件循环中运行的后台刷新与 API 共用同一份各主机配额。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except Exception:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class HostProfile:
+    """单个上游主机的连接设置"""
+
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 10.0
+    http2: bool = True
+    # 调度：同时在途请求上限；令牌桶速率(请求/秒, 0 为不限)与桶容量
+    concurrency: int = 4
+    rate: float = 0.0
+    burst: int = 1
+
+
+DEFAULT_PROFILE = HostProfile(
+    max_connections=int(os.getenv("PRECISE_HTTP_MAX_CONNECTIONS", "50")),
+    max_keepalive=int(os.getenv("PRECISE_HTTP_MAX_KEEPALIVE", "20")),
+    timeout=float(os.getenv("PRECISE_HTTP_TIMEOUT", "10")),
+    concurrency=int(os.getenv("PRECISE_QUERY_CONCURRENCY", "4")),
+)
+
+HOST_PROFILES: Dict[str, HostProfile] = {
+    "api.bgm.tv": HostProfile(max_connections=20, max_keepalive=10, concurrency=6),
+    "bgm.tv": HostProfile(max_connections=4, max_keepalive=2, concurrency=2),
+    # AniList: 90 次/分钟
+    "graphql.anilist.co": HostProfile(
+        max_connections=10, max_keepalive=5, concurrency=4, rate=1.5, burst=3
+    ),
+    # Jikan: 3 次/秒, 60 次/分钟
+    "api.jikan.moe": HostProfile(
+        max_connections=6, max_keepalive=3, timeout=15.0, concurrency=3, rate=1.0, burst=3
+    ),
+    "myanimelist.net": HostProfile(max_connections=4, max_keepalive=2, concurrency=2),
+    "filmarks.com": HostProfile(max_connections=8, max_keepalive=4, concurrency=4),
+    "www.anikore.jp": HostProfile(max_connections=4, max_keepalive=2, concurrency=2),
+    "raw.githubusercontent.com": HostProfile(
+        max_connections=2, max_keepalive=1, timeout=20.0, concurrency=1
+    ),
+}
+
+# 429 后按 Retry-After 等待重试的最长时间(秒)与重试次数
+RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", "10"))
+RETRY_ON_429 = int(os.getenv("HTTP_RETRY_ON_429", "1"))
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Retry-After 可以是秒数或 HTTP 日期"""
+    if not value:
+        return default
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return default
+
+
+class HostLimiter:
+    """
+    单个上游主机的请求调度：并发上限 + 令牌桶限速。
+
+    状态由线程锁保护、不绑定事件循环，API 的事件循环与定时刷新等
+    其他线程里的 asyncio.run() 共享同一份配额。
+    429 时调用 `penalize()`，在 Retry-After 到期前暂停发放令牌。
+    """
+
+    def __init__(self, host: str, concurrency: int, rate: float, burst: int):
+        self.host = host
+        self.concurrency = max(1, concurrency)
+        self.rate = max(0.0, rate)
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._slots = 0
+        # 等待并发名额的 (事件循环, future)，释放时跨循环移交
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        # 令牌桶按预约计算：下一个令牌的理论发放时间
+        self._next_token = 0.0
+        self._blocked_until = 0.0
+        self.waiting = 0
+        self.active = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _reserve_token(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._blocked_until)
+            if self.rate > 0:
+                interval = 1.0 / self.rate
+                at = max(at, self._next_token - (self.burst - 1) * interval)
+                self._next_token = max(self._next_token, at) + interval
+            return at - now
+
+    async def _take_token(self) -> None:
+        delay = self._reserve_token()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            # 等待期间收到 429 时继续等到暂停结束
+            delay = self._blocked_until - time.monotonic()
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._slots < self.concurrency:
+                self._slots += 1
+                return
+            fut = loop.create_future()
+            self._waiters.append((loop, fut))
+        try:
+            await fut
+        except BaseException:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, fut))
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted:
+                # 名额已移交给本协程(或正在移交)，交给下一个等待者
+                if fut.done() and not fut.cancelled():
+                    self._release_slot()
+                elif not fut.done():
+                    fut.cancel()
+            raise
+
+    def _grant(self, fut: asyncio.Future) -> None:
+        # 在等待者所在的事件循环中执行
+        if fut.done():
+            self._release_slot()
+        else:
+            fut.set_result(None)
+
+    def _release_slot(self) -> None:
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._slots -= 1
+                    return
+                loop, fut = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(self._grant, fut)
+                return
+            except RuntimeError:
+                # 等待者的事件循环已关闭
+                continue
+
+    async def acquire(self) -> None:
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            await self._acquire_slot()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._release_slot()
+                raise
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.active += 1
+            self.requests += 1
+            self.wait_seconds += time.monotonic() - start
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+        self._release_slot()
+
+    async def __aenter__(self) -> "HostLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+    def penalize(self, delay: float) -> None:
+        with self._lock:
+            self.throttled += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            # 已发放的突发额度作废，暂停结束后按速率重新计
+            self._next_token = max(self._next_token, self._blocked_until)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "burst": self.burst,
+            "active": self.active,
+            "queued": self.waiting,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "avg_wait": round(self.wait_seconds / self.requests, 4) if self.requests else 0.0,
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+        }
+
+
+class HttpClientRegistry:
+    """
+    按主机管理池化的 AsyncClient
+
+    客户端按事件循环保存(弱引用，循环结束即释放)，调用 asyncio.run() 的脚本
+    与长期运行的 API 事件循环互不干扰；主机调度器进程内共享，这些脚本仍与 API 共用各主机配额。
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, HostProfile]] = None,
+        default: Optional[HostProfile] = None,
+    ):
+        self.profiles = dict(HOST_PROFILES if profiles is None else profiles)
+        self.default = default or DEFAULT_PROFILE
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._limiters_lock = threading.Lock()
+
+    def profile(self, host: str) -> HostProfile:
+        return self.profiles.get(host.lower(), self.default)
+
+    def _build(self, host: str) -> httpx.AsyncClient:
+        p = self.profile(host)
+        limits = httpx.Limits(
+            max_connections=p.max_connections,
+            max_keepalive_connections=p.max_keepalive,
+            keepalive_expiry=p.keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=httpx.Timeout(p.timeout),
+            http2=bool(p.http2 and HTTP2_AVAILABLE),
+        )
+
+    def client(self, host: str) -> httpx.AsyncClient:
+        """当前事件循环上 `host` 的池化客户端"""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            clients = {}
+            self._clients[loop] = clients
+        key = host.lower()
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = self._build(key)
+            clients[key] = client
+        return client
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """`url` 所在主机的池化客户端"""
+        return self.client(host_of(url))
+
+    def limiter(self, host: str) -> HostLimiter:
+        """请求调度器；整个进程共享，不随事件循环隔离"""
+        key = host.lower()
+        with self._limiters_lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                p = self.profile(key)
+                limiter = HostLimiter(key, p.concurrency, p.rate, p.burst)
+                self._limiters[key] = limiter
+        return limiter
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        经主机调度器发送请求。
+
+        429 时按 Retry-After 暂停该主机的令牌发放，等待不超过 RETRY_AFTER_MAX
+        时重试(最多 RETRY_ON_429 次)，否则把 429 响应交给调用方处理。
+        """
+        host = host_of(url)
+        client = client or self.client(host)
+        limiter = self.limiter(host)
+        attempts = 0
+        while True:
+            async with limiter:
+                response = await client.request(method, url, **kwargs)
+            if response.status_code != 429:
+                return response
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.penalize(delay)
+            if attempts >= RETRY_ON_429 or delay > RETRY_AFTER_MAX:
+                return response
+            attempts += 1
+
+    def open(self) -> None:
+        """在当前事件循环上为所有已配置的主机建立客户端"""
+        for host in self.profiles:
+            self.client(host)
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的全部客户端"""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.pop(loop, None) or {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, dict]:
+        """各主机连接池配置与调度统计(排队深度、在途请求数、429 次数等)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        out: Dict[str, dict] = {}
+        clients = self._clients.get(loop) if loop is not None else None
+        for host, client in (clients or {}).items():
+            p = self.profile(host)
+            out[host] = {
+                "max_connections": p.max_connections,
+                "max_keepalive": p.max_keepalive,
+                "http2": bool(p.http2 and HTTP2_AVAILABLE),
+                "closed": client.is_closed,
+            }
+        with self._limiters_lock:
+            limiters = list(self._limiters.items())
+        for host, limiter in limiters:
+            out.setdefault(host, {})["scheduler"] = limiter.stats()
+        return out
+
+
+_REGISTRY: Optional[HttpClientRegistry] = None
+
+
+def get_http_registry() -> HttpClientRegistry:
+    """进程内共享的连接池(搜索器与各站 API 客户端共用)"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = HttpClientRegistry()
+    return _REGISTRY
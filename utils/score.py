@@ -1,7 +1,9 @@
 import json
+import os
 
 from data import config
 from utils.logger import Log
+from utils.stats import write_stats
 
 log_ts = Log(__name__).getlog()
 
@@ -16,9 +18,72 @@ def store_score(dicts: dict, method):
     else:
         scores_sorted_path = config.work_dir + "/data/jsons/score_sorted.json"
     log_ts.info("正在存储分数")
-    f1 = open(scores_sorted_path, "w")
+    # 先写临时文件再替换，其他 worker 的快照不会读到写了一半的文件
+    tmp_path = scores_sorted_path + ".tmp"
+    f1 = open(tmp_path, "w")
     f1.write(json.dumps(dicts, indent=4, separators=(",", ":")))
     f1.close()
+    os.replace(tmp_path, scores_sorted_path)
+
+
+staff_path = config.work_dir + "/data/jsons/staff.json"
+# infobox 键 -> 字段
+INFOBOX_FIELDS = {"动画制作": "studio", "监督": "director", "导演": "director", "原作": "source"}
+
+
+def _infobox_text(value):
+    # infobox 的值可能是字符串，也可能是 [{"v": ...}] 列表
+    if isinstance(value, list):
+        parts = [str(v.get("v")) if isinstance(v, dict) else str(v) for v in value]
+        return "、".join(p for p in parts if p and p != "None") or None
+    if not value:
+        return None
+    return str(value).strip() or None
+
+
+def parse_infobox(infobox) -> dict:
+    staff = {}
+    for box in infobox or []:
+        if not isinstance(box, dict):
+            continue
+        field = INFOBOX_FIELDS.get(box.get("key"))
+        value = _infobox_text(box.get("value"))
+        if field and value and field not in staff:
+            staff[field] = value
+    return staff
+
+
+def get_staff(bgm_ids) -> dict:
+    """
+    从 Bangumi 条目 infobox 取制作公司/监督/原作，按 bgm_id 缓存到 staff.json
+    """
+    from apis.bangumi import Bangumi
+
+    try:
+        cache = json.load(open(staff_path, "r", encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    bgm = None
+    changed = False
+    for bgm_id in bgm_ids:
+        bgm_id = str(bgm_id)
+        if not bgm_id or bgm_id in cache:
+            continue
+        if bgm is None:
+            bgm = Bangumi()
+        try:
+            info = bgm.get_anime_info(bgm_id)
+        except Exception as e:
+            log_ts.error("{}的infobox获取失败: {}".format(bgm_id, e))
+            continue
+        cache[bgm_id] = parse_infobox(info.get("infobox"))
+        changed = True
+    if changed:
+        tmp_path = staff_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(cache, ensure_ascii=False, indent=4, separators=(",", ":")))
+        os.replace(tmp_path, staff_path)
+    return cache
 
 
 def total_score(method):
@@ -34,6 +99,8 @@ def total_score(method):
     score = 0
     ani_score = {}
     anime = {}
+    log_ts.info("正在获取制作信息")
+    staff = get_staff(animes[k]["bgm_id"] for k in scores if k in animes)
     for k, v in scores.items():
         score = 0
         for k1, v1 in weights.items():
@@ -73,9 +140,16 @@ def total_score(method):
         else:
             anime["anl_score"] = "None"
         anime["time"] = scores[k]["time"]
+        anime.update(staff.get(str(animes[k]["bgm_id"]), {}))
         ani_score[k] = anime
         anime = {}
     store_score(ani_score, method=method)
+    # 同一次刷新内生成统计文件，统计接口直接读取
+    log_ts.info("正在生成统计")
+    try:
+        write_stats()
+    except Exception as e:
+        log_ts.error("统计生成失败: {}".format(e))
 
 
 def count_single_score(scores: dict):
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File-backed snapshots with mtime-invalidated hot reload.
+
+A `FileSnapshot` holds a value derived from one or more files (e.g. the
+score JSONs under data/jsons). Reads are a single attribute load; at most
+every SNAPSHOT_CHECK_SECONDS a read also stats the files, and when the
+(inode, mtime, size) signature changed the value is rebuilt on a
+background thread and swapped in atomically. Every worker therefore picks
+up files rewritten by another process within seconds, and no request
+waits for a reload — except the very first load of a process.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Generic, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "1"))
+
+Signature = Tuple[Optional[Tuple[int, int, int]], ...]
+
+
+def file_signature(paths: Sequence[str]) -> Signature:
+    """(inode, mtime_ns, size) per path; None for missing files."""
+    sig = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            sig.append(None)
+            continue
+        sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def signature_mtime(sig: Signature) -> Optional[float]:
+    """签名中最新的 mtime(秒)"""
+    mtimes = [entry[1] for entry in sig if entry is not None]
+    return max(mtimes) / 1e9 if mtimes else None
+
+
+class FileSnapshot(Generic[T]):
+    """
+    懒加载 + 后台热更新的文件快照。
+
+    `builder()` 读取文件并构建值；构建失败(如文件写到一半)时保留旧值，
+    文件再次变化时重试。首次加载失败时使用 `default()`(未提供则抛出)。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        paths: Sequence[str],
+        builder: Callable[[], T],
+        default: Optional[Callable[[], T]] = None,
+        check_seconds: float = SNAPSHOT_CHECK_SECONDS,
+    ):
+        self.name = name
+        self.paths = tuple(paths)
+        self.builder = builder
+        self.default = default
+        self.check_seconds = max(0.0, check_seconds)
+        # (signature, value) 作为整体替换，读方无需加锁
+        self._state: Optional[Tuple[Signature, T]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # 与构建锁分开，请求线程发起后台重建时不会等待正在进行的构建
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+        self.reloads = 0
+
+    def get(self) -> T:
+        state = self._state
+        if state is None:
+            return self.refresh()
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_seconds:
+            self._checked_at = now
+            if file_signature(self.paths) != state[0]:
+                self._reload_in_background()
+        return state[1]
+
+    def version(self) -> Signature:
+        """当前值对应的文件签名(可作为缓存版本)；先取版本再取值，最坏情况只是多一次重建"""
+        self.get()
+        return self._state[0]
+
+    def refresh(self) -> T:
+        """同步重建(首次加载，或写文件的进程在写完后立即刷新)"""
+        with self._lock:
+            sig = file_signature(self.paths)
+            state = self._state
+            if state is not None and state[0] == sig:
+                return state[1]
+            try:
+                value = self.builder()
+                self.reloads += 1
+            except Exception as e:
+                if state is None and self.default is None:
+                    raise
+                print(f"[snapshot] {self.name} rebuild failed, keeping previous data: {e}")
+                value = state[1] if state is not None else self.default()
+            self._state = (sig, value)
+            self._checked_at = time.monotonic()
+            return value
+
+    def _reload_in_background(self) -> None:
+        with self._reload_lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._reloading = False
+
+        threading.Thread(target=run, name=f"snapshot-{self.name}", daemon=True).start()
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._state is not None,
+            "reloads": self.reloads,
+            "reloading": self._reloading,
+            "check_seconds": self.check_seconds,
+        }
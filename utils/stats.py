@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+from data import config
+
+airing_path = config.work_dir + "/data/jsons/score_sorted.json"
+subscribed_path = config.work_dir + "/data/jsons/sub_score_sorted.json"
+stats_path = config.work_dir + "/data/jsons/stats.json"
+
+
+def _score_of(info: dict):
+    # 缺少评分时 utils.score 写入字符串 "None"
+    try:
+        return float(info.get("score"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _entries(data: dict):
+    return [
+        info
+        for name, info in (data or {}).items()
+        if name != "total" and isinstance(info, dict)
+    ]
+
+
+def compute_stats(airing: dict, subscribed: dict, last_updated: str = None) -> dict:
+    """
+    统计正在放送列表：评分分布(整数段 / 0.5 分段)、年份分布、制作公司数量与均分
+    """
+    airing_entries = _entries(airing)
+    subscribed_entries = _entries(subscribed)
+
+    score_dist = Counter()
+    score_buckets = Counter()
+    year_dist = Counter()
+    studio_counts = Counter()
+    studio_scores = {}
+    for info in airing_entries:
+        score = _score_of(info)
+        if score:
+            score_dist[f"{int(score)}-{int(score) + 1}"] += 1
+            score_buckets[round(score * 2) / 2] += 1
+
+        year = (info.get("time") or {}).get("year")
+        if year:
+            year_dist[str(year)] += 1
+
+        studio = info.get("studio")
+        if studio:
+            studio_counts[studio] += 1
+            if score is not None:
+                studio_scores.setdefault(studio, []).append(score)
+
+    studio_ranking = [
+        {
+            "studio": studio,
+            "count": count,
+            "avg_score": round(sum(studio_scores[studio]) / len(studio_scores[studio]), 2)
+            if studio_scores.get(studio)
+            else None,
+        }
+        for studio, count in studio_counts.most_common()
+    ]
+
+    return {
+        "total_anime": len(airing_entries) + len(subscribed_entries),
+        "airing_count": len(airing_entries),
+        "subscribed_count": len(subscribed_entries),
+        "score_distribution": dict(score_dist),
+        "score_buckets": {str(k): v for k, v in sorted(score_buckets.items())},
+        "year_distribution": dict(year_dist),
+        "studio_distribution": dict(studio_counts),
+        "studio_ranking": studio_ranking,
+        "last_updated": last_updated,
+    }
+
+
+def _load(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _mtime_iso(*paths) -> str:
+    mtimes = [os.path.getmtime(p) for p in paths if os.path.exists(p)]
+    if not mtimes:
+        return None
+    return datetime.fromtimestamp(max(mtimes)).isoformat(timespec="seconds")
+
+
+def build_stats() -> dict:
+    """按当前分数文件计算统计(统计文件缺失时接口也用它兜底)"""
+    return compute_stats(
+        _load(airing_path),
+        _load(subscribed_path),
+        last_updated=_mtime_iso(airing_path, subscribed_path),
+    )
+
+
+def write_stats() -> dict:
+    """计算统计并写入 stats.json(先写临时文件再替换)"""
+    stats = build_stats()
+    stats["generated_at"] = time.time()
+    tmp_path = stats_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(stats, ensure_ascii=False, indent=4, separators=(",", ":")))
+    os.replace(tmp_path, stats_path)
+    return stats
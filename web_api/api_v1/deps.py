@@ -4,12 +4,15 @@
 API v1 依赖注入
 """
 
+import bisect
 import json
 import os
-from functools import lru_cache
-from typing import Generator, Optional
+from typing import Dict, Generator, List, Optional, Tuple
 
 from data.config import work_dir
+from utils.snapshot import FileSnapshot, Signature
+from utils.stats import build_stats, stats_path
+from web_api.api_v1 import schemas
 from web_api.wrapper import AnimeScore
 
 
@@ -29,40 +32,223 @@ def get_anime_score() -> Generator[AnimeScore, None, None]:
         pass  # 清理操作（如果需要）
 
 
-@lru_cache()
+AIRING_PATH = work_dir + "/data/jsons/score_sorted.json"
+SUBSCRIBED_PATH = work_dir + "/data/jsons/sub_score_sorted.json"
+
+
+def _read_json(path: str) -> dict:
+    """文件不存在时为空；JSON 损坏(写到一半)时抛出，由快照保留旧数据"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _time_key(anime: schemas.AnimeInfo) -> tuple:
+    t = anime.time
+    return (t.year or 0, t.month or 0, t.day or 0) if t else (0, 0, 0)
+
+
+# 排序键均以 (name, bgm_id) 收尾，构成全序：游标分页在同分/同名时也不会重复或遗漏
+SORT_KEYS = {
+    "score": lambda a: (-(a.scores.total or 0), a.name, a.ids.bgm_id or ""),
+    "name": lambda a: (a.name, a.ids.bgm_id or ""),
+    "time": lambda a: _time_key(a) + (a.name, a.ids.bgm_id or ""),
+}
+
+# fields= 可选字段：AnimeInfo 顶层字段，或 ids / scores / time 的子字段(如 scores.total)
+_NESTED_FIELDS = {
+    "ids": schemas.AnimeIDs,
+    "scores": schemas.AnimeScores,
+    "time": schemas.AnimeTime,
+}
+PROJECTABLE_FIELDS = tuple(schemas.AnimeInfo.model_fields) + tuple(
+    f"{parent}.{child}" for parent, model in _NESTED_FIELDS.items() for child in model.model_fields
+)
+
+
+def parse_fields(fields: str) -> List[Tuple[str, ...]]:
+    """"name,poster,scores.total" -> [("name",), ("poster",), ("scores", "total")]；未知字段抛 ValueError"""
+    paths = []
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if field not in PROJECTABLE_FIELDS:
+            raise ValueError(field)
+        path = tuple(field.split("."))
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _pick(row: dict, path: Tuple[str, ...]):
+    value = row.get(path[0])
+    if len(path) > 1:
+        value = (value or {}).get(path[1])
+    return value
+
+
+def project_rows(rows: List[dict], paths: List[Tuple[str, ...]]) -> List[dict]:
+    """按 fields 裁剪，子字段保持嵌套结构({"scores": {"total": 8.1}})"""
+    whole = {path[0] for path in paths if len(path) == 1}
+    out = []
+    for row in rows:
+        item = {}
+        for path in paths:
+            if len(path) == 1:
+                item[path[0]] = row.get(path[0])
+            elif path[0] not in whole:
+                item.setdefault(path[0], {})[path[1]] = _pick(row, path)
+        out.append(item)
+    return out
+
+
+def columnar(rows: List[dict], paths: List[Tuple[str, ...]]) -> Dict[str, list]:
+    """列式：{"name": [...], "scores.total": [...]}"""
+    return {".".join(path): [_pick(row, path) for row in rows] for path in paths}
+
+
+class AnimeStore:
+    """
+    一份分数文件的只读视图（每个快照构建一次）
+
+    - raw: 原始 JSON（stats / export 等仍按字典读取）
+    - items: 已转换、已校验的 schemas.AnimeInfo，保持文件顺序
+    - names: items 在原始 JSON 中对应的键
+    - rows: items 对应的 JSON 字典（分页 / 字段裁剪直接取用，不再逐条序列化）
+    - by_bgm_id: bgm_id -> AnimeInfo 哈希索引
+    """
+
+    def __init__(self, raw: dict, flag: str):
+        self.raw = raw
+        self.items: List[schemas.AnimeInfo] = []
+        self.names: List[str] = []
+        self.by_bgm_id: Dict[str, schemas.AnimeInfo] = {}
+        for name, info in raw.items():
+            if name == "total" or not isinstance(info, dict):
+                continue
+            anime_data = convert_single_anime(name, info)
+            anime_data[flag] = True
+            try:
+                anime = schemas.AnimeInfo(**anime_data)
+            except ValueError as e:
+                print(f"[store] skip invalid entry {name}: {e}")
+                continue
+            self.items.append(anime)
+            self.names.append(name)
+            bgm_id = str(info.get("bgm_id"))
+            if bgm_id not in self.by_bgm_id:
+                self.by_bgm_id[bgm_id] = anime
+        self.rows = [anime.model_dump(mode="json") for anime in self.items]
+        # 预排序(下标)与排序键，列表接口只做二分查找与切片
+        self._order: Dict[str, List[int]] = {}
+        self._keys: Dict[str, list] = {}
+        for sort_by, key in SORT_KEYS.items():
+            keyed = sorted((key(anime), i) for i, anime in enumerate(self.items))
+            self._order[sort_by] = [i for _, i in keyed]
+            self._keys[sort_by] = [k for k, _ in keyed]
+
+    def sorted_by(self, sort_by: str) -> List[schemas.AnimeInfo]:
+        """score / name / time 预排序；其他取值保持文件顺序"""
+        order = self._order.get(sort_by)
+        return [self.items[i] for i in order] if order is not None else self.items
+
+    def page(
+        self, sort_by: str, limit: Optional[int], offset: int = 0, after: Optional[tuple] = None
+    ) -> Tuple[List[dict], int, Optional[tuple]]:
+        """
+        一页 rows：after 为上一页最后一条的排序键(游标)，否则按 offset。
+        返回 (rows, 起始位置, 本页最后一条的排序键；已到末尾为 None)
+        """
+        order = self._order.get(sort_by)
+        if order is None:
+            order = list(range(len(self.items)))
+            keys = [(i,) for i in order]
+        else:
+            keys = self._keys[sort_by]
+        start = bisect.bisect_right(keys, after) if after is not None else min(offset, len(order))
+        end = len(order) if not limit else min(start + limit, len(order))
+        last = keys[end - 1] if end < len(order) and end > start else None
+        return [self.rows[i] for i in order[start:end]], start, last
+
+
+# 其他 worker 更新分数文件后，各进程在数秒内自动换上新数据
+_AIRING_SNAPSHOT = FileSnapshot(
+    "airing",
+    [AIRING_PATH],
+    lambda: AnimeStore(_read_json(AIRING_PATH), "is_airing"),
+    default=lambda: AnimeStore({}, "is_airing"),
+)
+_SUBSCRIBED_SNAPSHOT = FileSnapshot(
+    "subscribed",
+    [SUBSCRIBED_PATH],
+    lambda: AnimeStore(_read_json(SUBSCRIBED_PATH), "is_subscribed"),
+    default=lambda: AnimeStore({}, "is_subscribed"),
+)
+
+
+def _read_stats() -> dict:
+    # 刷新流程生成的统计文件；缺失时按当前分数文件现算
+    stats = _read_json(stats_path)
+    return stats or build_stats()
+
+
+_STATS_SNAPSHOT = FileSnapshot(
+    "stats", [stats_path, AIRING_PATH, SUBSCRIBED_PATH], _read_stats, default=build_stats
+)
+
+
+def get_stats_data() -> dict:
+    """统计数据(stats.json 快照)"""
+    return _STATS_SNAPSHOT.get()
+
+
+def stats_version() -> Tuple[Signature]:
+    return (_STATS_SNAPSHOT.version(),)
+
+
+def get_airing_store() -> AnimeStore:
+    """正在放送列表的索引视图"""
+    return _AIRING_SNAPSHOT.get()
+
+
+def get_subscribed_store() -> AnimeStore:
+    """订阅列表的索引视图"""
+    return _SUBSCRIBED_SNAPSHOT.get()
+
+
+def data_version() -> Tuple[Signature, Signature]:
+    """分数文件快照版本(放送, 订阅)，用于响应缓存；须在读取数据之前获取"""
+    return _AIRING_SNAPSHOT.version(), _SUBSCRIBED_SNAPSHOT.version()
+
+
 def get_airing_list() -> dict:
     """
-    获取正在放送列表（带缓存）
+    获取正在放送列表（快照缓存，文件变化后自动重载）
     
     Returns:
         正在放送的动漫列表
     """
-    try:
-        with open(work_dir + "/data/jsons/score_sorted.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    return _AIRING_SNAPSHOT.get().raw
 
 
-@lru_cache()
 def get_subscribed_list() -> dict:
     """
-    获取订阅列表（带缓存）
+    获取订阅列表（快照缓存，文件变化后自动重载）
     
     Returns:
         订阅的动漫列表
     """
-    try:
-        with open(work_dir + "/data/jsons/sub_score_sorted.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    return _SUBSCRIBED_SNAPSHOT.get().raw
 
 
 def clear_cache():
-    """清除缓存"""
-    get_airing_list.cache_clear()
-    get_subscribed_list.cache_clear()
+    """立即重载(写入分数文件的进程调用；其他进程由快照自动发现变化)"""
+    _AIRING_SNAPSHOT.refresh()
+    _SUBSCRIBED_SNAPSHOT.refresh()
+    _STATS_SNAPSHOT.refresh()
 
 
 # ==================== 辅助函数 ====================
@@ -138,14 +324,19 @@ def convert_single_anime(name: str, info: dict) -> dict:
         "name": info.get("name", name),
         "name_cn": info.get("name_cn"),
         "name_en": info.get("name_en"),
+        # 订阅数据中的 ID 可能是整数
         "ids": {
-            "bgm_id": info.get("bgm_id") or ids.get("bgm_id"),
-            "mal_id": ids.get("mal_id"),
-            "anilist_id": ids.get("anl_id"),
-            "anikore_id": ids.get("ank_id"),
-            "filmarks_id": ids.get("fm_id"),
+            k: str(v) if v is not None else None
+            for k, v in {
+                "bgm_id": info.get("bgm_id") or ids.get("bgm_id"),
+                "mal_id": ids.get("mal_id"),
+                "anilist_id": ids.get("anl_id"),
+                "anikore_id": ids.get("ank_id"),
+                "filmarks_id": ids.get("fm_id"),
+            }.items()
         },
-        "scores": {k: v for k, v in scores.items() if v is not None},
+        # utils.score 对缺少评分的条目写入字符串 "None"
+        "scores": {k: v for k, v in scores.items() if v is not None and v != "None"},
         "time": time_obj,
         "poster": info.get("poster"),
         "studio": info.get("studio"),
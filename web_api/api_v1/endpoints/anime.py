@@ -4,104 +4,142 @@
 Anime resources API
 """
 
+import base64
+import json
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 
+from utils.ext_linker import ID_FIELDS, lookup_ext_ids, lookup_ext_ids_many
 from web_api.api_v1 import schemas
 from web_api.api_v1.deps import (
-    convert_single_anime,
-    get_airing_list,
-    get_subscribed_list,
+    PROJECTABLE_FIELDS,
+    AnimeStore,
+    columnar,
+    data_version,
+    get_airing_store,
+    get_subscribed_store,
+    parse_fields,
+    project_rows,
 )
+from web_api.api_v1.response_cache import cached_response
 
 router = APIRouter()
 
 
+def _encode_cursor(sort_by: str, key: tuple) -> str:
+    raw = json.dumps([sort_by, list(key)], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort_by:
+        raise HTTPException(status_code=400, detail=f"Cursor was issued for sort_by={cursor_sort}")
+    return tuple(key)
+
+
+def _list_page(
+    store: AnimeStore,
+    label: str,
+    limit: Optional[int],
+    sort_by: str,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    layout: str = "rows",
+) -> dict:
+    if not store.raw or not isinstance(store.raw, dict):
+        raise HTTPException(status_code=404, detail=f"No {label} anime data available")
+
+    paths = None
+    if fields:
+        try:
+            paths = parse_fields(fields)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown field {e}; allowed: {', '.join(PROJECTABLE_FIELDS)}"
+            )
+
+    after = _decode_cursor(cursor, sort_by) if cursor else None
+    try:
+        rows, start, last = store.page(sort_by, limit, offset, after)
+    except TypeError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    total = len(store.items)
+    body = {}
+    if layout == "columns":
+        paths = paths or [(field,) for field in schemas.AnimeInfo.model_fields]
+        body["fields"] = [".".join(path) for path in paths]
+        body["columns"] = columnar(rows, paths)
+    else:
+        body["items"] = project_rows(rows, paths) if paths else rows
+    body.update(
+        total=total,
+        page=start // limit + 1 if limit else 1,
+        page_size=limit or total,
+        offset=start,
+        next_cursor=_encode_cursor(sort_by, last) if last is not None else None,
+    )
+    return body
+
+
+def _list_response(request: Request, store_getter, label: str, **params) -> Response:
+    return cached_response(
+        request,
+        (label,) + tuple(sorted(params.items())),
+        data_version(),
+        lambda: _list_page(store_getter(), label, **params),
+    )
+
+
 @router.get("/airing", response_model=schemas.AnimeListResponse)
 async def get_airing_anime(
-    limit: Optional[int] = Query(None, ge=1, le=100, description="Limit"),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size"),
     sort_by: str = Query("score", description="Sort by: score, name, time"),
+    offset: int = Query(0, ge=0, description="Offset (ignored when cursor is set)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. name,poster,scores.total"),
+    layout: str = Query("rows", pattern="^(rows|columns)$", description="rows or columns (columnar arrays)"),
 ):
     """
     Get currently airing anime list.
     """
-    data = get_airing_list()
-
-    if not data or not isinstance(data, dict):
-        raise HTTPException(status_code=404, detail="No airing anime data available")
-
-    items = []
-    for name, info in data.items():
-        if name == "total" or not isinstance(info, dict):
-            continue
-
-        anime_data = convert_single_anime(name, info)
-        anime_data["is_airing"] = True
-        items.append(schemas.AnimeInfo(**anime_data))
-
-    if sort_by == "score":
-        items.sort(key=lambda x: (x.scores.total or 0), reverse=True)
-    elif sort_by == "name":
-        items.sort(key=lambda x: x.name)
-
-    total = len(items)
-    if limit:
-        items = items[:limit]
-
-    return schemas.AnimeListResponse(
-        items=items,
-        total=total,
-        page=1,
-        page_size=limit or total,
+    return _list_response(
+        request, get_airing_store, "airing",
+        limit=limit, sort_by=sort_by, offset=offset, cursor=cursor, fields=fields, layout=layout,
     )
 
 
 @router.get("/subscribed", response_model=schemas.AnimeListResponse)
 async def get_subscribed_anime(
-    limit: Optional[int] = Query(None, ge=1, le=100, description="Limit"),
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size"),
     sort_by: str = Query("score", description="Sort by: score, name, time"),
+    offset: int = Query(0, ge=0, description="Offset (ignored when cursor is set)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. name,poster,scores.total"),
+    layout: str = Query("rows", pattern="^(rows|columns)$", description="rows or columns (columnar arrays)"),
 ):
     """
     Get subscribed anime list.
     """
-    data = get_subscribed_list()
-
-    if not data or not isinstance(data, dict):
-        raise HTTPException(status_code=404, detail="No subscribed anime data available")
-
-    items = []
-    for name, info in data.items():
-        if name == "total" or not isinstance(info, dict):
-            continue
-
-        anime_data = convert_single_anime(name, info)
-        anime_data["is_subscribed"] = True
-        items.append(schemas.AnimeInfo(**anime_data))
-
-    if sort_by == "score":
-        items.sort(key=lambda x: (x.scores.total or 0), reverse=True)
-    elif sort_by == "name":
-        items.sort(key=lambda x: x.name)
-
-    total = len(items)
-    if limit:
-        items = items[:limit]
-
-    return schemas.AnimeListResponse(
-        items=items,
-        total=total,
-        page=1,
-        page_size=limit or total,
+    return _list_response(
+        request, get_subscribed_store, "subscribed",
+        limit=limit, sort_by=sort_by, offset=offset, cursor=cursor, fields=fields, layout=layout,
     )
 
 
-@router.get("/season/current", response_model=schemas.AnimeSeasonResponse)
-async def get_current_season():
-    """
-    Get current season info.
-    """
-    data = get_airing_list()
+def _current_season() -> schemas.AnimeSeasonResponse:
+    store = get_airing_store()
+    data = store.raw
 
     if not data:
         raise HTTPException(status_code=404, detail="No season data available")
@@ -135,14 +173,7 @@ async def get_current_season():
         name=f"{year} {season_name}",
     )
 
-    anime_list = []
-    for name, info in data.items():
-        if name == "total" or not isinstance(info, dict):
-            continue
-        anime_data = convert_single_anime(name, info)
-        anime_list.append(schemas.AnimeInfo(**anime_data))
-
-    anime_list.sort(key=lambda x: (x.scores.total or 0), reverse=True)
+    anime_list = store.sorted_by("score")
 
     return schemas.AnimeSeasonResponse(
         season=season_info,
@@ -151,6 +182,78 @@ async def get_current_season():
     )
 
 
+@router.get("/season/current", response_model=schemas.AnimeSeasonResponse)
+async def get_current_season(request: Request):
+    """
+    Get current season info.
+    """
+    return cached_response(request, ("season/current",), data_version(), _current_season)
+
+
+def _to_map_entry(entry: dict) -> schemas.MapEntry:
+    return schemas.MapEntry(
+        name=entry.get("name"),
+        name_cn=entry.get("name_cn") or None,
+        date=entry.get("date") or None,
+        ids=schemas.AnimeIDs(**{field: entry.get(field) for field in ID_FIELDS}),
+    )
+
+
+@router.get("/lookup", response_model=schemas.MapEntry)
+async def lookup_anime_ids(
+    bgm_id: Optional[str] = Query(None, description="Bangumi ID"),
+    mal_id: Optional[str] = Query(None, description="MyAnimeList ID"),
+    douban_id: Optional[str] = Query(None, description="Douban ID"),
+    bili_id: Optional[str] = Query(None, description="Bilibili media ID, e.g. md28229051"),
+    anidb_id: Optional[str] = Query(None, description="AniDB ID"),
+    tmdb_id: Optional[str] = Query(None, description="TMDB ID, e.g. tv/209867 or tv/37527/season/2"),
+    imdb_id: Optional[str] = Query(None, description="IMDb ID, e.g. tt22248376"),
+    tvdb_id: Optional[str] = Query(None, description="TheTVDB ID"),
+    wikidata_id: Optional[str] = Query(None, description="Wikidata ID, e.g. Q111389046"),
+):
+    """
+    Resolve the full ID crosswalk from any one external ID.
+    """
+    ids = {
+        "bgm_id": bgm_id,
+        "mal_id": mal_id,
+        "douban_id": douban_id,
+        "bili_id": bili_id,
+        "anidb_id": anidb_id,
+        "tmdb_id": tmdb_id,
+        "imdb_id": imdb_id,
+        "tvdb_id": tvdb_id,
+        "wikidata_id": wikidata_id,
+    }
+    if not any(ids.values()):
+        raise HTTPException(status_code=400, detail=f"One of {', '.join(ID_FIELDS)} is required")
+
+    entry = await run_in_threadpool(lambda: lookup_ext_ids(**ids))
+    if entry is None:
+        given = ", ".join(f"{k}={v}" for k, v in ids.items() if v)
+        raise HTTPException(status_code=404, detail=f"No mapping entry for {given}")
+    return _to_map_entry(entry)
+
+
+@router.post("/lookup", response_model=schemas.AnimeLookupBatchResponse)
+async def lookup_anime_ids_batch(query: schemas.AnimeLookupBatchQuery):
+    """
+    Resolve many IDs of one type in a single call.
+    """
+    if query.id_type not in ID_FIELDS:
+        raise HTTPException(status_code=400, detail=f"id_type must be one of {', '.join(ID_FIELDS)}")
+
+    found = await run_in_threadpool(lookup_ext_ids_many, query.id_type, query.ids)
+    results = {key: _to_map_entry(entry) if entry else None for key, entry in found.items()}
+    missing = [key for key, entry in results.items() if entry is None]
+    return schemas.AnimeLookupBatchResponse(
+        id_type=query.id_type,
+        results=results,
+        found=len(results) - len(missing),
+        missing=missing,
+    )
+
+
 @router.get("/{bgm_id}", response_model=schemas.AnimeInfo)
 async def get_anime_by_id(
     bgm_id: str = Path(..., description="Bangumi ID"),
@@ -158,24 +261,10 @@ async def get_anime_by_id(
     """
     Get anime by Bangumi ID.
     """
-    data = get_airing_list()
-
-    for name, info in data.items():
-        if not isinstance(info, dict):
-            continue
-        if str(info.get("bgm_id")) == str(bgm_id):
-            anime_data = convert_single_anime(name, info)
-            anime_data["is_airing"] = True
-            return schemas.AnimeInfo(**anime_data)
-
-    data = get_subscribed_list()
-
-    for name, info in data.items():
-        if not isinstance(info, dict):
-            continue
-        if str(info.get("bgm_id")) == str(bgm_id):
-            anime_data = convert_single_anime(name, info)
-            anime_data["is_subscribed"] = True
-            return schemas.AnimeInfo(**anime_data)
+    anime = get_airing_store().by_bgm_id.get(str(bgm_id))
+    if anime is None:
+        anime = get_subscribed_store().by_bgm_id.get(str(bgm_id))
+    if anime is not None:
+        return anime
 
     raise HTTPException(status_code=404, detail=f"Anime with bgm_id {bgm_id} not found")
@@ -3,74 +3,131 @@
 """
 导出 API
 
-提供数据导出功能
+直接从内存中的分数快照流式导出，支持筛选、多种格式与 gzip / zstd 传输压缩
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from typing import List, Optional, Tuple
 
-from data.config import work_dir
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from utils import exporter
+from web_api.api_v1 import schemas
+from web_api.api_v1.deps import get_airing_store, get_subscribed_store
 
 router = APIRouter()
 
+SCORE_SOURCES = ("bgm", "mal", "anilist", "anikore", "filmarks")
+EXTENSIONS = {"ndjson": "ndjson", "arrow": "arrows"}
 
-@router.get("/csv")
-async def export_csv(
-    type: str = Query("airing", description="导出类型: airing, subscribed"),
-):
-    """
-    导出 CSV 文件
-    
-    - **type**: 导出类型
-      - `airing`: 正在放送的动漫
-      - `subscribed`: 订阅的动漫
-    """
+
+def _records(type: str) -> List[Tuple[str, dict, schemas.AnimeInfo]]:
+    """(原始键, 原始数据, AnimeInfo)；all 为放送 + 订阅(按 bgm_id 去重)"""
     if type == "airing":
-        filename = work_dir + "/data/score.csv"
-        download_name = "airing_anime.csv"
+        stores = [get_airing_store()]
     elif type == "subscribed":
-        filename = work_dir + "/data/sub_score.csv"
-        download_name = "subscribed_anime.csv"
+        stores = [get_subscribed_store()]
+    elif type == "all":
+        stores = [get_airing_store(), get_subscribed_store()]
     else:
         raise HTTPException(status_code=400, detail=f"Invalid type: {type}")
-    
-    import os
-    if not os.path.exists(filename):
-        raise HTTPException(status_code=404, detail=f"CSV file not found: {type}")
-    
-    return FileResponse(
-        filename,
-        filename=download_name,
-        media_type="text/csv",
-    )
 
+    records = []
+    seen = set()
+    for store in stores:
+        for name, anime, row in zip(store.names, store.items, store.rows):
+            bgm_id = anime.ids.bgm_id
+            if bgm_id and bgm_id in seen:
+                continue
+            seen.add(bgm_id)
+            records.append((name, store.raw[name], row))
+    return records
+
+
+def _parse_sources(sources: Optional[str]) -> List[str]:
+    if not sources:
+        return []
+    names = [s.strip() for s in sources.split(",") if s.strip()]
+    unknown = [s for s in names if s not in SCORE_SOURCES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown source: {', '.join(unknown)} (allowed: {', '.join(SCORE_SOURCES)})",
+        )
+    return names
 
-@router.get("/json")
-async def export_json(
-    type: str = Query("airing", description="导出类型: airing, subscribed"),
+
+def _matches(
+    row: dict,
+    min_score: Optional[float],
+    year: Optional[int],
+    sources: List[str],
+    min_sources: Optional[int],
+) -> bool:
+    scores = row.get("scores") or {}
+    if min_score is not None:
+        total = scores.get("total")
+        if total is None or total < min_score:
+            return False
+    if year is not None and (row.get("time") or {}).get("year") != year:
+        return False
+    if any(scores.get(s) is None for s in sources):
+        return False
+    if min_sources is not None and sum(scores.get(s) is not None for s in SCORE_SOURCES) < min_sources:
+        return False
+    return True
+
+
+@router.get("/{format}")
+async def export_data(
+    request: Request,
+    format: str,
+    type: str = Query("airing", description="导出类型: airing, subscribed, all"),
+    min_score: Optional[float] = Query(None, description="最低综合评分"),
+    year: Optional[int] = Query(None, description="放送年份"),
+    sources: Optional[str] = Query(None, description="必须有评分的来源，逗号分隔: bgm,mal,anilist,anikore,filmarks"),
+    min_sources: Optional[int] = Query(None, ge=0, le=len(SCORE_SOURCES), description="至少有评分的来源数"),
 ):
     """
-    导出 JSON 文件
-    
+    导出数据
+
+    - **format**: `csv` | `ndjson` | `json` | `xlsx` | `parquet` | `arrow`(后两者需要 pyarrow)
     - **type**: 导出类型
       - `airing`: 正在放送的动漫
       - `subscribed`: 订阅的动漫
+      - `all`: 两者合并
+    - **min_score** / **year** / **sources** / **min_sources**: 筛选条件
+
+    按 Accept-Encoding 使用 zstd(需要 zstandard) 或 gzip 压缩传输
     """
-    import json
-    
-    if type == "airing":
-        filename = work_dir + "/data/jsons/score_sorted.json"
-    elif type == "subscribed":
-        filename = work_dir + "/data/jsons/sub_score_sorted.json"
+    if format not in exporter.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}")
+    if format not in exporter.available_formats():
+        raise HTTPException(status_code=501, detail=f"Format {format} requires pyarrow")
+
+    required = _parse_sources(sources)
+    records = [
+        record
+        for record in _records(type)
+        if _matches(record[2], min_score, year, required, min_sources)
+    ]
+
+    if format == "json":
+        # 与分数文件结构相同(名称 -> 原始数据)，不缩进
+        body = exporter.iter_json_object((name, raw) for name, raw, _ in records)
     else:
-        raise HTTPException(status_code=400, detail=f"Invalid type: {type}")
-    
-    import os
-    if not os.path.exists(filename):
-        raise HTTPException(status_code=404, detail=f"JSON file not found: {type}")
-    
-    return FileResponse(
-        filename,
-        filename=f"{type}_anime.json",
-        media_type="application/json",
+        body = exporter.WRITERS[format](row for _, _, row in records)
+
+    encoding = exporter.pick_encoding(request.headers.get("accept-encoding", ""), format)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{type}_anime.{EXTENSIONS.get(format, format)}"',
+        "Vary": "Accept-Encoding",
+        "X-Total-Count": str(len(records)),
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        exporter.compress_stream(body, encoding),
+        media_type=exporter.MEDIA_TYPES[format],
+        headers=headers,
     )
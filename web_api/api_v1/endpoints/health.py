@@ -59,6 +59,40 @@ async def ping():
     return {"message": "pong"}
 
 
+@router.get("/cache")
+async def cache_stats():
+    """
+    缓存状态
+
+    返回 precise 搜索各源响应缓存、站外评分缓存与列表接口响应缓存的容量与命中统计，以及请求合并情况
+    """
+    from apis.precise import (
+        get_extra_score_cache_stats,
+        get_search_cache_stats,
+        get_single_flight_stats,
+    )
+    from web_api.api_v1.response_cache import get_response_cache_stats
+
+    return {
+        "search": get_search_cache_stats(),
+        "extra_scores": get_extra_score_cache_stats(),
+        "responses": get_response_cache_stats(),
+        "single_flight": get_single_flight_stats(),
+    }
+
+
+@router.get("/upstream")
+async def upstream_stats():
+    """
+    上游请求状态
+
+    返回各上游主机的连接池配置与调度统计(排队深度、在途请求、429 次数等)
+    """
+    from utils.http_pool import get_http_registry
+
+    return {"hosts": get_http_registry().stats()}
+
+
 def check_data_files() -> bool:
     """检查数据文件是否存在"""
     try:
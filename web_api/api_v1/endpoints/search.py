@@ -4,12 +4,19 @@
 Search APIs
 """
 
+import time
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from apis.precise import search_anime_precise_async
+from apis.precise import (
+    search_anime_local,
+    search_anime_precise_async,
+    search_anime_precise_batch,
+    search_anime_precise_stream,
+)
 from web_api.api_v1 import schemas
 from web_api.api_v1.deps import get_anime_score
 from web_api.wrapper import AnimeScore
@@ -17,10 +24,56 @@ from web_api.wrapper import AnimeScore
 router = APIRouter()
 
 
+def _to_search_result(item: dict) -> schemas.AnimeSearchResult:
+    """precise 搜索的结果字典转为响应模型"""
+    return schemas.AnimeSearchResult(
+        name=item.get("name", ""),
+        name_cn=item.get("name_cn"),
+        name_en=item.get("name_en"),
+        ids=schemas.AnimeIDs(
+            bgm_id=item.get("bgm_id"),
+            mal_id=item.get("mal_id"),
+            anilist_id=item.get("anilist_id"),
+            anikore_id=item.get("ank_id"),
+            douban_id=item.get("douban_id"),
+            bili_id=item.get("bili_id"),
+            anidb_id=item.get("anidb_id"),
+            tmdb_id=item.get("tmdb_id"),
+            imdb_id=item.get("imdb_id"),
+            tvdb_id=item.get("tvdb_id"),
+            wikidata_id=item.get("wikidata_id"),
+        ),
+        scores=schemas.AnimeScores(
+            bgm=item.get("bgm_score"),
+            mal=item.get("mal_score"),
+            anilist=item.get("anilist_score"),
+            anikore=item.get("ank_score"),
+            filmarks=item.get("fm_score"),
+        ),
+        time=schemas.AnimeTime(
+            year=item.get("year"),
+            month=item.get("month"),
+        ),
+        studio=item.get("studio"),
+        director=item.get("director"),
+        source=item.get("source"),
+        summary=item.get("summary"),
+        confidence=item.get("confidence"),
+        matched_source=[
+            s for s, v in {
+                "bangumi": item.get("bgm_id"),
+                "anilist": item.get("anilist_id"),
+                "mal": item.get("mal_id"),
+            }.items() if v
+        ],
+        debug_scores=item.get("debug_scores"),
+    )
+
+
 @router.get("/", response_model=schemas.AnimeSearchResponse)
 async def search_anime(
     q: str = Query(..., min_length=1, description="Search keyword"),
-    source: str = Query("precise", description="Search source: precise, bangumi"),
+    source: str = Query("precise", description="Search source: precise, bangumi, local"),
     year: Optional[int] = Query(None, description="Year filter"),
     month: Optional[int] = Query(None, description="Month filter"),
     studio: Optional[str] = Query(None, description="Studio filter"),
@@ -30,13 +83,21 @@ async def search_anime(
     extra_scores: bool = Query(False, description="Include Anikore/Filmarks scores"),
     debug_scores: bool = Query(False, description="Include debug details for extra scores"),
     limit: int = Query(10, ge=1, le=50, description="Limit"),
+    deadline_ms: Optional[int] = Query(
+        None, ge=1, le=120000, description="Overall latency budget in ms (precise only)"
+    ),
     ans: AnimeScore = Depends(get_anime_score),
 ):
     """
     Search anime by keyword.
+
+    With deadline_ms the precise search returns whatever finished within the
+    budget; `partial` / `skipped` report the stages that were cut.
+    source=local answers from the offline mapping index without any upstream call.
     """
     filters_applied = {}
     results = []
+    meta = {}
 
     try:
         if source == "precise":
@@ -57,52 +118,21 @@ async def search_anime(
                 debug_scores=debug_scores,
                 match_mode=match_mode,
                 top_n=limit,
+                deadline_ms=deadline_ms,
+                meta=meta,
             )
 
             for item in precise_results:
-                result = schemas.AnimeSearchResult(
-                    name=item.get("name", ""),
-                    name_cn=item.get("name_cn"),
-                    name_en=item.get("name_en"),
-                    ids=schemas.AnimeIDs(
-                        bgm_id=item.get("bgm_id"),
-                        mal_id=item.get("mal_id"),
-                        anilist_id=item.get("anilist_id"),
-                        anikore_id=item.get("ank_id"),
-                        douban_id=item.get("douban_id"),
-                        bili_id=item.get("bili_id"),
-                        anidb_id=item.get("anidb_id"),
-                        tmdb_id=item.get("tmdb_id"),
-                        imdb_id=item.get("imdb_id"),
-                        tvdb_id=item.get("tvdb_id"),
-                        wikidata_id=item.get("wikidata_id"),
-                    ),
-                    scores=schemas.AnimeScores(
-                        bgm=item.get("bgm_score"),
-                        mal=item.get("mal_score"),
-                        anilist=item.get("anilist_score"),
-                        anikore=item.get("ank_score"),
-                        filmarks=item.get("fm_score"),
-                    ),
-                    time=schemas.AnimeTime(
-                        year=item.get("year"),
-                        month=item.get("month"),
-                    ),
-                    studio=item.get("studio"),
-                    director=item.get("director"),
-                    source=item.get("source"),
-                    summary=item.get("summary"),
-                    confidence=item.get("confidence"),
-                    matched_source=[
-                        s for s, v in {
-                            "bangumi": item.get("bgm_id"),
-                            "anilist": item.get("anilist_id"),
-                            "mal": item.get("mal_id"),
-                        }.items() if v
-                    ],
-                    debug_scores=item.get("debug_scores"),
-                )
-                results.append(result)
+                results.append(_to_search_result(item))
+
+        elif source == "local":
+            filters_applied = {k: v for k, v in {"year": year, "month": month}.items() if v is not None}
+            # 首次查询(或映射更新后)需构建索引，放到线程中
+            local_results = await run_in_threadpool(
+                search_anime_local, q, year=year, month=month, top_n=limit
+            )
+            for item in local_results:
+                results.append(_to_search_result(item))
 
         elif source == "bangumi":
             bgm_results = await run_in_threadpool(ans.Bangumi().search_anime, q)
@@ -131,6 +161,207 @@ async def search_anime(
         results=results,
         total=len(results),
         filters_applied=filters_applied if filters_applied else None,
+        partial=meta.get("partial"),
+        skipped=meta.get("skipped"),
+        elapsed_ms=meta.get("elapsed_ms"),
+    )
+
+
+@router.get("/stream")
+async def search_anime_stream(
+    q: str = Query(..., min_length=1, description="Search keyword"),
+    year: Optional[int] = Query(None, description="Year filter"),
+    month: Optional[int] = Query(None, description="Month filter"),
+    studio: Optional[str] = Query(None, description="Studio filter"),
+    director: Optional[str] = Query(None, description="Director filter"),
+    source_type: Optional[str] = Query(None, description="Source type filter"),
+    match_mode: str = Query("normal", description="Match mode: normal, recall, strict"),
+    extra_scores: bool = Query(False, description="Include Anikore/Filmarks scores"),
+    debug_scores: bool = Query(False, description="Include debug details for extra scores"),
+    limit: int = Query(10, ge=1, le=50, description="Limit"),
+    deadline_ms: Optional[int] = Query(
+        None, ge=1, le=120000, description="Overall latency budget in ms"
+    ),
+    format: str = Query("sse", description="Stream format: sse, ndjson"),
+):
+    """
+    Streaming precise search.
+
+    Emits a provisional ranking as soon as Bangumi or AniList answers, revised
+    rankings as later sources / extra scores arrive, then a final event.
+    Each event is a schemas.AnimeSearchStreamEvent.
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail=f"Unknown stream format: {format}")
+
+    def encode(event: schemas.AnimeSearchStreamEvent) -> str:
+        data = event.model_dump_json()
+        if format == "sse":
+            return f"event: {event.event}\ndata: {data}\n\n"
+        return data + "\n"
+
+    async def events():
+        start = time.perf_counter()
+        try:
+            async for ev in search_anime_precise_stream(
+                q,
+                year=year,
+                month=month,
+                studio=studio,
+                director=director,
+                source=source_type,
+                include_extra_scores=extra_scores,
+                debug_scores=debug_scores,
+                match_mode=match_mode,
+                top_n=limit,
+                deadline_ms=deadline_ms,
+            ):
+                results = [_to_search_result(item) for item in ev["results"]]
+                meta = ev.get("meta") or {}
+                yield encode(
+                    schemas.AnimeSearchStreamEvent(
+                        event=ev["event"],
+                        stage=ev["stage"],
+                        query=q,
+                        results=results,
+                        total=len(results),
+                        elapsed_ms=int((time.perf_counter() - start) * 1000),
+                        partial=meta.get("partial"),
+                        skipped=meta.get("skipped"),
+                    )
+                )
+        except Exception as e:
+            yield encode(
+                schemas.AnimeSearchStreamEvent(
+                    event="error",
+                    stage="error",
+                    query=q,
+                    elapsed_ms=int((time.perf_counter() - start) * 1000),
+                    message=str(e),
+                )
+            )
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _batch_filters(item: schemas.AnimeSearchBatchItem) -> dict:
+    filters = {
+        "year": item.year,
+        "month": item.month,
+        "studio": item.studio,
+        "director": item.director,
+        "source": item.source_type,
+    }
+    return {k: v for k, v in filters.items() if v is not None}
+
+
+@router.post("/batch")
+async def search_anime_batch(query: schemas.AnimeSearchBatchQuery):
+    """
+    Batch search, streamed as NDJSON.
+
+    Queries that normalize to the same keyword + filters run once; sub-queries
+    derived by different items (extra name queries, MAL ID lookups) are shared
+    across the whole batch, so upstream work grows with the number of unique
+    queries rather than with the batch size. Each line is a
+    schemas.AnimeSearchBatchResult in completion order (`index` points back into
+    `queries`), followed by a final `summary` line.
+    """
+    if query.source not in ("precise", "local"):
+        raise HTTPException(status_code=400, detail=f"Unknown batch search source: {query.source}")
+
+    items = query.queries
+    filters = [_batch_filters(item) for item in items]
+
+    def line(event: schemas.AnimeSearchBatchResult) -> str:
+        return event.model_dump_json(exclude_none=True) + "\n"
+
+    def result_lines(indices, output, meta, error):
+        results = [_to_search_result(item) for item in output]
+        for n, i in enumerate(indices):
+            if error is not None:
+                yield line(
+                    schemas.AnimeSearchBatchResult(
+                        event="error", index=i, id=items[i].id, query=items[i].q, message=str(error)
+                    )
+                )
+                continue
+            yield line(
+                schemas.AnimeSearchBatchResult(
+                    event="result",
+                    index=i,
+                    id=items[i].id,
+                    query=items[i].q,
+                    results=results,
+                    total=len(results),
+                    filters_applied=filters[i] or None,
+                    shared=n > 0,
+                    partial=meta.get("partial"),
+                    skipped=meta.get("skipped"),
+                    elapsed_ms=meta.get("elapsed_ms"),
+                )
+            )
+
+    async def lines():
+        start = time.perf_counter()
+        unique = errors = 0
+        try:
+            if query.source == "precise":
+                batch = search_anime_precise_batch(
+                    [
+                        {
+                            "keyword": item.q,
+                            **filters[i],
+                            "include_extra_scores": query.extra_scores,
+                            "debug_scores": query.debug_scores,
+                            "match_mode": query.match_mode,
+                            "top_n": query.limit,
+                            "deadline_ms": query.deadline_ms,
+                        }
+                        for i, item in enumerate(items)
+                    ],
+                    concurrency=query.concurrency,
+                )
+                async for indices, output, meta, error in batch:
+                    unique += 1
+                    errors += len(indices) if error is not None else 0
+                    for text in result_lines(indices, output, meta, error):
+                        yield text
+            else:
+                groups = {}
+                for i, item in enumerate(items):
+                    key = (" ".join(item.q.casefold().split()), item.year, item.month)
+                    groups.setdefault(key, []).append(i)
+                for indices in groups.values():
+                    first = items[indices[0]]
+                    unique += 1
+                    output = await run_in_threadpool(
+                        search_anime_local, first.q, year=first.year, month=first.month, top_n=query.limit
+                    )
+                    for text in result_lines(indices, output, {}, None):
+                        yield text
+        except Exception as e:
+            errors += 1
+            yield line(schemas.AnimeSearchBatchResult(event="error", message=str(e)))
+        yield line(
+            schemas.AnimeSearchBatchResult(
+                event="summary",
+                total=len(items),
+                unique=unique,
+                errors=errors,
+                elapsed_ms=int((time.perf_counter() - start) * 1000),
+            )
+        )
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -151,4 +382,5 @@ async def search_anime_post(query: schemas.AnimeSearchQuery):
         extra_scores=query.extra_scores,
         debug_scores=query.debug_scores,
         limit=query.limit,
+        deadline_ms=query.deadline_ms,
     )
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表/统计接口的预序列化响应缓存
+
+每个 (接口, 参数) 按数据快照版本渲染一次：JSON 字节 + gzip(/brotli) 压缩体，
+附带强 ETag(内容哈希，各 worker 一致；压缩体带 -gz / -br 后缀) 与 Last-Modified(分数文件 mtime)。
+If-None-Match / If-Modified-Since 命中时返回 304。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from cachetools import LRUCache
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from utils.snapshot import Signature, signature_mtime
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except Exception:
+    BROTLI_AVAILABLE = False
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "0"))
+# 小于该字节数不压缩
+COMPRESS_MIN_BYTES = 512
+# 各压缩编码的 ETag 后缀：不同编码的字节不同，强 ETag 必须区分
+ETAG_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+class RenderedResponse:
+    """一次渲染的结果"""
+
+    __slots__ = ("body", "gzip", "br", "etag", "last_modified", "mtime")
+
+    def __init__(self, payload: Any, mtime: Optional[float]):
+        self.body = json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.gzip = None
+        self.br = None
+        if len(self.body) >= COMPRESS_MIN_BYTES:
+            self.gzip = gzip.compress(self.body, compresslevel=6, mtime=0)
+            if BROTLI_AVAILABLE:
+                self.br = brotli.compress(self.body, quality=5)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:32] + '"'
+        self.mtime = int(mtime) if mtime else None
+        self.last_modified = formatdate(self.mtime, usegmt=True) if self.mtime else None
+
+
+class ResponseCache:
+    """(接口, 参数) -> (数据版本, 渲染结果)；数据版本为各快照的文件签名，变化时重新渲染"""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def render(self, key: Hashable, version: Tuple[Signature, ...], build: Callable[[], Any]) -> RenderedResponse:
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        mtime = signature_mtime(tuple(entry for sig in version for entry in sig))
+        rendered = RenderedResponse(build(), mtime)
+        with self._lock:
+            self._cache[key] = (version, rendered)
+        return rendered
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._cache)
+        return {
+            "entries": entries,
+            "maxsize": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "brotli": BROTLI_AVAILABLE,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def _etag_for(etag: str, encoding: Optional[str]) -> str:
+    suffix = ETAG_SUFFIXES.get(encoding, "") if encoding else ""
+    return etag[:-1] + suffix + '"' if suffix else etag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """etag 为未压缩体的 ETag；客户端缓存的任一编码版本都视为命中(内容相同)"""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        tag = tag.removeprefix("W/")
+        for suffix in ETAG_SUFFIXES.values():
+            if tag.endswith(suffix + '"'):
+                tag = tag[: -len(suffix) - 1] + '"'
+                break
+        if tag == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: Optional[int]) -> bool:
+    if not mtime:
+        return False
+    try:
+        return mtime <= parsedate_to_datetime(header).timestamp()
+    except Exception:
+        return False
+
+
+def _pick_encoding(accept: str, rendered: RenderedResponse) -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in accept.split(",")}
+    if rendered.br is not None and "br" in accepted:
+        return "br"
+    if rendered.gzip is not None and "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def cached_response(
+    request: Request, key: Hashable, version: Tuple[Signature, ...], build: Callable[[], Any]
+) -> Response:
+    """
+    返回 key 在当前数据版本下的缓存响应。
+
+    `build()` 只在版本变化(或首次)时调用，返回 pydantic 模型或可 JSON 化的对象；
+    抛出的 HTTPException 不缓存，原样传出。
+    """
+    rendered = RESPONSE_CACHE.render(key, version, build)
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""), rendered)
+    headers = {
+        "ETag": _etag_for(rendered.etag, encoding),
+        "Cache-Control": f"public, max-age={RESPONSE_CACHE_MAX_AGE}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if rendered.last_modified:
+        headers["Last-Modified"] = rendered.last_modified
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, rendered.etag)
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since", ""), rendered.mtime)
+    if fresh:
+        RESPONSE_CACHE.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    body = rendered.body
+    if encoding == "br":
+        body = rendered.br
+    elif encoding == "gzip":
+        body = rendered.gzip
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def get_response_cache_stats() -> dict:
+    return RESPONSE_CACHE.stats()
@@ -88,6 +88,32 @@ class AnimeListResponse(BaseModel):
     total: int
     page: Optional[int] = 1
     page_size: Optional[int] = None
+    offset: Optional[int] = 0
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
+
+
+# ==================== ID lookup models ====================
+
+class MapEntry(BaseModel):
+    """Mapping entry (mapping/anime_map.json)"""
+    name: Optional[str] = None
+    name_cn: Optional[str] = None
+    date: Optional[str] = Field(None, description="YYYY-MM")
+    ids: AnimeIDs = Field(default_factory=AnimeIDs)
+
+
+class AnimeLookupBatchQuery(BaseModel):
+    """Bulk ID lookup parameters"""
+    id_type: str = Field(..., description="bgm_id, mal_id, douban_id, bili_id, anidb_id, tmdb_id, imdb_id, tvdb_id, wikidata_id")
+    ids: List[str] = Field(..., min_length=1, max_length=10000, description="IDs to resolve")
+
+
+class AnimeLookupBatchResponse(BaseModel):
+    """Bulk ID lookup response"""
+    id_type: str
+    results: Dict[str, Optional[MapEntry]]
+    found: int
+    missing: List[str] = []
 
 
 # ==================== Search models ====================
@@ -101,7 +127,7 @@ class SearchSource(str):
 class AnimeSearchQuery(BaseModel):
     """Anime search parameters"""
     q: str = Field(..., min_length=1, description="Search keyword")
-    source: str = Field("precise", description="Search source: precise, bangumi")
+    source: str = Field("precise", description="Search source: precise, bangumi, local")
 
     year: Optional[int] = Field(None, description="Year filter")
     month: Optional[int] = Field(None, description="Month filter")
@@ -115,6 +141,7 @@ class AnimeSearchQuery(BaseModel):
 
     limit: int = Field(10, ge=1, le=50, description="Limit")
     offset: int = Field(0, ge=0, description="Offset")
+    deadline_ms: Optional[int] = Field(None, ge=1, le=120000, description="Overall latency budget in ms")
 
     class Config:
         populate_by_name = True
@@ -134,6 +161,64 @@ class AnimeSearchResponse(BaseModel):
     results: List[AnimeSearchResult]
     total: int
     filters_applied: Optional[Dict] = None
+    partial: Optional[bool] = Field(None, description="True when some stages were cut by deadline_ms")
+    skipped: Optional[List[str]] = Field(None, description="Sources/stages skipped or cut short by the deadline")
+    elapsed_ms: Optional[int] = None
+
+
+class AnimeSearchStreamEvent(BaseModel):
+    """Streaming search event"""
+    event: str  # provisional, revised, final, error
+    stage: str  # bangumi, anilist, anilist_extra, jikan, validated, extra_scores, final
+    query: str
+    results: List[AnimeSearchResult] = []
+    total: int = 0
+    elapsed_ms: Optional[int] = None
+    partial: Optional[bool] = None  # final event only
+    skipped: Optional[List[str]] = None  # final event only
+    message: Optional[str] = None
+
+
+class AnimeSearchBatchItem(BaseModel):
+    """One query of a batch search"""
+    q: str = Field(..., min_length=1, description="Search keyword")
+    id: Optional[str] = Field(None, description="Client tag, echoed back in the result line")
+    year: Optional[int] = Field(None, description="Year filter")
+    month: Optional[int] = Field(None, description="Month filter")
+    studio: Optional[str] = Field(None, description="Studio filter")
+    director: Optional[str] = Field(None, description="Director filter")
+    source_type: Optional[str] = Field(None, description="Source type filter")
+
+
+class AnimeSearchBatchQuery(BaseModel):
+    """Batch search parameters; options apply to every query"""
+    queries: List[AnimeSearchBatchItem] = Field(..., min_length=1, max_length=1000)
+    source: str = Field("precise", description="Search source: precise, local")
+    match_mode: str = Field("normal", description="Match mode: normal, recall, strict")
+    extra_scores: bool = Field(False, description="Include Anikore/Filmarks scores")
+    debug_scores: bool = Field(False, description="Include debug details for extra scores")
+    limit: int = Field(10, ge=1, le=50, description="Limit per query")
+    deadline_ms: Optional[int] = Field(None, ge=1, le=120000, description="Latency budget per query in ms")
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Queries running at the same time")
+
+
+class AnimeSearchBatchResult(BaseModel):
+    """Batch search NDJSON line: one per query, then a summary"""
+    event: str  # result, error, summary
+    index: Optional[int] = None  # position in `queries`
+    id: Optional[str] = None
+    query: Optional[str] = None
+    results: List[AnimeSearchResult] = []
+    total: int = 0
+    filters_applied: Optional[Dict] = None
+    shared: Optional[bool] = None  # same normalized query as an earlier item, result reused
+    partial: Optional[bool] = None
+    skipped: Optional[List[str]] = None
+    elapsed_ms: Optional[int] = None
+    message: Optional[str] = None
+    # summary only
+    unique: Optional[int] = None
+    errors: Optional[int] = None
 
 
 # ==================== Season models ====================
@@ -159,13 +244,20 @@ class ExportFormat(str):
     """Export format"""
     CSV = "csv"
     JSON = "json"
+    NDJSON = "ndjson"
     XLSX = "xlsx"
+    PARQUET = "parquet"
+    ARROW = "arrow"
 
 
 class ExportQuery(BaseModel):
     """Export query parameters"""
     type: str = Field("airing", description="Type: airing, subscribed, all")
-    format: str = Field("csv", description="Format: csv, json, xlsx")
+    format: str = Field("csv", description="Format: csv, json, ndjson, xlsx, parquet, arrow")
+    min_score: Optional[float] = Field(None, description="Minimum total score")
+    year: Optional[int] = Field(None, description="Air year")
+    sources: Optional[str] = Field(None, description="Required score sources, e.g. bgm,mal")
+    min_sources: Optional[int] = Field(None, description="Minimum number of scored sources")
 
 
 # ==================== Health models ====================
@@ -4,6 +4,7 @@
 AnimeScore API 主入口 (仅保留 v1)
 """
 
+import asyncio
 import os
 import sys
 import uvicorn
@@ -15,8 +16,11 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from utils.ext_linker import refresh_map_file
+from apis.precise import get_local_index
+from utils.ext_linker import refresh_map_file_async
+from utils.http_pool import get_http_registry
 from web_api.api_v1 import api_router as api_v1_router
+from web_api.api_v1.deps import get_airing_list, get_subscribed_list
 
 # ==================== FastAPI 应用配置 ====================
 
@@ -50,10 +54,24 @@ def _env_true(name: str, default: str = "1") -> bool:
     return os.getenv(name, default).strip().lower() in {"1", "true", "yes", "on"}
 
 
+_BACKGROUND_TASKS = set()
+
+
+async def _refresh_map(max_age_hours: int) -> None:
+    updated, message = await refresh_map_file_async(
+        source_url=os.getenv("ANIME_MAP_URL"),
+        force=_env_true("MAP_UPDATE_FORCE", "0"),
+        max_age_hours=max_age_hours,
+    )
+    state = "updated" if updated else "skipped"
+    print(f"[map] {state}: {message}")
+
+
 @app.on_event("startup")
 async def startup_refresh_map() -> None:
     """
-    Refresh external ID mapping on startup.
+    Refresh external ID mapping in the background on startup (conditional
+    request + incremental index update; does not delay serving).
     Controlled by env vars:
       - MAP_AUTO_UPDATE (default: 1)
       - ANIME_MAP_URL
@@ -70,13 +88,42 @@ async def startup_refresh_map() -> None:
     except Exception:
         max_age_hours = 24
 
-    updated, message = refresh_map_file(
-        source_url=os.getenv("ANIME_MAP_URL"),
-        force=_env_true("MAP_UPDATE_FORCE", "0"),
-        max_age_hours=max_age_hours,
-    )
-    state = "updated" if updated else "skipped"
-    print(f"[map] {state}: {message}")
+    task = asyncio.create_task(_refresh_map(max_age_hours))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+@app.on_event("startup")
+async def startup_local_index() -> None:
+    """
+    开启 PRECISE_LOCAL_FIRST 时后台预建本地标题索引，不阻塞启动；
+    否则只在首个 source=local 请求时构建(索引约占 60MB，不必每个 worker 常驻)
+    """
+    if not _env_true("PRECISE_LOCAL_FIRST", "0"):
+        return
+    asyncio.get_running_loop().run_in_executor(None, get_local_index)
+
+
+@app.on_event("startup")
+async def startup_score_snapshots() -> None:
+    """后台预载分数文件快照，首个请求无需等待加载"""
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, get_airing_list)
+    loop.run_in_executor(None, get_subscribed_list)
+
+
+@app.on_event("startup")
+async def startup_http_pool() -> None:
+    """为各上游主机建立共享 AsyncClient 连接池"""
+    get_http_registry().open()
+
+
+@app.on_event("shutdown")
+async def shutdown_http_pool() -> None:
+    """关闭共享连接池（先取消未完成的后台任务）"""
+    for task in list(_BACKGROUND_TASKS):
+        task.cancel()
+    await get_http_registry().aclose()
 
 # ==================== 根路由 ====================
 